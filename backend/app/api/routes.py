@@ -1,4 +1,7 @@
+import json
+
 from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import StreamingResponse
 from ..models.schemas import (
     AIRequest,
     AIResponse,
@@ -19,9 +22,20 @@ from ..models.schemas import (
     RoadmapResponse,
     ApplicationsRequest,
     ApplicationsResponse,
+    SuggestionsResponse,
+    TrendingResponse,
+    SearchResponse,
 )
-from ..services.logic_service import ai_navigator_logic, recommend, what_if
-from ..services.ai_service import generate_roadmap
+from ..services.logic_service import ai_navigator_logic, recommend_async, stream_recommendations, what_if
+from ..services.ai_service import cached_roadmap, fallback_roadmap, stream_roadmap, explanation_cache, roadmap_cache, llm_flights
+from ..services.roadmap_jobs import RoadmapQueueFull, roadmap_jobs
+from ..services.resilience import groq_breaker
+from ..services.llm_client import llm_usage
+from ..services.llm_scheduler import llm_scheduler
+from ..services.collab_service import record_user_items, application_item_ids, suggest_for_user
+from ..services.trending_service import record_event, top_trending, window_days
+from ..services.search_service import search_catalog, autocomplete_catalog
+from ..services.warmer import record_profile
 from ..services.auth_service import (
     register_user,
     login_user,
@@ -34,8 +48,10 @@ from ..services.auth_service import (
     get_user_comparison,
     save_user_profile,
     get_user_profile,
+    sessions,
 )
-from ..storage.memory import get_university, get_program, save_roadmap, get_roadmap, save_applications, get_applications
+from ..storage.backend import storage_metrics
+from ..storage.memory import get_university, get_program, save_roadmap, get_roadmap, save_applications, get_applications, describe_item
 
 
 router = APIRouter()
@@ -131,10 +147,12 @@ def ai_handler(data: AIRequest):
 
 # Recommendations endpoint
 @router.post("/recommendations", response_model=RecommendationResponse)
-def recommendations(req: RecommendationRequest, simulate: bool = False):
+async def recommendations(req: RecommendationRequest, simulate: bool = False):
     """
     Generate university program recommendations with AI explanations.
     
+    The top-k explanations are requested concurrently (see recommend_async).
+    
     Query Parameters:
     - simulate (bool): If true, treat the provided profile as a simulated/what-if scenario.
                        Otherwise, treat as the current user profile.
@@ -142,7 +160,11 @@ def recommendations(req: RecommendationRequest, simulate: bool = False):
     try:
         # Convert profile to dict and generate recommendations
         profile_dict = req.profile.dict()
-        recs = recommend(profile_dict, top_k=req.top_k or 5, is_simulation=simulate)
+        if not simulate:
+            record_profile(profile_dict)
+        recs = await recommend_async(profile_dict, top_k=req.top_k or 5, is_simulation=simulate, explain=req.explain)
+        for rec in recs:
+            record_event("program", f"{rec['university_id']}-{rec['program_id']}", "impression")
         return {"recommendations": recs}
     except Exception as e:
         # Log error and return empty list to prevent frontend crash
@@ -151,10 +173,39 @@ def recommendations(req: RecommendationRequest, simulate: bool = False):
         return {"recommendations": []}
 
 
+@router.post("/recommendations/stream")
+async def recommendations_stream(req: RecommendationRequest, simulate: bool = False):
+    """
+    Streaming variant of /recommendations (NDJSON, one JSON event per line).
+    
+    The ranked list arrives first (explanations are null), then every
+    explanation as soon as it resolves, keyed by "<university_id>-<program_id>",
+    then {"type": "done"}. See stream_recommendations for the event format.
+    """
+    profile_dict = req.profile.dict()
+    if not simulate:
+        record_profile(profile_dict)
+    
+    async def events():
+        try:
+            async for event in stream_recommendations(profile_dict, top_k=req.top_k or 5, is_simulation=simulate, explain=req.explain):
+                if event["type"] == "recommendations":
+                    for rec in event["recommendations"]:
+                        record_event("program", f"{rec['university_id']}-{rec['program_id']}", "impression")
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+        except Exception as e:
+            # Log error and end the stream cleanly to prevent frontend crash
+            import sys
+            print(f"[Recommendations] Error streaming recommendations: {type(e).__name__}: {e}", file=sys.stderr)
+            yield json.dumps({"type": "error", "detail": "recommendations failed"}) + "\n"
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
 # What-if analysis
 @router.post("/what-if", response_model=WhatIfResponse)
 def what_if_handler(req: WhatIfRequest):
-    result = what_if(req.profile.dict(), req.changes, top_k=req.top_k)
+    result = what_if(req.profile.dict(), req.changes, top_k=req.top_k, explain=req.explain)
     return result
 
 
@@ -172,7 +223,12 @@ def save_favorites(req: UserFavoritesRequest, authorization: str = Header(None))
         raise HTTPException(status_code=401, detail="Invalid or expired token")
     
     user_id = session_data["user_id"]
+    previous = set(get_user_favorites(user_id))
     success = save_user_favorites(user_id, req.favorites)
+    if success:
+        record_user_items(user_id, "favorites", req.favorites)
+        for uni_id in set(req.favorites) - previous:
+            record_event("university", uni_id, "favorite")
     
     return {
         "success": success,
@@ -215,7 +271,12 @@ def save_comparison(req: UserComparisonRequest, authorization: str = Header(None
         raise HTTPException(status_code=401, detail="Invalid or expired token")
     
     user_id = session_data["user_id"]
+    previous = set(get_user_comparison(user_id))
     success = save_user_comparison(user_id, req.comparison_list)
+    if success:
+        record_user_items(user_id, "comparison", req.comparison_list)
+        for item_id in set(req.comparison_list) - previous:
+            record_event("program", item_id, "comparison")
     
     return {
         "success": success,
@@ -310,6 +371,22 @@ def update_profile(req: UserProfileRequest, authorization: str = Header(None)):
 
 
 # Roadmap endpoints
+def _roadmap_context(user_id: str, req: RoadmapRequest) -> dict:
+    """Gather the generation context for a roadmap request."""
+    profile = get_user_profile(user_id) or {}
+    university = get_university(req.university_id)
+    program = get_program(req.university_id, req.program_id)
+
+    return {
+        "user_profile": profile,
+        "university": university or {},
+        "program": program or {},
+        "start_date": req.start_date,
+        "deadline": req.deadline,
+        "preferences": req.preferences or {}
+    }
+
+
 @router.post("/roadmap", response_model=RoadmapResponse)
 def create_roadmap(req: RoadmapRequest, authorization: str = Header(None)):
     """Generate and save a personalised roadmap for the authenticated user."""
@@ -325,27 +402,90 @@ def create_roadmap(req: RoadmapRequest, authorization: str = Header(None)):
     if user_id != req.user_id:
         raise HTTPException(status_code=403, detail="User mismatch")
 
-    # Gather context
-    profile = get_user_profile(user_id) or {}
-    university = get_university(req.university_id)
-    program = get_program(req.university_id, req.program_id)
+    context = _roadmap_context(user_id, req)
+    record_event("program", f"{req.university_id}-{req.program_id}", "roadmap")
 
-    context = {
-        "user_profile": profile,
-        "university": university or {},
-        "program": program or {},
-        "start_date": req.start_date,
-        "deadline": req.deadline,
-        "preferences": req.preferences or {}
-    }
-
-    roadmap_result = generate_roadmap(context)
-    items = roadmap_result.get("roadmap", [])
+    cached = cached_roadmap(context)
+    if cached is not None:
+        # An older job still running must not overwrite this roadmap
+        roadmap_jobs.supersede(user_id)
+        save_roadmap(user_id, cached["roadmap"])
+        return {"success": True, "roadmap": cached["roadmap"]}
 
-    # Persist roadmap
+    # Placeholder now, AI roadmap from a background worker
+    items = fallback_roadmap(context)["roadmap"]
     save_roadmap(user_id, items)
+    try:
+        job_id = roadmap_jobs.submit(user_id, context)
+    except RoadmapQueueFull:
+        return {"success": True, "roadmap": items, "message": "AI roadmap queue is full, showing the standard plan"}
 
-    return {"success": True, "roadmap": items}
+    return {"success": True, "roadmap": items, "job_id": job_id, "status": "pending"}
+
+
+@router.post("/roadmap/stream")
+async def create_roadmap_stream(req: RoadmapRequest, authorization: str = Header(None)):
+    """
+    Streaming variant of POST /roadmap (NDJSON, one JSON event per line).
+
+    Roadmap items arrive as soon as the model finishes each one, so the first
+    milestones render within the time to first token; the final
+    {"type": "done", "roadmap": [...]} event carries the saved roadmap.
+    See stream_roadmap for the event format.
+    """
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Missing or invalid token")
+
+    token = authorization.split(" ")[1]
+    is_valid, session_data = verify_token(token)
+    if not is_valid:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+    user_id = session_data["user_id"]
+    if user_id != req.user_id:
+        raise HTTPException(status_code=403, detail="User mismatch")
+
+    context = _roadmap_context(user_id, req)
+    record_event("program", f"{req.university_id}-{req.program_id}", "roadmap")
+
+    async def events():
+        try:
+            async for event in stream_roadmap(context):
+                if event["type"] == "done":
+                    roadmap_jobs.supersede(user_id)
+                    save_roadmap(user_id, event["roadmap"])
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+        except Exception as e:
+            import sys
+            print(f"[Roadmap] Error streaming roadmap: {type(e).__name__}: {e}", file=sys.stderr)
+            yield json.dumps({"type": "error", "detail": "roadmap failed"}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+@router.get("/roadmap/jobs/{job_id}", response_model=RoadmapResponse)
+def get_roadmap_job(job_id: str, authorization: str = Header(None)):
+    """Status of a background roadmap job; roadmap is the final one once done."""
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Missing or invalid token")
+
+    token = authorization.split(" ")[1]
+    is_valid, session_data = verify_token(token)
+    if not is_valid:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+    job = roadmap_jobs.get(job_id)
+    if job is None or job["user_id"] != session_data["user_id"]:
+        raise HTTPException(status_code=404, detail="Roadmap job not found")
+
+    items = job["roadmap"] if job["status"] == "done" else get_roadmap(job["user_id"])
+    return {
+        "success": True,
+        "roadmap": items,
+        "message": job["error"] or "",
+        "job_id": job_id,
+        "status": job["status"],
+    }
 
 
 @router.get("/roadmap", response_model=RoadmapResponse)
@@ -468,11 +608,14 @@ def save_user_applications(data: ApplicationsRequest, authorization: str = Heade
         raise HTTPException(status_code=401, detail="Missing or invalid token")
 
     token = authorization.split(" ")[1]
-    user_id = verify_token(token)
-    if not user_id:
+    is_valid, session_data = verify_token(token)
+    if not is_valid:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    save_applications(user_id, [app.dict() for app in data.applications])
+    user_id = session_data["user_id"]
+    applications = [app.dict() for app in data.applications]
+    save_applications(user_id, applications)
+    record_user_items(user_id, "applications", application_item_ids(applications))
     return {
         "success": True,
         "applications": data.applications,
@@ -487,13 +630,98 @@ def get_user_applications(authorization: str = Header(None)):
         raise HTTPException(status_code=401, detail="Missing or invalid token")
 
     token = authorization.split(" ")[1]
-    user_id = verify_token(token)
-    if not user_id:
+    is_valid, session_data = verify_token(token)
+    if not is_valid:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    applications = get_applications(user_id)
+    applications = get_applications(session_data["user_id"])
     return {
         "success": True,
         "applications": applications,
         "message": "Applications retrieved successfully",
     }
+
+
+
+# Collaborative suggestions ("students like you chose")
+@router.get("/user/suggestions", response_model=SuggestionsResponse)
+def get_user_suggestions(limit: int = 5, authorization: str = Header(None)):
+    """Suggest universities/programs co-chosen by students with similar picks"""
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Missing or invalid token")
+
+    token = authorization.split(" ")[1]
+    is_valid, session_data = verify_token(token)
+    if not is_valid:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+    suggestions = suggest_for_user(session_data["user_id"], limit=max(1, min(limit, 50)))
+    return {
+        "success": True,
+        "suggestions": suggestions,
+    }
+
+
+
+# Trending ("popular this week")
+@router.get("/trending", response_model=TrendingResponse)
+def get_trending(kind: str = "program", limit: int = 10):
+    """Top programs (or universities) by recent favorites, comparisons, roadmaps and impressions"""
+    if kind not in ("program", "university"):
+        raise HTTPException(status_code=400, detail="kind must be 'program' or 'university'")
+
+    items = []
+    for item_id, count in top_trending(kind, limit=max(1, min(limit, 50))):
+        described = describe_item(item_id)
+        if described and described["kind"] == kind:
+            described["score"] = count
+            items.append(described)
+
+    return {
+        "success": True,
+        "kind": kind,
+        "window_days": window_days(),
+        "items": items,
+    }
+
+
+
+# Catalog search
+@router.get("/search", response_model=SearchResponse)
+def search(q: str = "", limit: int = 10):
+    """Full-text search over universities and programs (BM25 ranking)"""
+    results = search_catalog(q, limit=max(1, min(limit, 50)))
+    return {
+        "success": True,
+        "query": q,
+        "results": results,
+    }
+
+
+@router.get("/search/autocomplete", response_model=SearchResponse)
+def search_autocomplete(q: str = "", limit: int = 8):
+    """Prefix suggestions for the search box"""
+    results = autocomplete_catalog(q, limit=max(1, min(limit, 10)))
+    return {
+        "success": True,
+        "query": q,
+        "results": results,
+    }
+
+
+
+# Service metrics (caches, AI usage)
+@router.get("/metrics")
+def get_metrics():
+    """Operational counters for monitoring"""
+    return {
+        "explanation_cache": explanation_cache.metrics(),
+        "roadmap_cache": roadmap_cache.metrics(),
+        "llm_circuit_breaker": groq_breaker.metrics(),
+        "llm_usage": llm_usage.metrics(),
+        "llm_scheduler": llm_scheduler.metrics(),
+        "llm_single_flight": llm_flights.metrics(),
+        "roadmap_jobs": roadmap_jobs.metrics(),
+        "storage": storage_metrics(),
+        "sessions": sessions.metrics(),
+    }
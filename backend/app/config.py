@@ -3,11 +3,123 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Каталог backend/: относительные пути к файлам данных считаются от него,
+# а не от текущего каталога процесса
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _backend_path(path: str) -> str:
+    """Путь из окружения относительно backend/ (пустой путь остаётся пустым)."""
+    return os.path.join(BACKEND_DIR, path) if path else path
+
 # Groq API Key (используем Llama 3 70B вместо Gemini)
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     GROQ_API_KEY = None
 
+# Groq client settings (один долгоживущий пул соединений на процесс)
+GROQ_MODEL = os.getenv("GROQ_MODEL", "qwen/qwen3-32b")
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None
+GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "30"))
+GROQ_CONNECT_TIMEOUT = float(os.getenv("GROQ_CONNECT_TIMEOUT", "5"))
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "20"))
+GROQ_MAX_KEEPALIVE = int(os.getenv("GROQ_MAX_KEEPALIVE", "10"))
+GROQ_KEEPALIVE_EXPIRY = float(os.getenv("GROQ_KEEPALIVE_EXPIRY", "60"))
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "1"))
+
+# Локальный mock LLM вместо Groq (tools/mock_llm_server.py), например
+# LLM_MOCK_URL=http://127.0.0.1:8100 - для нагрузочных тестов без сети и ключа
+LLM_MOCK_URL = os.getenv("LLM_MOCK_URL") or None
+if LLM_MOCK_URL:
+    GROQ_BASE_URL = LLM_MOCK_URL
+    GROQ_API_KEY = GROQ_API_KEY or "mock-key"
+
+# Бюджет задержки запроса (мс): заголовок X-Latency-Budget-Ms или это значение.
+# Вызовы LLM, которые не успевают в бюджет, заменяются fallback. 0 = без бюджета
+REQUEST_LATENCY_BUDGET_MS = int(os.getenv("REQUEST_LATENCY_BUDGET_MS", "20000"))
+
+# Circuit breaker вокруг Groq: размыкается после N ошибок подряд,
+# пробный вызов через RECOVERY секунд
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RECOVERY_SECONDS = float(os.getenv("LLM_BREAKER_RECOVERY_SECONDS", "30"))
+
+# Лимиты Groq на все вызовы LLM (token bucket): запросов и токенов в минуту,
+# 0 = без лимита. По умолчанию - бесплатный tier Groq для qwen/qwen3-32b
+LLM_RATE_RPM = float(os.getenv("LLM_RATE_RPM", "60"))
+LLM_RATE_TPM = float(os.getenv("LLM_RATE_TPM", "6000"))
+# Какую долю max_tokens резервировать под ответ. Ответы обычно намного
+# короче лимита; реальный usage досчитывается после ответа (Permit.settle)
+LLM_COMPLETION_RESERVE = float(os.getenv("LLM_COMPLETION_RESERVE", "0.3"))
+# Сколько секунд вызов может ждать лимит в очереди (по классу приоритета),
+# дальше - fallback. Бюджет задержки запроса тоже ограничивает ожидание
+LLM_QUEUE_WAIT_INTERACTIVE = float(os.getenv("LLM_QUEUE_WAIT_INTERACTIVE", "5"))
+LLM_QUEUE_WAIT_ROADMAP = float(os.getenv("LLM_QUEUE_WAIT_ROADMAP", "60"))
+LLM_QUEUE_WAIT_BACKGROUND = float(os.getenv("LLM_QUEUE_WAIT_BACKGROUND", "300"))
+
+# Кэш объяснений: LRU в памяти + SQLite на диске (пустой путь = только память)
+EXPLANATION_CACHE_PATH = _backend_path(os.getenv("EXPLANATION_CACHE_PATH", "cache/explanations.sqlite3"))
+EXPLANATION_CACHE_MEMORY_SIZE = int(os.getenv("EXPLANATION_CACHE_MEMORY_SIZE", "2048"))
+EXPLANATION_CACHE_DISK_MAX = int(os.getenv("EXPLANATION_CACHE_DISK_MAX", "100000"))
+EXPLANATION_CACHE_TTL_HOURS = float(os.getenv("EXPLANATION_CACHE_TTL_HOURS", "168"))
+
+# Кэш скелетов roadmap: программа + диапазоны разрывов + окно до дедлайна
+ROADMAP_CACHE_PATH = _backend_path(os.getenv("ROADMAP_CACHE_PATH", "cache/roadmaps.sqlite3"))
+ROADMAP_CACHE_MEMORY_SIZE = int(os.getenv("ROADMAP_CACHE_MEMORY_SIZE", "512"))
+ROADMAP_CACHE_DISK_MAX = int(os.getenv("ROADMAP_CACHE_DISK_MAX", "20000"))
+ROADMAP_CACHE_TTL_HOURS = float(os.getenv("ROADMAP_CACHE_TTL_HOURS", "168"))
+
+# Очередь генерации roadmap: POST /roadmap сразу отдаёт fallback и job_id,
+# AI-версию строят WORKERS потоков; не больше QUEUE_MAX ожидающих задач,
+# завершённые задачи хранятся JOB_TTL секунд
+ROADMAP_WORKERS = int(os.getenv("ROADMAP_WORKERS", "2"))
+ROADMAP_QUEUE_MAX = int(os.getenv("ROADMAP_QUEUE_MAX", "100"))
+ROADMAP_JOB_TTL_SECONDS = float(os.getenv("ROADMAP_JOB_TTL_SECONDS", "3600"))
+
+# Хранилище пользователей, сессий, roadmap и заявок: "memory" - словари в
+# процессе (пропадают при рестарте), "sqlite" - файл STORAGE_PATH (WAL).
+# Записи копятся и коммитятся пачкой из BATCH_SIZE ключей или раз в FLUSH_INTERVAL_MS
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "memory")
+STORAGE_PATH = _backend_path(os.getenv("STORAGE_PATH", "data/unismart.sqlite3"))
+STORAGE_BATCH_SIZE = int(os.getenv("STORAGE_BATCH_SIZE", "64"))
+STORAGE_FLUSH_INTERVAL_MS = float(os.getenv("STORAGE_FLUSH_INTERVAL_MS", "50"))
+
+# Сессии: живут не дольше TTL_HOURS с входа и IDLE_TTL_HOURS без запросов
+# (каждый запрос продлевает, запись продления не чаще раза в RENEW_SECONDS).
+# Не больше MAX_PER_USER сессий на пользователя - новый вход вытесняет самую
+# старую. Истёкшие удаляются фоновым потоком раз в SWEEP_INTERVAL_SECONDS
+SESSION_TTL_HOURS = float(os.getenv("SESSION_TTL_HOURS", "720"))
+SESSION_IDLE_TTL_HOURS = float(os.getenv("SESSION_IDLE_TTL_HOURS", "168"))
+SESSION_MAX_PER_USER = int(os.getenv("SESSION_MAX_PER_USER", "10"))
+SESSION_RENEW_SECONDS = float(os.getenv("SESSION_RENEW_SECONDS", "60"))
+SESSION_SWEEP_INTERVAL_SECONDS = float(os.getenv("SESSION_SWEEP_INTERVAL_SECONDS", "60"))
+
+# Режим объяснений: "exact" - один вызов AI на уникальные facts,
+# "signature" - шаблон на (программа, статусы, диапазоны), числа подставляются
+EXPLANATION_MODE = os.getenv("EXPLANATION_MODE", "exact")
+
+# Параллельные объяснения top-k: сколько вызовов Groq одновременно
+# и сколько секунд ждать одно объяснение до fallback
+EXPLANATION_CONCURRENCY = int(os.getenv("EXPLANATION_CONCURRENCY", "5"))
+EXPLANATION_TIMEOUT = float(os.getenv("EXPLANATION_TIMEOUT", "20"))
+
+# "per_item" - отдельный запрос на каждую программу,
+# "batch" - один запрос на все top-k (JSON массив по id программы)
+EXPLANATION_STRATEGY = os.getenv("EXPLANATION_STRATEGY", "per_item")
+
+# Кодировка фактов в промпте: "compact" - короткие ключи и легенда в system prompt,
+# "json" - facts как есть с отступами (старый формат, для сравнения)
+PROMPT_ENCODING = os.getenv("PROMPT_ENCODING", "compact")
+
+# Прогрев кэша объяснений для популярных профилей (фоновая задача в lifespan
+# и CLI: python -m app.services.warmer). По умолчанию выключен - тратит запросы к LLM
+WARMER_ENABLED = os.getenv("WARMER_ENABLED", "false").lower() in ("1", "true", "yes")
+WARMER_INTERVAL_MINUTES = float(os.getenv("WARMER_INTERVAL_MINUTES", "360"))
+WARMER_STARTUP_DELAY_SECONDS = float(os.getenv("WARMER_STARTUP_DELAY_SECONDS", "10"))
+WARMER_LLM_BUDGET = int(os.getenv("WARMER_LLM_BUDGET", "200"))
+WARMER_TOP_K = int(os.getenv("WARMER_TOP_K", "5"))
+WARMER_ROADMAP_TOP_K = int(os.getenv("WARMER_ROADMAP_TOP_K", "1"))
+WARMER_MAX_PROFILES = int(os.getenv("WARMER_MAX_PROFILES", "200"))
+
 # Legacy (оставляем для совместимости)
 GENAI_API_KEY = os.getenv("GENAI_API_KEY")
 if not GENAI_API_KEY:
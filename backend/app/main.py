@@ -10,14 +10,49 @@ Architecture:
 - Clear separation ensures transparency and explainability
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .api.routes import router
+from .services.auth_service import sessions
+from .services.collab_service import rebuild_cooccurrence
+from .services.llm_client import ai_clients
+from .services.ai_service import explanation_cache, roadmap_cache
+from .services.resilience import deadline_scope
+from .services.roadmap_jobs import roadmap_jobs
+from .services.warmer import start_warmer
+from .storage.backend import close_storage
+from .storage.memory import applications_store, users
+from .config import REQUEST_LATENCY_BUDGET_MS
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: open the shared Groq connection pools once per process
+    ai_clients.startup()
+    # "Students like you" matrix is in memory only: replay stored favorites/comparison/applications
+    rebuild_cooccurrence(users.records(), applications_store.items())
+    # Background cache warmer for popular profiles (off unless WARMER_ENABLED)
+    warmer = start_warmer()
+    yield
+    # Shutdown: stop the warmer, roadmap workers and session sweeper, close keep-alive connections,
+    # flush caches and storage to disk
+    if warmer is not None:
+        warmer.cancel()
+    roadmap_jobs.shutdown()
+    sessions.stop()
+    await ai_clients.aclose()
+    explanation_cache.close()
+    roadmap_cache.close()
+    close_storage()
+
 
 app = FastAPI(
     title="UniSmart API",
     description="AI-powered university recommendation engine for Kazakhstan",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -28,6 +63,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class LatencyBudgetMiddleware:
+    """Give every request a latency budget for its LLM calls.
+
+    Budget comes from the X-Latency-Budget-Ms header, else
+    REQUEST_LATENCY_BUDGET_MS (0 disables it). Pure ASGI so the deadline
+    context also covers streamed response bodies.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        budget_ms = REQUEST_LATENCY_BUDGET_MS
+        for name, value in scope.get("headers", []):
+            if name == b"x-latency-budget-ms":
+                try:
+                    budget_ms = int(value)
+                except ValueError:
+                    pass
+                break
+        with deadline_scope(budget_ms / 1000 if budget_ms > 0 else None):
+            await self.app(scope, receive, send)
+
+
+app.add_middleware(LatencyBudgetMiddleware)
+
 # Include routes
 app.include_router(router, prefix="/api")
 
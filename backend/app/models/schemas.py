@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Literal, Optional, Dict, Any
 
 class AIRequest(BaseModel):
     user_id: str
@@ -45,9 +45,14 @@ class UserProfile(BaseModel):
     preferredCity: Optional[str] = "Любой"
 
 
+# none - no explanations, fallback - deterministic templates only, ai - LLM with fallback
+ExplainMode = Literal["none", "fallback", "ai"]
+
+
 class RecommendationRequest(BaseModel):
     profile: UserProfile
     top_k: Optional[int] = 5
+    explain: ExplainMode = "ai"
 
 
 class ExplanationStructure(BaseModel):
@@ -81,6 +86,7 @@ class WhatIfRequest(BaseModel):
     profile: UserProfile
     changes: dict
     top_k: Optional[int] = 5
+    explain: ExplainMode = "ai"
 
 
 class WhatIfResponse(BaseModel):
@@ -145,6 +151,9 @@ class RoadmapResponse(BaseModel):
     success: bool
     roadmap: List[RoadmapItem]
     message: Optional[str] = ""
+    # Set while the AI roadmap is generated in the background (roadmap is the placeholder)
+    job_id: Optional[str] = None
+    status: Optional[str] = None
 
 
 class ApplicationItem(BaseModel):
@@ -163,3 +172,51 @@ class ApplicationsResponse(BaseModel):
     success: bool
     applications: List[ApplicationItem]
     message: Optional[str] = ""
+
+
+class SuggestionItem(BaseModel):
+    id: str  # "uni_id" or "uni_id-program_id"
+    kind: str  # "university" or "program"
+    university_id: str
+    program_id: Optional[str] = None
+    university_name: Optional[str] = None
+    program_name: Optional[str] = None
+    score: float
+
+
+class SuggestionsResponse(BaseModel):
+    success: bool
+    suggestions: List[SuggestionItem]
+
+
+class TrendingItem(BaseModel):
+    id: str
+    kind: str
+    university_id: str
+    program_id: Optional[str] = None
+    university_name: Optional[str] = None
+    program_name: Optional[str] = None
+    score: int  # weighted event count over the window (approximate)
+
+
+class TrendingResponse(BaseModel):
+    success: bool
+    kind: str
+    window_days: float
+    items: List[TrendingItem]
+
+
+class SearchResult(BaseModel):
+    id: str  # "uni_id" or "uni_id-program_id"
+    kind: str  # "university" or "program"
+    title: str
+    subtitle: Optional[str] = None
+    university_id: str
+    program_id: Optional[str] = None
+    score: Optional[float] = None  # BM25 score (search only)
+
+
+class SearchResponse(BaseModel):
+    success: bool
+    query: str
+    results: List[SearchResult]
@@ -9,91 +9,311 @@ AI используется ТОЛЬКО для объяснения уже вы
 - AI Service → объясняет почему эти рекомендации хороши (на основе фактов)
 """
 
+import asyncio
 import json
 import sys
-import re
-from typing import Dict, Any, Optional
+from typing import Dict, Any, AsyncIterator, Callable, List, Optional, Tuple
 from datetime import datetime, timedelta
+import time
 import uuid
+from types import SimpleNamespace
 
-from ..config import GROQ_API_KEY
+from ..config import (
+    GROQ_MODEL,
+    GROQ_TIMEOUT,
+    EXPLANATION_CACHE_PATH,
+    EXPLANATION_CACHE_MEMORY_SIZE,
+    EXPLANATION_CACHE_DISK_MAX,
+    EXPLANATION_CACHE_TTL_HOURS,
+    EXPLANATION_MODE,
+    ROADMAP_CACHE_PATH,
+    ROADMAP_CACHE_MEMORY_SIZE,
+    ROADMAP_CACHE_DISK_MAX,
+    ROADMAP_CACHE_TTL_HOURS,
+    EXPLANATION_CONCURRENCY,
+    EXPLANATION_TIMEOUT,
+    EXPLANATION_STRATEGY,
+    PROMPT_ENCODING,
+)
+from .llm_client import ai_clients, llm_usage, GROQ_AVAILABLE as _GROQ_AVAILABLE, TIMEOUT_ERRORS
+from .fact_encoding import FACT_LEGEND, compact_json, encode_facts
+from .resilience import clip_timeout, groq_breaker, remaining_budget
+from .llm_scheduler import ROADMAP, Permit, current_priority, estimate_tokens, llm_scheduler, priority_scope
+from .single_flight import SingleFlight
+from .content_cache import ContentCache, cache_key
+from .json_stream import JSONStreamParser, parse_text
+from .fallback_templates import render_fallback, render_fallbacks
+from .roadmap_skeleton import roadmap_signature, describe_signature, to_skeleton, from_skeleton
+from .explanation_signature import FACTOR_KEYS, signature_facts, render_template, template_instructions
 
-# Попытаемся импортировать Groq API
-try:
-    from groq import Groq
-    _GROQ_AVAILABLE = True
-except ImportError:
-    _GROQ_AVAILABLE = False
-    print("[AI] WARNING: groq не установлен", file=sys.stderr)
+# Кэш объяснений (память + диск), переживает перезапуски
+explanation_cache = ContentCache(
+    "explanations",
+    path=EXPLANATION_CACHE_PATH or None,
+    memory_size=EXPLANATION_CACHE_MEMORY_SIZE,
+    disk_max_entries=EXPLANATION_CACHE_DISK_MAX,
+    ttl_seconds=EXPLANATION_CACHE_TTL_HOURS * 3600,
+)
 
+# Кэш скелетов roadmap (даты хранятся как смещения от start_date)
+roadmap_cache = ContentCache(
+    "roadmaps",
+    path=ROADMAP_CACHE_PATH or None,
+    memory_size=ROADMAP_CACHE_MEMORY_SIZE,
+    disk_max_entries=ROADMAP_CACHE_DISK_MAX,
+    ttl_seconds=ROADMAP_CACHE_TTL_HOURS * 3600,
+)
 
-def _call_groq_api(system_prompt: str, user_message: str) -> Optional[str]:
+
+# Одинаковые одновременные промпты - один вызов Groq. Ожидающий без бюджета
+# ждёт не дольше, чем ведущий его класса: очередь лимитов + таймаут Groq
+llm_flights = SingleFlight(
+    "groq",
+    max_wait={priority: wait + GROQ_TIMEOUT for priority, wait in llm_scheduler.max_wait.items()},
+)
+
+
+def _groq_messages(system_prompt: str, user_message: str) -> list:
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_message}
+    ]
+
+
+def _response_text(response) -> Optional[str]:
+    """Достаёт текст из ответа Groq (None если ответ пустой)."""
+    if response.choices and response.choices[0].message.content:
+        text = response.choices[0].message.content.strip()
+        print("[AI] ✓ Ответ получен от Llama 3", file=sys.stderr)
+        return text
+    print("[AI] Пустой ответ от Groq", file=sys.stderr)
+    return None
+
+
+def _groq_ready() -> bool:
+    if not _GROQ_AVAILABLE:
+        print("[AI] Groq не доступен", file=sys.stderr)
+        return False
+    if not ai_clients.api_key:
+        print("[AI] GROQ_API_KEY не установлен", file=sys.stderr)
+        return False
+    return True
+
+
+def _call_timeout() -> Optional[float]:
+    """Таймаут следующего вызова Groq: None - вызывать нельзя (бюджет или breaker)."""
+    timeout = clip_timeout(GROQ_TIMEOUT)
+    if timeout <= 0:
+        print("[AI] Бюджет задержки запроса исчерпан, используем fallback", file=sys.stderr)
+        return None
+    if not groq_breaker.allow():
+        print("[AI] Circuit breaker разомкнут, используем fallback", file=sys.stderr)
+        return None
+    return timeout
+
+
+def _admitted(permit: Optional[Permit]) -> Optional[float]:
+    """После очереди планировщика: таймаут вызова или None (fallback, разрешение возвращено)."""
+    if permit is None:
+        print("[AI] Лимит Groq: очередь не дождалась дедлайна, используем fallback", file=sys.stderr)
+        return None
+    timeout = _call_timeout()
+    if timeout is None:
+        permit.cancel()
+    return timeout
+
+
+def _usage_tokens(response) -> Optional[int]:
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None) if usage is not None else None
+
+
+def _groq_failed(e: BaseException, timeout: float) -> None:
+    """Учесть ошибку в breaker; таймаут, урезанный бюджетом запроса, - не вина Groq."""
+    if isinstance(e, TIMEOUT_ERRORS) and timeout < GROQ_TIMEOUT:
+        groq_breaker.release()
+    else:
+        groq_breaker.record_failure()
+
+
+def _client_options(client):
+    # Под бюджетом ретраи SDK не влезут в дедлайн - одна попытка
+    if remaining_budget() is None:
+        return client
+    return client.with_options(max_retries=0)
+
+
+def _prompt_key(system_prompt: str, user_message: str, max_tokens: int) -> str:
+    """Ключ single-flight: хэш всего, что уходит в Groq."""
+    return cache_key({"model": GROQ_MODEL, "system": system_prompt, "user": user_message, "max_tokens": max_tokens})
+
+
+def _call_groq_api(system_prompt: str, user_message: str, max_tokens: int = 1000) -> Optional[str]:
     """Обращение к Groq API (Llama 3 70B).
     
+    Использует общий долгоживущий клиент из llm_client (keep-alive пул),
+    а не создаёт новый на каждый вызов. Таймаут урезается до бюджета
+    запроса (resilience.deadline_scope); при разомкнутом circuit breaker
+    вызова нет вовсе. Лимиты Groq и приоритет вызова - llm_scheduler.
+    Одинаковые одновременные вызовы делят один запрос (single_flight).
+    
     Args:
         system_prompt: Системный промпт (инструкции для AI)
         user_message: Сообщение пользователя (факты для анализа)
+        max_tokens: Лимит токенов ответа (батч объяснений просит больше)
     
     Returns:
         Текст ответа от Groq или None если ошибка
     """
-    if not _GROQ_AVAILABLE:
-        print("[AI] Groq не доступен", file=sys.stderr)
+    try:
+        return llm_flights.do(
+            _prompt_key(system_prompt, user_message, max_tokens),
+            lambda: _groq_request(system_prompt, user_message, max_tokens),
+        )
+    except TimeoutError:
+        print("[AI] Не дождались общего вызова Groq в бюджет запроса, используем fallback", file=sys.stderr)
         return None
-    
-    if not GROQ_API_KEY:
-        print("[AI] GROQ_API_KEY не установлен", file=sys.stderr)
+
+
+def _groq_request(system_prompt: str, user_message: str, max_tokens: int) -> Optional[str]:
+    """Один вызов Groq: очередь лимитов, бюджет, breaker, учёт usage."""
+    if not _groq_ready():
+        return None
+    permit = llm_scheduler.acquire(estimate_tokens(system_prompt, user_message, max_tokens))
+    timeout = _admitted(permit)
+    if timeout is None:
         return None
     
     try:
-        # Инициализируем клиент Groq
-        client = Groq(api_key=GROQ_API_KEY)
-        
         print("[AI] Отправляю запрос к Groq Llama 3...", file=sys.stderr)
         
-        # Вызываем Llama 3 70B
-        response = client.chat.completions.create(
-            model="qwen/qwen3-32b",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message}
-            ],
+        started = time.perf_counter()
+        response = _client_options(ai_clients.client()).chat.completions.create(
+            model=GROQ_MODEL,
+            messages=_groq_messages(system_prompt, user_message),
             temperature=0.3,
-            max_tokens=1000,
+            max_tokens=max_tokens,
+            timeout=timeout,
         )
-        
-        # Извлекаем текст
-        if response.choices and response.choices[0].message.content:
-            text = response.choices[0].message.content.strip()
-            print("[AI] ✓ Ответ получен от Llama 3", file=sys.stderr)
-            return text
-        else:
-            print("[AI] Пустой ответ от Groq", file=sys.stderr)
-            return None
+        groq_breaker.record_success()
+        llm_usage.record(response, time.perf_counter() - started)
+        permit.settle(_usage_tokens(response))
+        return _response_text(response)
             
     except Exception as e:
+        _groq_failed(e, timeout)
         print(f"[AI] Ошибка при вызове Groq: {type(e).__name__}: {e}", file=sys.stderr)
         return None
 
 
-def explain_recommendation(context: Dict[str, Any]) -> Dict[str, Any]:
-    """Объяснить рекомендацию университетской программы.
-    
-    Args:
-        context: Словарь с ключом "facts"
+async def _acall_groq_api(system_prompt: str, user_message: str, max_tokens: int = 1000) -> Optional[str]:
+    """Асинхронный вариант _call_groq_api (AsyncGroq, тот же пул настроек)."""
+    try:
+        return await llm_flights.do_async(
+            _prompt_key(system_prompt, user_message, max_tokens),
+            lambda: _agroq_request(system_prompt, user_message, max_tokens),
+        )
+    except TimeoutError:
+        print("[AI] Не дождались общего вызова Groq в бюджет запроса, используем fallback", file=sys.stderr)
+        return None
+
+
+async def _agroq_request(system_prompt: str, user_message: str, max_tokens: int) -> Optional[str]:
+    """Async вариант _groq_request."""
+    if not _groq_ready():
+        return None
+    permit = await llm_scheduler.acquire_async(estimate_tokens(system_prompt, user_message, max_tokens))
+    timeout = _admitted(permit)
+    if timeout is None:
+        return None
     
-    Returns:
-        Словарь с объяснением в структурированном формате
+    try:
+        print("[AI] Отправляю async запрос к Groq Llama 3...", file=sys.stderr)
+        
+        started = time.perf_counter()
+        response = await _client_options(ai_clients.async_client()).chat.completions.create(
+            model=GROQ_MODEL,
+            messages=_groq_messages(system_prompt, user_message),
+            temperature=0.3,
+            max_tokens=max_tokens,
+            timeout=timeout,
+        )
+        groq_breaker.record_success()
+        llm_usage.record(response, time.perf_counter() - started)
+        permit.settle(_usage_tokens(response))
+        return _response_text(response)
+            
+    except asyncio.CancelledError:
+        # Отменили мы сами (все ожидающие ушли по таймауту или отключились) - не ошибка Groq
+        groq_breaker.release()
+        raise
+    except Exception as e:
+        _groq_failed(e, timeout)
+        print(f"[AI] Ошибка при вызове Groq: {type(e).__name__}: {e}", file=sys.stderr)
+        return None
+
+
+async def _astream_groq_api(
+    system_prompt: str,
+    user_message: str,
+    max_tokens: int = 1000,
+    priority: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """Стриминг ответа Groq: отдаёт текст по мере генерации токенов.
+
+    Groq недоступен или очередь не дождалась - поток пустой (fallback решает
+    вызывающий). Ошибка посреди потока пробрасывается: часть текста уже
+    отдана, и вызывающему нужно знать, что ответ неполный.
+    priority - класс очереди планировщика (по умолчанию текущий).
+    Single-flight не используется - общий поток не разделить между клиентами.
     """
-    
-    facts = context.get("facts", {})
-    
-    if not facts:
-        print("[AI] Пустые facts, используем fallback", file=sys.stderr)
-        return _fallback_explanation(facts)
-    
-    # Простой промпт для Llama 3
-    system_prompt = """Ты помощник по выбору университетов. Анализируй факты и отвечай ТОЛЬКО JSON.
+    if not _groq_ready():
+        return
+    with priority_scope(priority or current_priority()):
+        permit = await llm_scheduler.acquire_async(estimate_tokens(system_prompt, user_message, max_tokens))
+    timeout = _admitted(permit)
+    if timeout is None:
+        return
+
+    print("[AI] Открываю поток Groq Llama 3...", file=sys.stderr)
+    started = time.perf_counter()
+    usage = None
+    stream = None
+    try:
+        stream = await _client_options(ai_clients.async_client()).chat.completions.create(
+            model=GROQ_MODEL,
+            messages=_groq_messages(system_prompt, user_message),
+            temperature=0.3,
+            max_tokens=max_tokens,
+            timeout=timeout,
+            stream=True,
+        )
+        async for chunk in stream:
+            x_groq = getattr(chunk, "x_groq", None)
+            if x_groq is not None and getattr(x_groq, "usage", None) is not None:
+                usage = x_groq.usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    except (asyncio.CancelledError, GeneratorExit):
+        # Клиент ушёл или поток закрыли раньше конца - не ошибка Groq
+        groq_breaker.release()
+        raise
+    except Exception as e:
+        _groq_failed(e, timeout)
+        print(f"[AI] Ошибка в потоке Groq: {type(e).__name__}: {e}", file=sys.stderr)
+        raise
+    else:
+        groq_breaker.record_success()
+    finally:
+        if stream is not None:
+            await stream.response.aclose()
+        response = SimpleNamespace(usage=usage)
+        llm_usage.record(response, time.perf_counter() - started)
+        permit.settle(_usage_tokens(response))
+
+
+# Простой промпт для Llama 3
+_BASE_SYSTEM_PROMPT = """Ты помощник по выбору университетов. Анализируй факты и отвечай ТОЛЬКО JSON.
 JSON структура:
 {
     "summary": "2-3 предложения почему это хорошо",
@@ -106,60 +326,489 @@ JSON структура:
     "considerations": ["замечание 1"]
 }
 ТОЛЬКО JSON БЕЗ КОДА!"""
-    
-    user_message = f"""Верни JSON для этой программы:
-{json.dumps(facts, ensure_ascii=False, indent=2)}
+
+
+# Легенда компактных фактов отправляется один раз в system prompt
+_EXPLANATION_SYSTEM_PROMPT = _BASE_SYSTEM_PROMPT + ("\n" + FACT_LEGEND if PROMPT_ENCODING == "compact" else "")
+
+_SIGNATURE_SYSTEM_PROMPT = _BASE_SYSTEM_PROMPT + "\n" + template_instructions()
+
+
+def _prompt_json(payload: Any) -> str:
+    if PROMPT_ENCODING == "compact":
+        return compact_json(payload)
+    return json.dumps(payload, ensure_ascii=False, indent=2)
+
+
+def _prompt_facts(facts: Dict[str, Any]) -> Dict[str, Any]:
+    """Что из facts отправить в AI: компактная кодировка или facts как есть."""
+    if PROMPT_ENCODING == "compact":
+        return encode_facts(facts)
+    return facts
+
+
+def _explanation_user_message(facts: Dict[str, Any]) -> str:
+    return f"""Верни JSON для этой программы:
+{_prompt_json(facts)}
 
 ВЕРНИ ТОЛЬКО JSON!"""
+
+
+def _explanation_cache_key(facts: Dict[str, Any]) -> str:
+    """Ключ кэша: хэш канонизированных facts + модель + версия промпта."""
+    return cache_key({"v": 1, "model": GROQ_MODEL, "facts": facts})
+
+
+def _validate_explanation(result: Any) -> Optional[Dict[str, Any]]:
+    """Приводит один разобранный JSON объект к структуре объяснения (None если это не объект)."""
+    # Валидируем структуру - ВАЖНО: key_factors должны быть списком объектов
+    if not isinstance(result, dict):
+        return None
     
-    # Пытаемся вызвать Groq
-    ai_response = _call_groq_api(system_prompt, user_message)
+    # Валидируем key_factors
+    key_factors = result.get("key_factors", [])
+    if not isinstance(key_factors, list):
+        key_factors = []
     
-    if ai_response:
+    # Проверяем каждый factor
+    validated_factors = []
+    for factor in key_factors:
+        if isinstance(factor, dict):
+            validated = {
+                "factor": factor.get("factor", ""),
+                "value": factor.get("value", ""),
+                "contribution": float(factor.get("contribution", 0))
+            }
+            # Шаблоны (signature mode) помечают фактор ключом breakdown
+            if factor.get("key") in FACTOR_KEYS:
+                validated["key"] = factor["key"]
+            validated_factors.append(validated)
+    
+    return {
+        "summary": result.get("summary", ""),
+        "key_factors": validated_factors,
+        "explanation": result.get("explanation", ""),
+        "strengths": result.get("strengths", []) if isinstance(result.get("strengths"), list) else [],
+        "considerations": result.get("considerations", []) if isinstance(result.get("considerations"), list) else []
+    }
+
+
+def _parse_explanation(ai_response: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Разбирает ответ AI в структуру объяснения (None если не получилось).
+    
+    Оборванный ответ (парсеру пришлось его дописать) - тоже None: обрезанный
+    summary и пустое explanation хуже fallback, и в кэш они попасть не должны.
+    """
+    if not ai_response:
+        return None
+    # Пропускаем markdown и лишний текст
+    parsed = parse_text(ai_response)
+    result = next((value for value in parsed.values if isinstance(value, dict)), None)
+    if result is None:
+        print(f"[AI] Не удалось распарсить JSON: {ai_response[:100]}", file=sys.stderr)
+        return None
+    if parsed.repaired and result is parsed.values[-1]:
+        print(f"[AI] Ответ оборван, используем fallback: {ai_response[-100:]}", file=sys.stderr)
+        return None
+    try:
+        return _validate_explanation(result)
+    except (ValueError, TypeError) as e:
+        print(f"[AI] Не удалось распарсить JSON: {str(e)[:100]}", file=sys.stderr)
+    return None
+
+
+# (ключ кэша, system prompt, что отправить в AI, как превратить разобранный ответ в объяснение)
+_ExplanationRequest = Tuple[str, str, str, Callable[[Dict[str, Any]], Dict[str, Any]]]
+
+
+def _explanation_plan(facts: Dict[str, Any]) -> _ExplanationRequest:
+    """Ключ кэша и промпт для facts с учётом EXPLANATION_MODE."""
+    if EXPLANATION_MODE == "signature" and isinstance(facts.get("factors"), dict):
+        signature = signature_facts(facts)
+        return (
+            _signature_cache_key(signature),
+            _SIGNATURE_SYSTEM_PROMPT,
+            signature,
+            lambda template: render_template(template, facts),
+        )
+    return (
+        _explanation_cache_key(facts),
+        _EXPLANATION_SYSTEM_PROMPT,
+        _prompt_facts(facts),
+        lambda result: result,
+    )
+
+
+def explanation_is_cached(facts: Dict[str, Any]) -> bool:
+    """Есть ли объяснение для facts в кэше (без учёта в метриках кэша)."""
+    return bool(facts) and explanation_cache.contains(_explanation_plan(facts)[0])
+
+
+def _explanation_request(facts: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[_ExplanationRequest]]:
+    """Общая часть sync и async объяснений: всё, кроме самого вызова Groq.
+    
+    Returns:
+        (готовое объяснение, None) - если facts пустые или ответ есть в кэше;
+        (None, запрос) - если нужен вызов Groq.
+    """
+    if not facts:
+        print("[AI] Пустые facts, используем fallback", file=sys.stderr)
+        return _fallback_explanation(facts), None
+    
+    key, system_prompt, payload, finish = _explanation_plan(facts)
+    cached = explanation_cache.get(key)
+    if cached is not None:
+        return finish(cached), None
+    return None, (key, system_prompt, payload, finish)
+
+
+async def _explanation_request_async(facts: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[_ExplanationRequest]]:
+    """_explanation_request для event loop: диск кэша читается в отдельном потоке."""
+    if not facts:
+        return _explanation_request(facts)
+    
+    key, system_prompt, payload, finish = _explanation_plan(facts)
+    cached = await explanation_cache.aget(key)
+    if cached is not None:
+        return finish(cached), None
+    return None, (key, system_prompt, payload, finish)
+
+
+def _finish_explanation(
+    facts: Dict[str, Any],
+    request: _ExplanationRequest,
+    parsed: Optional[Dict[str, Any]],
+    cost_seconds: float,
+) -> Dict[str, Any]:
+    """Закэшировать разобранный ответ Groq и собрать объяснение (или fallback)."""
+    key, _, _, finish = request
+    if parsed is None:
+        # Fallback если AI не ответил или был error
+        print("[AI] Используем fallback объяснение", file=sys.stderr)
+        return _fallback_explanation(facts)
+    explanation_cache.put(key, parsed, cost_seconds=cost_seconds)
+    return finish(parsed)
+
+
+def explain_recommendation(context: Dict[str, Any]) -> Dict[str, Any]:
+    """Объяснить рекомендацию университетской программы.
+    
+    Успешные ответы AI кэшируются (explanation_cache) по хэшу facts:
+    одинаковые (программа, breakdown, профиль) не отправляются в Groq повторно,
+    в том числе после перезапуска. Fallback не кэшируется - AI может вернуться.
+    
+    В режиме EXPLANATION_MODE="signature" кэшируется шаблон на
+    (программа, статусы, диапазоны разрывов), а точные числа подставляются
+    при ответе - см. explanation_signature.
+    
+    Args:
+        context: Словарь с ключом "facts"
+    
+    Returns:
+        Словарь с объяснением в структурированном формате
+    """
+    facts = context.get("facts", {})
+    ready, request = _explanation_request(facts)
+    if ready is not None:
+        return ready
+    
+    started = time.perf_counter()
+    _, system_prompt, payload, _ = request
+    ai_response = _call_groq_api(system_prompt, _explanation_user_message(payload))
+    return _finish_explanation(facts, request, _parse_explanation(ai_response), time.perf_counter() - started)
+
+
+async def explain_recommendation_async(context: Dict[str, Any]) -> Dict[str, Any]:
+    """Асинхронный вариант explain_recommendation (тот же кэш и fallback)."""
+    facts = context.get("facts", {})
+    ready, request = await _explanation_request_async(facts)
+    if ready is not None:
+        return ready
+    
+    started = time.perf_counter()
+    _, system_prompt, payload, _ = request
+    ai_response = await _acall_groq_api(system_prompt, _explanation_user_message(payload))
+    return _finish_explanation(facts, request, _parse_explanation(ai_response), time.perf_counter() - started)
+
+
+def explain_many(facts_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Объяснить несколько программ (синхронно), результаты в порядке facts_list.
+    
+    EXPLANATION_STRATEGY="batch" - один запрос на все программы (explain_batch),
+    иначе по запросу на программу. Ошибка одной программы даёт fallback только для неё.
+    """
+    if EXPLANATION_STRATEGY == "batch":
+        return explain_batch(facts_list)
+    
+    results = []
+    for facts in facts_list:
         try:
-            # Очищаем JSON от markdown блоков и лишнего текста
-            cleaned = ai_response
-            
-            # Ищем JSON объект
-            match = re.search(r'\{.*\}', cleaned, re.DOTALL)
-            if match:
-                cleaned = match.group(0)
-            
-            cleaned = cleaned.strip()
-            
-            # Парсим JSON ответ
-            result = json.loads(cleaned)
-            
-            # Валидируем структуру - ВАЖНО: key_factors должны быть списком объектов
-            if isinstance(result, dict):
-                # Валидируем key_factors
-                key_factors = result.get("key_factors", [])
-                if not isinstance(key_factors, list):
-                    key_factors = []
-                
-                # Проверяем каждый factor
-                validated_factors = []
-                for factor in key_factors:
-                    if isinstance(factor, dict):
-                        validated_factors.append({
-                            "factor": factor.get("factor", ""),
-                            "value": factor.get("value", ""),
-                            "contribution": float(factor.get("contribution", 0))
-                        })
-                
-                return {
-                    "summary": result.get("summary", ""),
-                    "key_factors": validated_factors,
-                    "explanation": result.get("explanation", ""),
-                    "strengths": result.get("strengths", []) if isinstance(result.get("strengths"), list) else [],
-                    "considerations": result.get("considerations", []) if isinstance(result.get("considerations"), list) else []
-                }
-        except (json.JSONDecodeError, ValueError, TypeError) as e:
-            print(f"[AI] Не удалось распарсить JSON: {str(e)[:100]}", file=sys.stderr)
+            results.append(explain_recommendation({"facts": facts}))
+        except Exception as e:
+            print(f"[AI] Ошибка объяснения {facts.get('university_id')}/{facts.get('program_id')}: {type(e).__name__}: {e}", file=sys.stderr)
+            results.append(_fallback_explanation(facts))
+    return results
+
+
+async def explain_many_async(
+    facts_list: List[Dict[str, Any]],
+    concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """Объяснить несколько программ параллельно.
+    
+    Не больше `concurrency` вызовов Groq одновременно (семафор), каждое
+    объяснение ограничено `timeout` секундами. Ошибка или таймаут одной
+    программы дают fallback только для неё. Результаты возвращаются в том
+    же порядке, что и facts_list (порядок ранжирования).
+    
+    При EXPLANATION_STRATEGY="batch" все программы уходят одним запросом
+    (explain_batch_async), `timeout` ограничивает этот запрос.
+    
+    Args:
+        facts_list: facts программ в порядке ранга
+        concurrency: Лимит параллельных вызовов (по умолчанию EXPLANATION_CONCURRENCY)
+        timeout: Таймаут одного объяснения, сек (по умолчанию EXPLANATION_TIMEOUT)
+    """
+    if EXPLANATION_STRATEGY == "batch":
+        return await explain_batch_async(facts_list, concurrency=concurrency, timeout=timeout)
+    return await _explain_each_async(facts_list, concurrency, timeout)
+
+
+def _explain_one_async(concurrency: Optional[int], timeout: Optional[float]) -> Callable:
+    """Корутина объяснения одной программы: семафор, таймаут и свой fallback."""
+    semaphore = asyncio.Semaphore(max(1, concurrency or EXPLANATION_CONCURRENCY))
+    timeout = timeout if timeout is not None else EXPLANATION_TIMEOUT
+    
+    async def explain_one(facts: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                # Ожидание семафора тоже тратит бюджет запроса
+                return await asyncio.wait_for(explain_recommendation_async({"facts": facts}), clip_timeout(timeout))
+            except asyncio.TimeoutError:
+                print(f"[AI] Таймаут объяснения {facts.get('university_id')}/{facts.get('program_id')}, используем fallback", file=sys.stderr)
+            except Exception as e:
+                print(f"[AI] Ошибка объяснения {facts.get('university_id')}/{facts.get('program_id')}: {type(e).__name__}: {e}", file=sys.stderr)
+            return _fallback_explanation(facts)
+    
+    return explain_one
+
+
+async def _explain_each_async(
+    facts_list: List[Dict[str, Any]],
+    concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """По запросу на программу, параллельно под семафором (см. explain_many_async)."""
+    explain_one = _explain_one_async(concurrency, timeout)
+    # gather сохраняет порядок аргументов - ранжирование не меняется
+    return list(await asyncio.gather(*(explain_one(facts) for facts in facts_list)))
+
+
+async def iter_explanations_async(
+    facts_list: List[Dict[str, Any]],
+    concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """Отдаёт (индекс в facts_list, объяснение) по мере готовности.
+    
+    Для стриминга: быстрые и закэшированные объяснения не ждут медленных.
+    В режиме EXPLANATION_STRATEGY="batch" объяснения приходят разом после
+    ответа на батч. Если потребитель прекратил чтение, незавершённые
+    запросы отменяются.
+    """
+    if EXPLANATION_STRATEGY == "batch":
+        explanations = await explain_batch_async(facts_list, concurrency=concurrency, timeout=timeout)
+        for item in enumerate(explanations):
+            yield item
+        return
+    
+    explain_one = _explain_one_async(concurrency, timeout)
+    
+    async def indexed(i: int, facts: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        return i, await explain_one(facts)
+    
+    tasks = [asyncio.ensure_future(indexed(i, facts)) for i, facts in enumerate(facts_list)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+# ---------------------------------------------------------------------------
+# Батч: одно обращение к Groq на все top-k программы
+# ---------------------------------------------------------------------------
+
+_BATCH_INSTRUCTIONS = """
+Тебе дан JSON МАССИВ программ, у каждой есть поле "id".
+Верни JSON МАССИВ: по одному объекту указанной структуры на каждую программу,
+в каждом объекте добавь поле "id" - точно такое же, как во входных данных."""
+
+# Токенов ответа на одну программу в батче
+_BATCH_TOKENS_PER_ITEM = 700
+
+# Ожидающие AI программы: (индекс в facts_list, запрос)
+_PendingBatch = List[Tuple[int, _ExplanationRequest]]
+
+
+def _batch_item_id(facts: Dict[str, Any]) -> str:
+    """Id программы в батче - как у RecommendationItem: university_id-program_id."""
+    return f"{facts.get('university_id')}-{facts.get('program_id')}"
+
+
+def _batch_user_message(facts_list: List[Dict[str, Any]], pending: _PendingBatch) -> str:
+    batch = [{"id": _batch_item_id(facts_list[i]), **request[2]} for i, request in pending]
+    return f"""Верни JSON массив для этих программ:
+{_prompt_json(batch)}
+
+ВЕРНИ ТОЛЬКО JSON МАССИВ!"""
+
+
+def _parse_batch(ai_response: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    """Разбирает ответ на батч: id -> объяснение.
+    
+    Каждый элемент валидируется отдельно; битые элементы и элементы без id
+    просто пропускаются (для них будет отдельный запрос).
+    """
+    if not ai_response:
+        return {}
+    # Ищем JSON массив (в том числе внутри обёртки вида {"items": [...]})
+    parsed = parse_text(ai_response)
+    data = parsed.values[0] if parsed.values else None
+    if isinstance(data, dict):
+        data = next((v for v in data.values() if isinstance(v, list)), None)
+    if data is None:
+        print(f"[AI] Не удалось распарсить батч JSON: {ai_response[:100]}", file=sys.stderr)
+        return {}
+    if not isinstance(data, list):
+        print("[AI] Батч ответ не является массивом", file=sys.stderr)
+        return {}
+    if parsed.repaired:
+        # Ответ оборван: последний элемент неполный, его объясним отдельным запросом
+        data = data[:-1]
+    
+    explanations = {}
+    for element in data:
+        if not isinstance(element, dict) or not isinstance(element.get("id"), str):
+            continue
+        try:
+            validated = _validate_explanation(element)
+        except (ValueError, TypeError):
+            continue
+        explanations[element["id"]] = validated
+    return explanations
+
+
+def _plan_batch(
+    planned: List[Tuple[Optional[Dict[str, Any]], Optional[_ExplanationRequest]]],
+) -> Tuple[List[Optional[Dict[str, Any]]], Dict[str, _PendingBatch]]:
+    """Разделить программы на готовые (кэш/пустые facts) и ожидающие AI.
+    
+    planned - результаты _explanation_request(_async) в порядке facts_list.
+    Ожидающие сгруппированы по system prompt (exact и signature режимы
+    не смешиваются в одном запросе).
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(planned)
+    groups: Dict[str, _PendingBatch] = {}
+    for i, (ready, request) in enumerate(planned):
+        if ready is not None:
+            results[i] = ready
+        else:
+            groups.setdefault(request[1], []).append((i, request))
+    return results, groups
+
+
+def _apply_batch(
+    facts_list: List[Dict[str, Any]],
+    results: List[Optional[Dict[str, Any]]],
+    pending: _PendingBatch,
+    ai_response: Optional[str],
+    elapsed: float,
+) -> List[int]:
+    """Разложить ответ батча по программам; вернуть индексы без валидного ответа.
+    
+    Если AI не ответил вовсе, отдельные запросы тоже не помогут - эти
+    программы сразу получают fallback, а список повторов пустой.
+    """
+    if ai_response is None:
+        print("[AI] Батч без ответа, используем fallback", file=sys.stderr)
+        indices = [i for i, _ in pending]
+        for i, explanation in zip(indices, render_fallbacks([facts_list[i] for i in indices])):
+            results[i] = explanation
+        return []
+    
+    explanations = _parse_batch(ai_response)
+    cost = elapsed / len(pending)
+    retry = []
+    for i, request in pending:
+        explanation = explanations.get(_batch_item_id(facts_list[i]))
+        if explanation is None:
+            retry.append(i)
+        else:
+            results[i] = _finish_explanation(facts_list[i], request, explanation, cost)
+    if retry:
+        print(f"[AI] Батч: нет валидного ответа для {len(retry)} программ, объясняем по одной", file=sys.stderr)
+    return retry
+
+
+def explain_batch(facts_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Объяснить все программы одним запросом к Groq.
+    
+    Длинный system prompt отправляется один раз, а не k раз. Ответ - JSON
+    массив с id "university_id-program_id"; каждый элемент валидируется и
+    кэшируется под тем же ключом, что и одиночное объяснение. Программы,
+    для которых батч не дал валидного элемента, объясняются по одной.
+    
+    Returns:
+        Объяснения в порядке facts_list
+    """
+    results, groups = _plan_batch([_explanation_request(facts) for facts in facts_list])
+    for system_prompt, pending in groups.items():
+        started = time.perf_counter()
+        ai_response = _call_groq_api(
+            system_prompt + _BATCH_INSTRUCTIONS,
+            _batch_user_message(facts_list, pending),
+            max_tokens=_BATCH_TOKENS_PER_ITEM * len(pending),
+        )
+        for i in _apply_batch(facts_list, results, pending, ai_response, time.perf_counter() - started):
+            results[i] = explain_recommendation({"facts": facts_list[i]})
+    return results
+
+
+async def explain_batch_async(
+    facts_list: List[Dict[str, Any]],
+    concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """Асинхронный explain_batch; батч ограничен `timeout` (таймаут = fallback)."""
+    timeout = timeout if timeout is not None else EXPLANATION_TIMEOUT
+    results, groups = _plan_batch(await asyncio.gather(*(_explanation_request_async(facts) for facts in facts_list)))
+    
+    async def run_group(system_prompt: str, pending: _PendingBatch) -> None:
+        started = time.perf_counter()
+        try:
+            ai_response = await asyncio.wait_for(_acall_groq_api(
+                system_prompt + _BATCH_INSTRUCTIONS,
+                _batch_user_message(facts_list, pending),
+                max_tokens=_BATCH_TOKENS_PER_ITEM * len(pending),
+            ), clip_timeout(timeout))
+        except asyncio.TimeoutError:
+            print("[AI] Таймаут батча объяснений", file=sys.stderr)
+            ai_response = None
+        retry = _apply_batch(facts_list, results, pending, ai_response, time.perf_counter() - started)
+        if retry:
+            explained = await _explain_each_async([facts_list[i] for i in retry], concurrency, timeout)
+            for i, explanation in zip(retry, explained):
+                results[i] = explanation
     
-    # Fallback если AI не ответил или был error
-    print("[AI] Используем fallback объяснение", file=sys.stderr)
-    return _fallback_explanation(facts)
+    await asyncio.gather(*(run_group(sp, pending) for sp, pending in groups.items()))
+    return results
+
+
+def _signature_cache_key(signature: Dict[str, Any]) -> str:
+    return cache_key({"v": 1, "mode": "signature", "model": GROQ_MODEL, "signature": signature})
 
 
 def _fallback_explanation(facts: Dict[str, Any]) -> Dict[str, Any]:
@@ -169,151 +818,31 @@ def _fallback_explanation(facts: Dict[str, Any]) -> Dict[str, Any]:
     - API ключ не установлен
     - Groq недоступен
     - Произошла ошибка при вызове AI
-    """
-    
-    if not facts:
-        return {
-            "summary": "Программа доступна в вашем профиле.",
-            "key_factors": [],
-            "explanation": "Рекомендация основана на соответствии критериям.",
-            "strengths": [],
-            "considerations": []
-        }
-    
-    # Извлекаем базовые данные
-    uni_name = facts.get("university_name", "Университет")
-    prog_name = facts.get("program_name", "Программа")
-    score = float(facts.get("score", 0))
-    factors = facts.get("factors", {})
-    
-    # Определяем качество соответствия
-    if score >= 80:
-        quality = "отличное соответствие"
-    elif score >= 60:
-        quality = "хорошее соответствие"
-    elif score >= 40:
-        quality = "среднее соответствие"
-    else:
-        quality = "базовое соответствие"
-    
-    # Основное резюме
-    summary = f"{uni_name} — программа '{prog_name}' показывает {quality} (оценка: {score:.0f}/100)."
-    
-    # Извлекаем ключевые факторы
-    key_factors = []
-    strengths = []
-    considerations = []
-    
-    factor_names_ru = {
-        "ent": "Баллы ЕНТ",
-        "ielts": "IELTS",
-        "budget": "Бюджет",
-        "city": "Город",
-        "outcomes": "Карьерные перспективы"
-    }
     
-    if isinstance(factors, dict):
-        for fname, fdata in factors.items():
-            if not isinstance(fdata, dict):
-                continue
-            
-            factor_ru = factor_names_ru.get(fname, fname)
-            contribution = float(fdata.get("contribution", 0))
-            
-            # Формируем описание фактора
-            value_desc = ""
-            
-            if fname == "ent":
-                user_ent = float(fdata.get("user", 0))
-                required = float(fdata.get("required", 0))
-                if user_ent >= required:
-                    value_desc = f"Ваш результат ({user_ent:.0f}) соответствует требованию ({required:.0f})"
-                    strengths.append(f"Результат ЕНТ соответствует требованиям")
-                else:
-                    value_desc = f"Ваш результат ({user_ent:.0f}) ниже требования ({required:.0f})"
-                    gap = required - user_ent
-                    considerations.append(f"Нужно улучшить ЕНТ на {gap:.0f} баллов")
-            
-            elif fname == "ielts":
-                user_ielts = float(fdata.get("user", 0))
-                required = float(fdata.get("required", 0))
-                if required == 0:
-                    value_desc = "IELTS не требуется"
-                elif user_ielts >= required:
-                    value_desc = f"Ваш IELTS ({user_ielts:.1f}) соответствует требованию ({required:.1f})"
-                    strengths.append(f"IELTS соответствует требованиям")
-                else:
-                    value_desc = f"Ваш IELTS ({user_ielts:.1f}) ниже требования ({required:.1f})"
-                    gap = required - user_ielts
-                    considerations.append(f"Нужно улучшить IELTS на {gap:.1f} балла")
-            
-            elif fname == "budget":
-                budget = float(fdata.get("budget", 0))
-                tuition = float(fdata.get("tuition", 0))
-                if tuition == 0:
-                    value_desc = "Бесплатное обучение (грант)"
-                    strengths.append("Бесплатное обучение")
-                elif budget >= tuition:
-                    value_desc = f"Бюджет ({budget:,.0f}) ≥ стоимость ({tuition:,.0f})"
-                else:
-                    shortfall = tuition - budget
-                    value_desc = f"Нужно {shortfall:,.0f} тенге дополнительно"
-                    considerations.append(f"Недостаток средств: {shortfall:,.0f} тенге/год")
-            
-            elif fname == "city":
-                preferred = fdata.get("preferred", "Любой")
-                uni_city = fdata.get("university_city", "")
-                if preferred == "Любой" or preferred == uni_city:
-                    value_desc = f"Город совпадает ({uni_city})"
-                    if preferred == uni_city:
-                        strengths.append(f"Университет в предпочитаемом городе ({uni_city})")
-                else:
-                    value_desc = f"Город отличается: {uni_city} vs {preferred}"
-            
-            elif fname == "outcomes":
-                employment = float(fdata.get("employment", 0))
-                salary = float(fdata.get("avgSalary", 0))
-                value_desc = f"Трудоустройство: {employment}%, зарплата: {salary:,.0f} тенге"
-                if employment >= 85:
-                    strengths.append(f"Высокое трудоустройство ({employment}%)")
-            
-            else:
-                value_desc = str(fdata)
-            
-            if value_desc:
-                key_factors.append({
-                    "factor": factor_ru,
-                    "value": value_desc,
-                    "contribution": round(contribution, 1)
-                })
-    
-    # Общее объяснение
-    if score >= 70:
-        explanation = "Программа хорошо соответствует вашему профилю. Рекомендуем рассмотреть."
-    elif score >= 50:
-        explanation = "Программа подходит, но есть ограничения. Может быть вариантом."
-    else:
-        explanation = "Базовое соответствие. Рассмотрите улучшение показателей."
-    
-    return {
-        "summary": summary,
-        "key_factors": key_factors[:5],  # Топ 5 факторов
-        "explanation": explanation,
-        "strengths": strengths[:3] if strengths else ["Соответствие основным требованиям"],
-        "considerations": considerations[:3] if considerations else []
-    }
+    Тексты - предкомпилированные шаблоны, см. fallback_templates.
+    """
+    return render_fallback(facts)
 
 
-def generate_roadmap(context: Dict[str, Any]) -> Dict[str, Any]:
-    """Generate a personalised roadmap (timeline) to apply to a program.
+def fallback_explanations(facts_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Детерминированные объяснения для списка фактов, без обращения к LLM и кэшу."""
+    return render_fallbacks(facts_list)
+
+
+def _roadmap_cache_key(signature: Dict[str, Any]) -> str:
+    return cache_key({"v": 1, "kind": "roadmap", "model": GROQ_MODEL, "signature": signature})
 
-    Expected context keys: user_profile, university, program, start_date (ISO), deadline (ISO)
-    Returns a dict with key 'roadmap' -> list of roadmap items.
-    """
 
-    profile = context.get("user_profile", {})
-    uni = context.get("university", {})
-    program = context.get("program", {})
+def roadmap_is_cached(signature: Dict[str, Any]) -> bool:
+    """Есть ли скелет roadmap для сигнатуры (без учёта в метриках кэша)."""
+    return roadmap_cache.contains(_roadmap_cache_key(signature))
+
+
+def _roadmap_inputs(context: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any], datetime, Optional[datetime]]:
+    """(profile, university, program, start_date, deadline) из контекста roadmap."""
+    profile = context.get("user_profile", {}) or {}
+    uni = context.get("university", {}) or {}
+    program = context.get("program", {}) or {}
     start_date_iso = context.get("start_date")
     deadline_iso = context.get("deadline")
 
@@ -328,24 +857,51 @@ def generate_roadmap(context: Dict[str, Any]) -> Dict[str, Any]:
     except Exception:
         deadline = None
 
-    system_prompt = (
-        "Ты опытный советник по поступлению в университеты. Создай уникальный, детализированный план (roadmap) поступления для студента.\n"
-        "ВАЖНО: Верни ТОЛЬКО валидный JSON без markdown, без ```json блоков.\n"
-        "Учитывай профиль студента, требования программы и даты.\n"
-        "Структура: {\"roadmap\": [{\"title\": \"...\", \"description\": \"...\", \"due_date\": \"YYYY-MM-DD\", \"priority\": 1-5, \"notify_before_days\": 7, \"subtasks\": [{\"title\": \"...\", \"due_date\": \"YYYY-MM-DD\"}]}]}\n"
-        "Создай 6-8 уникальных пунктов в зависимости от программы и профиля.\n"
-        "Задачи должны быть специфичны для этой программы, не обобщены.\n"
-        "Включи сроки для тестов, подачи, интервью, финансовых вопросов, если они релевантны.\n"
-        "Возвращай ТОЛЬКО JSON, начиная с {."
-    )
+    return profile, uni, program, start_date, deadline
+
+
+def cached_roadmap(context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Roadmap из кэша скелетов (None если его там нет) - без вызова AI."""
+    profile, uni, program, start_date, deadline = _roadmap_inputs(context)
+    skeleton = roadmap_cache.get(_roadmap_cache_key(roadmap_signature(profile, uni, program, start_date, deadline)))
+    if skeleton is None:
+        return None
+    return {"roadmap": from_skeleton(skeleton, start_date, deadline)}
+
+
+def fallback_roadmap(context: Dict[str, Any]) -> Dict[str, Any]:
+    """Детерминированный roadmap по профилю и требованиям программы (без AI)."""
+    profile, uni, program, start_date, _ = _roadmap_inputs(context)
+    return _fallback_roadmap(profile, uni, program, start_date)
+
 
-    user_message = (
-        f"Студент с профилем:\n"
-        f"- ЕНТ: {profile.get('entScore', '?')}\n"
-        f"- IELTS: {profile.get('ieltsScore', '?')}\n"
-        f"- Бюджет: {profile.get('budget', '?')} KZT\n"
-        f"- Город: {profile.get('preferredCity', 'Любой')}\n"
-        f"- Интересы: {', '.join(profile.get('interests', []))}\n\n"
+_ROADMAP_SYSTEM_PROMPT = (
+    "Ты опытный советник по поступлению в университеты. Создай уникальный, детализированный план (roadmap) поступления для студента.\n"
+    "ВАЖНО: Верни ТОЛЬКО валидный JSON без markdown, без ```json блоков.\n"
+    "Учитывай профиль студента, требования программы и даты.\n"
+    "Структура: {\"roadmap\": [{\"title\": \"...\", \"description\": \"...\", \"due_date\": \"YYYY-MM-DD\", \"priority\": 1-5, \"notify_before_days\": 7, \"subtasks\": [{\"title\": \"...\", \"due_date\": \"YYYY-MM-DD\"}]}]}\n"
+    "Создай 6-8 уникальных пунктов в зависимости от программы и профиля.\n"
+    "Задачи должны быть специфичны для этой программы, не обобщены.\n"
+    "Включи сроки для тестов, подачи, интервью, финансовых вопросов, если они релевантны.\n"
+    "Возвращай ТОЛЬКО JSON, начиная с {."
+)
+
+
+def _roadmap_user_message(
+    uni: Dict[str, Any],
+    program: Dict[str, Any],
+    start_date: datetime,
+    deadline: Optional[datetime],
+    signature: Dict[str, Any],
+) -> str:
+    # The student is described by buckets, not exact numbers, so the answer
+    # is valid for everyone with the same signature
+    situation = describe_signature(signature)
+    return (
+        f"Положение студента относительно требований программы:\n"
+        f"- ЕНТ: {situation['ent']}\n"
+        f"- IELTS: {situation['ielts']}\n"
+        f"- Бюджет: {situation['budget']}\n\n"
         f"Хочет поступить на:\n"
         f"- Университет: {uni.get('name', '?')}\n"
         f"- Программа: {program.get('name', '?')}\n"
@@ -355,62 +911,155 @@ def generate_roadmap(context: Dict[str, Any]) -> Dict[str, Any]:
         f"- Требования: ЕНТ {program.get('minENT', '?')}, IELTS {program.get('minIELTS', '?')}\n"
         f"- Трудоустройство: {program.get('employmentRate', '?')}%\n\n"
         f"Дата начала: {start_date.strftime('%Y-%m-%d')}\n"
+        f"Сроки: {situation['window']}\n"
         f"Дедлайн (если есть): {deadline.strftime('%Y-%m-%d') if deadline else 'Не указан'}\n\n"
         f"Создай уникальный roadmap на основе ВСЕЙ этой информации. Учитывай:\n"
         f"- Пробелы в требованиях (например, нужна ли подготовка IELTS)\n"
         f"- Специфику программы (напр. для IT нужны техпроекты, для медицины - справки)\n"
         f"- Финансовые аспекты\n"
         f"- Сроки подачи\n\n"
+        f"Не указывай конкретные баллы и суммы студента - только требования программы.\n"
         f"Верни ТОЛЬКО JSON без каких-либо комментариев!"
     )
 
-    ai_response = _call_groq_api(system_prompt, user_message)
+
+def generate_roadmap(context: Dict[str, Any]) -> Dict[str, Any]:
+    """Generate a personalised roadmap (timeline) to apply to a program.
+
+    Expected context keys: user_profile, university, program, start_date (ISO), deadline (ISO)
+    Returns a dict with key 'roadmap' -> list of roadmap items.
+
+    AI roadmaps are cached as skeletons keyed on program, gap buckets and
+    the deadline window (see roadmap_skeleton); a hit is re-based on this
+    request's start_date. The fallback roadmap is not cached, and neither is
+    a truncated AI reply (its last, incomplete item is dropped).
+    """
+
+    profile, uni, program, start_date, deadline = _roadmap_inputs(context)
+
+    # Cached skeleton for the same program, gap buckets and date window
+    signature = roadmap_signature(profile, uni, program, start_date, deadline)
+    roadmap_key = _roadmap_cache_key(signature)
+    skeleton = roadmap_cache.get(roadmap_key)
+    if skeleton is not None:
+        return {"roadmap": from_skeleton(skeleton, start_date, deadline)}
+
+    user_message = _roadmap_user_message(uni, program, start_date, deadline, signature)
+
+    started = time.perf_counter()
+    ai_response = _call_groq_api(_ROADMAP_SYSTEM_PROMPT, user_message)
 
     if ai_response:
         try:
-            cleaned = ai_response.strip()
-            
-            # Remove markdown code blocks if present
-            if cleaned.startswith("```"):
-                cleaned = cleaned.split("```")[1]
-                if cleaned.startswith("json"):
-                    cleaned = cleaned[4:]
-            cleaned = cleaned.strip()
-            
-            # Find JSON object
-            match = re.search(r'\{.*\}', cleaned, re.DOTALL)
-            if match:
-                cleaned = match.group(0)
-            
-            result = json.loads(cleaned)
+            parsed = parse_text(ai_response)
+            result = next((v for v in parsed.values if isinstance(v, dict)), None)
             if isinstance(result, dict) and isinstance(result.get("roadmap"), list):
+                elements = result["roadmap"]
+                if parsed.repaired:
+                    # Ответ оборван: последний пункт неполный, отбрасываем его
+                    elements = elements[:-1]
                 # Validate and normalize
                 items = []
-                for it in result.get("roadmap", []):
-                    try:
-                        due = it.get("due_date")
-                        if due:
-                            # Validate ISO format
-                            _ = datetime.fromisoformat(due)
-                    except Exception:
-                        # If date invalid, auto-calculate
-                        offset = len(items) * 20  # Spread them out
-                        due = (start_date + timedelta(days=offset)).date().isoformat()
-                        it["due_date"] = due
-                    
-                    it.setdefault("id", str(uuid.uuid4()))
-                    it.setdefault("priority", 3)
-                    it.setdefault("notify_before_days", 7)
-                    it.setdefault("subtasks", [])
-                    items.append(it)
+                for it in elements:
+                    items.append(_normalize_roadmap_item(it, len(items), start_date))
                 
                 if items:  # Return AI roadmap if we got items
+                    # An incomplete roadmap is served once, never cached
+                    if not parsed.repaired:
+                        roadmap_cache.put(roadmap_key, to_skeleton(items, start_date), cost_seconds=time.perf_counter() - started)
                     return {"roadmap": items}
         except Exception as e:
             print(f"[AI] Не удалось распарсить roadmap JSON: {e}", file=sys.stderr)
 
     # Fallback: Generate smart roadmap based on profile and program
     print("[AI] Используем smart fallback roadmap генератор", file=sys.stderr)
+    return _fallback_roadmap(profile, uni, program, start_date)
+
+
+def _normalize_roadmap_item(it: Dict[str, Any], index: int, start_date: datetime) -> Dict[str, Any]:
+    """Проверить дату пункта roadmap от AI и дополнить поля по умолчанию."""
+    try:
+        due = it.get("due_date")
+        if due:
+            # Validate ISO format
+            _ = datetime.fromisoformat(due)
+    except Exception:
+        # If date invalid, auto-calculate
+        offset = index * 20  # Spread them out
+        due = (start_date + timedelta(days=offset)).date().isoformat()
+        it["due_date"] = due
+    
+    it.setdefault("id", str(uuid.uuid4()))
+    it.setdefault("priority", 3)
+    it.setdefault("notify_before_days", 7)
+    it.setdefault("subtasks", [])
+    return it
+
+
+async def stream_roadmap(context: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    """Roadmap по мере генерации: пункт отдаётся, как только он закрылся в потоке токенов.
+
+    СОБЫТИЯ (по порядку):
+    1. {"type": "item", "item": {...}} - пункт roadmap
+    2. {"type": "reset"} - поток AI оборвался после части пунктов; дальше
+       идут пункты fallback, показанные пункты нужно убрать
+    3. {"type": "done", "source": "ai" | "cache" | "fallback", "roadmap": [...]}
+       - весь roadmap (для сохранения)
+
+    Кэш скелетов и fallback те же, что у generate_roadmap.
+    """
+    profile, uni, program, start_date, deadline = _roadmap_inputs(context)
+    signature = roadmap_signature(profile, uni, program, start_date, deadline)
+    roadmap_key = _roadmap_cache_key(signature)
+    skeleton = await roadmap_cache.aget(roadmap_key)
+    if skeleton is not None:
+        items = from_skeleton(skeleton, start_date, deadline)
+        for item in items:
+            yield {"type": "item", "item": item}
+        yield {"type": "done", "source": "cache", "roadmap": items}
+        return
+
+    items: List[Dict[str, Any]] = []
+    started = time.perf_counter()
+    parser = JSONStreamParser(element_key="roadmap")
+    try:
+        chunks = _astream_groq_api(_ROADMAP_SYSTEM_PROMPT, _roadmap_user_message(uni, program, start_date, deadline, signature), priority=ROADMAP)
+        async for chunk in chunks:
+            for element in parser.feed(chunk):
+                if isinstance(element, dict):
+                    item = _normalize_roadmap_item(element, len(items), start_date)
+                    items.append(item)
+                    yield {"type": "item", "item": item}
+        # Пункты, которые close() достраивает из оборванного ответа, неполные - не показываем
+        parser.close()
+    except Exception as e:
+        print(f"[AI] Поток roadmap прерван: {type(e).__name__}: {e}", file=sys.stderr)
+        if items:
+            yield {"type": "reset"}
+        items = []
+
+    if items:
+        if parser.repaired:
+            print("[AI] Ответ roadmap оборван, скелет не кэшируем", file=sys.stderr)
+        else:
+            roadmap_cache.put(roadmap_key, to_skeleton(items, start_date), cost_seconds=time.perf_counter() - started)
+        yield {"type": "done", "source": "ai", "roadmap": items}
+        return
+
+    print("[AI] Используем smart fallback roadmap генератор", file=sys.stderr)
+    items = _fallback_roadmap(profile, uni, program, start_date)["roadmap"]
+    for item in items:
+        yield {"type": "item", "item": item}
+    yield {"type": "done", "source": "fallback", "roadmap": items}
+
+
+def _fallback_roadmap(
+    profile: Dict[str, Any],
+    uni: Dict[str, Any],
+    program: Dict[str, Any],
+    start_date: datetime,
+) -> Dict[str, Any]:
+    """Smart fallback roadmap: шаги по пробелам в ЕНТ/IELTS/бюджете."""
     roadmap = []
 
     # Determine what needs to be done based on profile
@@ -3,9 +3,27 @@ import hashlib
 from datetime import datetime
 from typing import Optional, Tuple
 
-# In-memory storage for users
-users_db = {}
-sessions = {}
+from ..config import (
+    SESSION_IDLE_TTL_HOURS,
+    SESSION_MAX_PER_USER,
+    SESSION_RENEW_SECONDS,
+    SESSION_SWEEP_INTERVAL_SECONDS,
+    SESSION_TTL_HOURS,
+)
+from ..storage.backend import open_table
+from ..storage.memory import users
+from ..storage.sessions import SessionStore
+
+# Sessions by token, expiring (see storage.sessions); users live in the
+# indexed repository storage.memory.users
+sessions = SessionStore(
+    open_table("sessions"),
+    absolute_ttl=SESSION_TTL_HOURS * 3600,
+    idle_ttl=SESSION_IDLE_TTL_HOURS * 3600,
+    max_per_user=SESSION_MAX_PER_USER,
+    sweep_interval=SESSION_SWEEP_INTERVAL_SECONDS,
+    renew_every=SESSION_RENEW_SECONDS,
+)
 
 def hash_password(password: str) -> str:
     """Hash password using SHA-256"""
@@ -20,10 +38,6 @@ def register_user(name: str, email: str, password: str) -> Tuple[bool, str, Opti
     Register a new user
     Returns: (success, message, user_data)
     """
-    # Check if user already exists
-    if email in users_db:
-        return False, "User with this email already exists", None
-    
     user_id = str(uuid.uuid4())
     hashed_password = hash_password(password)
     
@@ -35,15 +49,13 @@ def register_user(name: str, email: str, password: str) -> Tuple[bool, str, Opti
         "created_at": datetime.now().isoformat(),
     }
     
-    users_db[email] = user
+    # The email check and insert are one step, so two registrations cannot both win
+    if not users.add(user):
+        return False, "User with this email already exists", None
     
     # Create session token
     token = generate_token()
-    sessions[token] = {
-        "user_id": user_id,
-        "email": email,
-        "created_at": datetime.now().isoformat(),
-    }
+    sessions.create(token, user_id, email)
     
     return True, "User registered successfully", {
         "id": user_id,
@@ -58,10 +70,10 @@ def login_user(email: str, password: str) -> Tuple[bool, str, Optional[dict]]:
     Returns: (success, message, user_data_with_token)
     """
     # Check if user exists
-    if email not in users_db:
+    user = users.get_by_email(email)
+    if user is None:
         return False, "User not found", None
     
-    user = users_db[email]
     hashed_password = hash_password(password)
     
     # Verify password
@@ -70,11 +82,7 @@ def login_user(email: str, password: str) -> Tuple[bool, str, Optional[dict]]:
     
     # Create session token
     token = generate_token()
-    sessions[token] = {
-        "user_id": user["id"],
-        "email": email,
-        "created_at": datetime.now().isoformat(),
-    }
+    sessions.create(token, user["id"], email)
     
     return True, "Login successful", {
         "id": user["id"],
@@ -85,86 +93,67 @@ def login_user(email: str, password: str) -> Tuple[bool, str, Optional[dict]]:
 
 def verify_token(token: str) -> Tuple[bool, Optional[dict]]:
     """
-    Verify if a token is valid and return session data
+    Verify if a token is valid and return session data.
+    Each successful check extends the session's idle timeout.
     Returns: (is_valid, session_data)
     """
-    if token not in sessions:
+    session = sessions.verify(token)
+    if session is None:
         return False, None
     
-    return True, sessions[token]
+    return True, session
 
 def logout_user(token: str) -> Tuple[bool, str]:
     """
     Logout user by removing token
     Returns: (success, message)
     """
-    if token in sessions:
-        del sessions[token]
+    if sessions.revoke(token):
         return True, "Logged out successfully"
     
     return False, "Invalid token"
 
 def get_user_by_id(user_id: str) -> Optional[dict]:
     """Get user by ID"""
-    for email, user in users_db.items():
-        if user["id"] == user_id:
-            return {
-                "id": user["id"],
-                "name": user["name"],
-                "email": user["email"],
-                "created_at": user["created_at"],
-            }
-    return None
+    user = users.get(user_id)
+    if user is None:
+        return None
+    return {
+        "id": user["id"],
+        "name": user["name"],
+        "email": user["email"],
+        "created_at": user["created_at"],
+    }
 
 
 def save_user_favorites(user_id: str, favorites: list) -> bool:
     """Save user favorites list"""
-    for email, user in users_db.items():
-        if user["id"] == user_id:
-            user["favorites"] = favorites
-            return True
-    return False
+    return users.update(user_id, lambda user: user.update(favorites=favorites))
 
 
 def get_user_favorites(user_id: str) -> list:
     """Get user favorites list"""
-    for email, user in users_db.items():
-        if user["id"] == user_id:
-            return user.get("favorites", [])
-    return []
+    user = users.get(user_id)
+    return user.get("favorites", []) if user else []
 
 
 def save_user_comparison(user_id: str, comparison_list: list) -> bool:
     """Save user comparison list"""
-    for email, user in users_db.items():
-        if user["id"] == user_id:
-            user["comparison_list"] = comparison_list
-            return True
-    return False
+    return users.update(user_id, lambda user: user.update(comparison_list=comparison_list))
 
 
 def get_user_comparison(user_id: str) -> list:
     """Get user comparison list"""
-    for email, user in users_db.items():
-        if user["id"] == user_id:
-            return user.get("comparison_list", [])
-    return []
+    user = users.get(user_id)
+    return user.get("comparison_list", []) if user else []
 
 
 def save_user_profile(user_id: str, profile_data: dict) -> bool:
     """Save user profile settings"""
-    for email, user in users_db.items():
-        if user["id"] == user_id:
-            if "profile" not in user:
-                user["profile"] = {}
-            user["profile"].update(profile_data)
-            return True
-    return False
+    return users.update(user_id, lambda user: user.setdefault("profile", {}).update(profile_data))
 
 
 def get_user_profile(user_id: str) -> dict:
     """Get user profile settings"""
-    for email, user in users_db.items():
-        if user["id"] == user_id:
-            return user.get("profile", {})
-    return {}
+    user = users.get(user_id)
+    return user.get("profile", {}) if user else {}
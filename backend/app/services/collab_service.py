@@ -0,0 +1,197 @@
+"""Collaborative "students like you chose" suggestions.
+
+This module turns the behavioural signals we already store (favorites,
+comparison lists and applications) into item-item suggestions.
+
+DATA STRUCTURES:
+- user_items: user_id -> source -> set of item ids (what each user touched)
+- cooccurrence: item -> {other_item: number of users who have both}
+- item_users: item -> number of users who have the item
+
+Item ids follow the conventions already used by the frontend:
+- University favorites: "{university_id}" (e.g. "nu")
+- Programs (comparison list, applications): "{university_id}-{program_id}"
+
+WHY ITEM-ITEM CO-OCCURRENCE:
+- Incremental: each write only touches pairs involving the changed items
+- Sparse: we only store pairs that some user actually holds together
+- Cheap reads: suggestions for a user need one row lookup per item the
+  user holds (O(k) lookups), never a scan over all users
+
+STARTUP:
+The matrix lives in memory only. rebuild_cooccurrence() replays every
+stored user's favorites, comparison list and applications through
+record_user_items when the app starts, so suggestions survive a restart
+on the SQLite storage backend.
+"""
+
+import math
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..storage.memory import list_universities, describe_item
+
+# Sources we learn from. Each user's item set is the union over sources.
+SOURCES = ("favorites", "comparison", "applications")
+
+user_items: Dict[str, Dict[str, Set[str]]] = {}
+cooccurrence: Dict[str, Dict[str, int]] = {}
+item_users: Dict[str, int] = {}
+
+# Sync routes run in FastAPI's threadpool, so writes must be serialised
+_lock = threading.Lock()
+
+
+def _union(sources: Dict[str, Set[str]]) -> Set[str]:
+    items: Set[str] = set()
+    for source_items in sources.values():
+        items |= source_items
+    return items
+
+
+def _bump(a: str, b: str, delta: int) -> None:
+    """Adjust the symmetric pair count (a, b), dropping empty cells."""
+    for x, y in ((a, b), (b, a)):
+        row = cooccurrence.setdefault(x, {})
+        count = row.get(y, 0) + delta
+        if count > 0:
+            row[y] = count
+        else:
+            row.pop(y, None)
+            if not row:
+                cooccurrence.pop(x, None)
+
+
+def record_user_items(user_id: str, source: str, items: Iterable[str]) -> None:
+    """Replace one source of a user's items and update the matrix incrementally.
+
+    Only pairs that involve added or removed items are touched, so the cost
+    is O(changed_items * user_items) regardless of how many users exist.
+    """
+    if source not in SOURCES:
+        raise ValueError(f"Unknown source: {source}")
+
+    new_source_items = {item for item in items if item}
+
+    with _lock:
+        sources = user_items.setdefault(user_id, {})
+        old_items = _union(sources)
+        sources[source] = new_source_items
+        new_items = _union(sources)
+
+        removed = old_items - new_items
+        added = new_items - old_items
+
+        # Walk removals against a shrinking set, then additions against a
+        # growing one, so every pair is adjusted exactly once
+        current = set(old_items)
+        for item in removed:
+            current.discard(item)
+            for other in current:
+                _bump(item, other, -1)
+            count = item_users.get(item, 0) - 1
+            if count > 0:
+                item_users[item] = count
+            else:
+                item_users.pop(item, None)
+
+        for item in added:
+            for other in current:
+                _bump(item, other, 1)
+            current.add(item)
+            item_users[item] = item_users.get(item, 0) + 1
+
+
+def rebuild_cooccurrence(
+    users: Iterable[Dict[str, Any]],
+    applications: Iterable[Tuple[str, List[Dict[str, Any]]]],
+) -> int:
+    """Rebuild the matrix from stored user records and (user_id, applications) pairs.
+
+    Replaces whatever is in memory; returns the number of users with items.
+    """
+    with _lock:
+        user_items.clear()
+        cooccurrence.clear()
+        item_users.clear()
+    for user in users:
+        record_user_items(user["id"], "favorites", user.get("favorites", []))
+        record_user_items(user["id"], "comparison", user.get("comparison_list", []))
+    for user_id, entries in applications:
+        record_user_items(user_id, "applications", application_item_ids(entries))
+    with _lock:
+        return sum(1 for sources in user_items.values() if _union(sources))
+
+
+def application_item_ids(applications: List[Dict[str, Any]]) -> List[str]:
+    """Resolve application entries to program item ids.
+
+    Applications store display names ("Назарбаев Университет", "Computer
+    Science") or ids. Entries that do not resolve to a catalog program are
+    ignored - they would only add noise to the matrix.
+    """
+    item_ids = []
+    for app in applications:
+        uni = _find_university(app.get("university", ""))
+        if not uni:
+            continue
+        prog = _find_program(uni, app.get("program", ""))
+        if prog:
+            item_ids.append(f"{uni['id']}-{prog['id']}")
+    return item_ids
+
+
+def _find_university(value: str) -> Optional[Dict[str, Any]]:
+    needle = (value or "").strip().lower()
+    if not needle:
+        return None
+    for uni in list_universities():
+        if needle in (uni["id"].lower(), uni.get("name", "").lower()):
+            return uni
+    return None
+
+
+def _find_program(uni: Dict[str, Any], value: str) -> Optional[Dict[str, Any]]:
+    needle = (value or "").strip().lower()
+    if not needle:
+        return None
+    for prog in uni.get("programs", []):
+        if needle in (prog["id"].lower(), prog.get("name", "").lower()):
+            return prog
+    return None
+
+
+def suggest_for_user(user_id: str, limit: int = 5) -> List[Dict[str, Any]]:
+    """Return items co-chosen with the user's items, best first.
+
+    SCORING:
+    For every item i the user holds, each neighbour j gets
+    C[i][j] / sqrt(N[i] * N[j]) (cosine similarity over user sets), summed
+    across the user's items. Normalising by N keeps universally popular
+    items from drowning out specific co-choices.
+    """
+    with _lock:
+        owned = _union(user_items.get(user_id, {}))
+        scores: Dict[str, float] = {}
+        for item in owned:
+            row = cooccurrence.get(item)
+            if not row:
+                continue
+            n_item = item_users.get(item, 1)
+            for other, count in row.items():
+                if other in owned:
+                    continue
+                norm = math.sqrt(n_item * item_users.get(other, 1))
+                scores[other] = scores.get(other, 0.0) + count / norm
+
+    ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+    suggestions = []
+    for item_id, score in ranked:
+        described = describe_item(item_id)
+        if not described:
+            continue
+        described["score"] = round(score, 3)
+        suggestions.append(described)
+        if len(suggestions) >= limit:
+            break
+    return suggestions
@@ -0,0 +1,348 @@
+"""Content-addressed cache for LLM outputs (in-memory LRU + SQLite on disk).
+
+Entries are keyed by a SHA-256 of the canonicalised input (sorted keys,
+compact separators), so identical inputs always hit the same entry no
+matter how the dict was built.
+
+TIERS:
+- Memory: OrderedDict LRU, bounded by entry count
+- Disk: SQLite table that survives restarts, bounded by entry count and
+  evicted least-recently-used first
+
+DISK I/O:
+Callers never wait on a disk write. put() updates memory and queues the
+row for a background writer thread, which commits whatever has queued up
+in one transaction (LRU touches from disk hits go the same way). Queued
+rows stay readable until they land. Disk reads run on the caller's
+thread with their own connection (WAL), never under the memory lock;
+async code uses aget(), which answers memory hits inline and reads the
+disk in a worker thread. The disk row count is only changed under the
+memory lock, and clear() waits for the batch being committed, so the
+count that drives eviction matches the table.
+
+EXPIRY:
+Both tiers honour the same TTL. Expired rows are skipped on read and
+purged from disk periodically on write.
+
+METRICS:
+Hits per tier, misses, and "latency saved": each entry remembers how
+long the LLM took to produce it, and every hit adds that cost.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+# Run the disk TTL purge once every this many writes
+_PURGE_EVERY = 100
+
+# Writer queue items: ("put", key, (value, created_at, cost)) or ("touch", key, accessed_at)
+_STOP = ("stop", None, None)
+
+
+def cache_key(payload: Any) -> str:
+    """Stable hash of a JSON-serialisable payload."""
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ContentCache:
+    """Two-tier cache of JSON values with TTL and size-based eviction."""
+
+    def __init__(
+        self,
+        name: str,
+        path: Optional[str] = None,
+        memory_size: int = 1024,
+        disk_max_entries: int = 50000,
+        ttl_seconds: float = 7 * 24 * 3600,
+    ):
+        self.name = name
+        self.path = path
+        self.memory_size = memory_size
+        self.disk_max_entries = disk_max_entries
+        self.ttl_seconds = ttl_seconds
+        # key -> (value, created_at, cost_seconds)
+        self._memory: "OrderedDict[str, Tuple[Any, float, float]]" = OrderedDict()
+        # Rows queued for the writer, readable until committed
+        self._unwritten: Dict[str, Tuple[Any, float, float]] = {}
+        self._lock = threading.Lock()
+        # Held while a write batch (or clear) changes the disk table
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._queue: "queue.Queue[Tuple[str, Any, Any]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._disk = False
+        self._disk_count = 0
+        self._writes = 0
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+            "latency_saved_seconds": 0.0,
+        }
+        if path:
+            self._open_disk(path)
+
+    # ------------------------------------------------------------------
+    # Disk tier
+    # ------------------------------------------------------------------
+
+    def _open_disk(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._disk = True
+        db = self._conn()
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, "
+            "accessed_at REAL NOT NULL, cost REAL NOT NULL DEFAULT 0)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed_at)")
+        db.commit()
+        self._purge_expired_disk(db, time.time())
+        count = db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        with self._lock:
+            self._disk_count = count
+
+    def _conn(self) -> sqlite3.Connection:
+        """This thread's connection (readers and the writer never share one)."""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            # check_same_thread=False only so close() can close every thread's connection
+            db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+            with self._lock:
+                self._connections.append(db)
+        return db
+
+    def _purge_expired_disk(self, db: sqlite3.Connection, now: float) -> None:
+        cur = db.execute("DELETE FROM entries WHERE created_at < ?", (now - self.ttl_seconds,))
+        with self._lock:
+            self._disk_count = max(0, self._disk_count - cur.rowcount)
+        db.commit()
+
+    def _evict_disk(self, db: sqlite3.Connection) -> None:
+        with self._lock:
+            excess = self._disk_count - self.disk_max_entries
+        if excess <= 0:
+            return
+        cur = db.execute(
+            "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed_at LIMIT ?)",
+            (excess,),
+        )
+        with self._lock:
+            self._disk_count -= cur.rowcount
+            self.stats["evictions"] += cur.rowcount
+
+    def _read_disk(self, key: str, now: float) -> Optional[Tuple[Any, float, float]]:
+        """Fresh (value, created_at, cost) for key from the writer queue or the disk."""
+        with self._lock:
+            entry = self._unwritten.get(key)
+        if entry is None:
+            row = self._conn().execute(
+                "SELECT value, created_at, cost FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            entry = (json.loads(row[0]), row[1], row[2]) if row is not None else None
+        if entry is None or now - entry[1] > self.ttl_seconds:
+            return None
+        return entry
+
+    def _start_writer(self) -> None:
+        """Background thread committing queued writes (caller holds the lock)."""
+        self._writer = threading.Thread(target=self._write_loop, name=f"cache-{self.name}", daemon=True)
+        self._writer.start()
+
+    def _write_loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with self._write_lock:
+                    self._write_batch([op for op in batch if op is not _STOP])
+            except Exception as e:
+                print(f"[Cache:{self.name}] Disk write failed: {type(e).__name__}: {e}", file=sys.stderr)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if any(op is _STOP for op in batch):
+                return
+
+    def _write_batch(self, batch: List[Tuple[str, str, Any]]) -> None:
+        """Commit queued puts and LRU touches in one transaction."""
+        if not batch:
+            return
+        db = self._conn()
+        written = []
+        for op, key, data in batch:
+            if op == "touch":
+                db.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (data, key))
+                continue
+            value, created_at, cost = data
+            exists = db.execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone()
+            db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, created_at, accessed_at, cost) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), created_at, created_at, cost),
+            )
+            if exists is None:
+                with self._lock:
+                    self._disk_count += 1
+            written.append((key, data))
+            self._writes += 1
+            if self._writes % _PURGE_EVERY == 0:
+                self._purge_expired_disk(db, created_at)
+        self._evict_disk(db)
+        db.commit()
+        with self._lock:
+            for key, data in written:
+                # A newer put of the same key may be queued behind this one
+                if self._unwritten.get(key) is data:
+                    del self._unwritten[key]
+
+    def _enqueue(self, op: Tuple[str, str, Any]) -> None:
+        """Queue a disk write (caller holds the lock)."""
+        if self._writer is None:
+            self._start_writer()
+        self._queue.put(op)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at, cost = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    self.stats["latency_saved_seconds"] += cost
+                    # Callers may decorate results; never hand out our copy
+                    return copy.deepcopy(value)
+                del self._memory[key]
+            if not self._disk:
+                self.stats["misses"] += 1
+                return None
+
+        entry = self._read_disk(key, now)
+        with self._lock:
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            value, created_at, cost = entry
+            self._remember(key, value, created_at, cost)
+            self._enqueue(("touch", key, now))
+            self.stats["disk_hits"] += 1
+            self.stats["latency_saved_seconds"] += cost
+            return copy.deepcopy(value)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """get() for the event loop: memory hits inline, disk reads in a worker thread."""
+        with self._lock:
+            entry = self._memory.get(key)
+            in_memory = entry is not None and time.time() - entry[1] <= self.ttl_seconds
+        if in_memory or not self._disk:
+            return self.get(key)
+        return await asyncio.to_thread(self.get, key)
+
+    def contains(self, key: str) -> bool:
+        """Whether a fresh entry exists; does not count as a hit or refresh LRU order."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[1] <= self.ttl_seconds:
+                return True
+            if not self._disk:
+                return False
+        return self._read_disk(key, now) is not None
+
+    def put(self, key: str, value: Any, cost_seconds: float = 0.0) -> None:
+        """Store a value; cost_seconds is how long it took to produce it.
+
+        The memory tier is updated at once; the disk write is queued.
+        """
+        now = time.time()
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._remember(key, value, now, cost_seconds)
+            self.stats["writes"] += 1
+            if not self._disk:
+                return
+            data = (value, now, cost_seconds)
+            self._unwritten[key] = data
+            self._enqueue(("put", key, data))
+
+    def _remember(self, key: str, value: Any, created_at: float, cost: float) -> None:
+        self._memory[key] = (value, created_at, cost)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def flush(self) -> None:
+        """Wait until every queued disk write is committed."""
+        self._queue.join()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        if not self._disk:
+            return
+        self.flush()
+        db = self._conn()
+        with self._write_lock:
+            db.execute("DELETE FROM entries")
+            db.commit()
+            with self._lock:
+                self._unwritten.clear()
+                self._disk_count = 0
+
+    def close(self) -> None:
+        """Commit queued writes, stop the writer and close the disk tier."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+            if writer is not None:
+                self._queue.put(_STOP)
+        if writer is not None:
+            writer.join()
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self._disk = False
+        for db in connections:
+            db.close()
+        self._local = threading.local()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            lookups = hits + self.stats["misses"]
+            return {
+                **self.stats,
+                "latency_saved_seconds": round(self.stats["latency_saved_seconds"], 3),
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": self._disk_count if self._disk else None,
+                "disk_queued": self._queue.unfinished_tasks if self._disk else None,
+            }
@@ -0,0 +1,170 @@
+"""Status-signature explanations: one LLM answer per (program, statuses, gap buckets).
+
+Explanations are driven by categorical facts - does the student meet ENT,
+is IELTS required, is the budget short, is the city the same - plus how
+big the gaps are. The exact numbers matter for the text but not for its
+reasoning. So in "signature" mode we:
+
+1. Reduce facts to a signature: program identity, factor statuses and
+   bucketed gaps (e.g. ENT gap "6-15").
+2. Ask the LLM for a template that uses placeholders like {ent_user}
+   instead of numbers, and cache it under the signature.
+3. Substitute the student's exact figures into the template per request.
+
+A few hundred cached templates then cover the whole student population
+instead of one LLM call per unique profile.
+"""
+
+import re
+from typing import Any, Dict, List
+
+# Placeholders the LLM may use; each is filled from the exact facts
+PLACEHOLDERS = {
+    "score": "итоговый балл соответствия (0-100)",
+    "ent_user": "ЕНТ студента",
+    "ent_required": "минимальный ЕНТ программы",
+    "ent_gap": "сколько баллов ЕНТ не хватает",
+    "ielts_user": "IELTS студента",
+    "ielts_required": "минимальный IELTS программы",
+    "ielts_gap": "сколько не хватает по IELTS",
+    "budget": "бюджет студента, тенге",
+    "tuition": "стоимость обучения в год, тенге",
+    "budget_gap": "нехватка бюджета, тенге",
+    "preferred_city": "предпочитаемый город",
+    "university_city": "город университета",
+    "distance_km": "расстояние между городами, км",
+    "employment": "процент трудоустройства",
+    "avg_salary": "средняя зарплата выпускников, тенге",
+}
+
+FACTOR_KEYS = ("ent", "ielts", "budget", "city", "outcomes")
+
+_PLACEHOLDER_RE = re.compile(r"\{(\w+)\}")
+
+
+def _bucket(value: float, edges: List[float], labels: List[str]) -> str:
+    """labels[i] is used for value <= edges[i]; the last label is the overflow."""
+    for edge, label in zip(edges, labels):
+        if value <= edge:
+            return label
+    return labels[-1]
+
+
+def signature_facts(facts: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce exact facts to the categorical signature used as the cache key."""
+    factors = facts.get("factors", {}) or {}
+    ent = factors.get("ent", {})
+    ielts = factors.get("ielts", {})
+    budget = factors.get("budget", {})
+    city = factors.get("city", {})
+    outcomes = factors.get("outcomes", {})
+
+    ent_gap = max(0.0, float(ent.get("required", 0) or 0) - float(ent.get("user", 0) or 0))
+    ielts_gap = max(0.0, float(ielts.get("required", 0) or 0) - float(ielts.get("user", 0) or 0))
+    tuition = float(budget.get("tuition", 0) or 0)
+    shortfall = max(0.0, tuition - float(budget.get("budget", 0) or 0))
+    shortfall_ratio = shortfall / tuition if tuition else 0.0
+
+    return {
+        "university_id": facts.get("university_id"),
+        "university_name": facts.get("university_name"),
+        "program_id": facts.get("program_id"),
+        "program_name": facts.get("program_name"),
+        "score_band": _bucket(float(facts.get("score", 0) or 0), [39.9, 59.9, 79.9], ["<40", "40-59", "60-79", "80+"]),
+        "status": {
+            "ent": ent.get("status"),
+            "ielts": ielts.get("status"),
+            "budget": budget.get("status"),
+            "city": city.get("status"),
+        },
+        "gaps": {
+            "ent": _bucket(ent_gap, [0, 5, 15, 30], ["0", "1-5", "6-15", "16-30", "31+"]),
+            "ielts": _bucket(ielts_gap, [0, 0.5, 1.0], ["0", "0.5", "1.0", "1.5+"]),
+            "budget": _bucket(shortfall_ratio, [0, 0.1, 0.3, 0.6], ["0", "<10%", "10-30%", "30-60%", "60%+"]),
+        },
+        "employment_band": _bucket(float(outcomes.get("employment", 0) or 0), [79.9, 89.9], ["<80", "80-89", "90+"]),
+    }
+
+
+def template_values(facts: Dict[str, Any]) -> Dict[str, str]:
+    """Exact, formatted figures for every placeholder."""
+    factors = facts.get("factors", {}) or {}
+    ent = factors.get("ent", {})
+    ielts = factors.get("ielts", {})
+    budget = factors.get("budget", {})
+    city = factors.get("city", {})
+    outcomes = factors.get("outcomes", {})
+
+    ent_user = float(ent.get("user", 0) or 0)
+    ent_required = float(ent.get("required", 0) or 0)
+    ielts_user = float(ielts.get("user", 0) or 0)
+    ielts_required = float(ielts.get("required", 0) or 0)
+    budget_value = float(budget.get("budget", 0) or 0)
+    tuition = float(budget.get("tuition", 0) or 0)
+
+    return {
+        "score": f"{float(facts.get('score', 0) or 0):.0f}",
+        "ent_user": f"{ent_user:.0f}",
+        "ent_required": f"{ent_required:.0f}",
+        "ent_gap": f"{max(0.0, ent_required - ent_user):.0f}",
+        "ielts_user": f"{ielts_user:.1f}",
+        "ielts_required": f"{ielts_required:.1f}",
+        "ielts_gap": f"{max(0.0, ielts_required - ielts_user):.1f}",
+        "budget": f"{budget_value:,.0f}",
+        "tuition": f"{tuition:,.0f}",
+        "budget_gap": f"{max(0.0, tuition - budget_value):,.0f}",
+        "preferred_city": str(city.get("preferred") or "Любой"),
+        "university_city": str(city.get("university_city") or ""),
+        "distance_km": str(city.get("distance_km") if city.get("distance_km") is not None else "?"),
+        "employment": f"{float(outcomes.get('employment', 0) or 0):.0f}",
+        "avg_salary": f"{float(outcomes.get('avgSalary', 0) or 0):,.0f}",
+    }
+
+
+def _fill(text: Any, values: Dict[str, str]) -> Any:
+    if not isinstance(text, str):
+        return text
+    # Unknown placeholders are left untouched rather than raising
+    return _PLACEHOLDER_RE.sub(lambda m: values.get(m.group(1), m.group(0)), text)
+
+
+def render_template(template: Dict[str, Any], facts: Dict[str, Any]) -> Dict[str, Any]:
+    """Substitute exact figures into a cached template explanation.
+
+    key_factors contributions come from the real breakdown when the
+    template names the factor key, so numbers are never stale.
+    """
+    values = template_values(facts)
+    factors = facts.get("factors", {}) or {}
+
+    key_factors = []
+    for factor in template.get("key_factors", []):
+        contribution = factor.get("contribution", 0)
+        key = factor.get("key")
+        if key in factors and isinstance(factors[key], dict):
+            contribution = float(factors[key].get("contribution", contribution))
+        key_factors.append({
+            "factor": _fill(factor.get("factor", ""), values),
+            "value": _fill(factor.get("value", ""), values),
+            "contribution": contribution,
+        })
+
+    return {
+        "summary": _fill(template.get("summary", ""), values),
+        "key_factors": key_factors,
+        "explanation": _fill(template.get("explanation", ""), values),
+        "strengths": [_fill(s, values) for s in template.get("strengths", [])],
+        "considerations": [_fill(c, values) for c in template.get("considerations", [])],
+    }
+
+
+def template_instructions() -> str:
+    """Extra system-prompt text that asks for placeholders instead of numbers."""
+    legend = "\n".join(f"{{{name}}} - {desc}" for name, desc in PLACEHOLDERS.items())
+    return (
+        "Тебе даны категории (статусы и диапазоны), а не точные числа.\n"
+        "НЕ пиши конкретные числа студента - вместо них используй плейсхолдеры в фигурных скобках:\n"
+        f"{legend}\n"
+        "В key_factors добавь поле \"key\" - одно из: " + ", ".join(FACTOR_KEYS) + "."
+    )
+
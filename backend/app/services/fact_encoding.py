@@ -0,0 +1,90 @@
+"""Compact encoding of recommendation facts for LLM prompts.
+
+The verbose prompt was the facts dict dumped with indent=2: every factor
+spelled out its field names, status strings were repeated in full and
+"user_profile" duplicated values already present in "factors". Tokens are
+paid per call, so the prompt now sends positional arrays with short keys
+and status codes. The legend that explains them goes into the system
+prompt once.
+
+    {"u":"KIMEP University","p":"Business Administration","s":95.2,
+     "ent":[110,72,40,"+"],"ielts":[6,6,20,"+"],"bud":[2000000,1000000,15,"+"],
+     "city":["Алматы","Almaty",0,10,"="],"out":[90,480000,10.2]}
+"""
+
+import json
+from typing import Any, Dict, List
+
+# Short status codes; the legend below spells them out for the model
+STATUS_CODES = {
+    "meets": "+",
+    "below": "-",
+    "not_required": "0",
+    "covers": "+",
+    "shortfall": "-",
+    "free": "0",
+    "matches": "=",
+    "nearby": "~",
+    "different": "x",
+}
+
+FACT_LEGEND = """Факты программы закодированы компактно:
+u - университет, p - программа, s - итоговый балл соответствия (0-100)
+ent - ЕНТ [балл студента, минимум программы, вклад в балл, статус]
+ielts - IELTS [балл студента, минимум программы, вклад, статус]
+bud - бюджет [бюджет студента, стоимость в год (тенге), вклад, статус]
+city - город [предпочитаемый, город университета, расстояние км, вклад, статус]
+out - исходы [трудоустройство %, средняя зарплата тенге, вклад]
+Статусы: + выполнено, - не хватает, 0 не требуется/бесплатно, = тот же город, ~ рядом, x другой город"""
+
+
+def _num(value: Any) -> Any:
+    """Drop a trailing .0 so 6.0 costs the same tokens as 6."""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _status(factor: Dict[str, Any]) -> str:
+    status = factor.get("status")
+    return STATUS_CODES.get(status, status or "")
+
+
+def encode_facts(facts: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact, redundancy-free view of facts (see module docstring).
+
+    Only recommendation facts (with a "factors" breakdown) are encoded;
+    anything else, such as the navigator's memory and query, is returned
+    unchanged rather than reduced to empty u/p/s keys.
+    """
+    factors = facts.get("factors")
+    if not isinstance(factors, dict):
+        return facts
+    ent = factors.get("ent", {})
+    ielts = factors.get("ielts", {})
+    budget = factors.get("budget", {})
+    city = factors.get("city", {})
+    outcomes = factors.get("outcomes", {})
+
+    encoded: Dict[str, Any] = {
+        "u": facts.get("university_name"),
+        "p": facts.get("program_name"),
+        "s": _num(facts.get("score")),
+    }
+    if ent:
+        encoded["ent"] = [_num(ent.get("user")), _num(ent.get("required")), _num(ent.get("contribution")), _status(ent)]
+    if ielts:
+        encoded["ielts"] = [_num(ielts.get("user")), _num(ielts.get("required")), _num(ielts.get("contribution")), _status(ielts)]
+    if budget:
+        encoded["bud"] = [_num(budget.get("budget")), _num(budget.get("tuition")), _num(budget.get("contribution")), _status(budget)]
+    if city:
+        encoded["city"] = [city.get("preferred"), city.get("university_city"), _num(city.get("distance_km")),
+                           _num(city.get("contribution")), _status(city)]
+    if outcomes:
+        encoded["out"] = [_num(outcomes.get("employment")), _num(outcomes.get("avgSalary")), _num(outcomes.get("contribution"))]
+    return encoded
+
+
+def compact_json(payload: Any) -> str:
+    """JSON without indentation or spaces after separators."""
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
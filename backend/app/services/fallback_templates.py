@@ -0,0 +1,232 @@
+"""Precompiled fallback explanations (no AI).
+
+With the LLM disabled, failing or out of budget every recommendation is
+explained by the fallback, so it sits on the hot path. The original
+implementation rebuilt its lookup dict, walked if/elif chains and
+formatted every number with f-strings per program. Here:
+
+- Each factor is classified into a status code and its arguments.
+- Texts come from a template table indexed by (factor, status): constant
+  texts are plain strings, the rest are bound str.format templates.
+- Formatted factor texts are memoised by (factor, status, arguments).
+  Programs and profiles repeat, so most renders skip number formatting.
+
+render_fallback(facts) is byte-identical to the original output, and
+render_fallbacks renders a whole list of scored programs.
+tools/bench_fallback.py checks both against a verbatim copy of the
+original and times them.
+"""
+
+from bisect import bisect_right
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+_FACTOR_NAMES = {
+    "ent": "Баллы ЕНТ",
+    "ielts": "IELTS",
+    "budget": "Бюджет",
+    "city": "Город",
+    "outcomes": "Карьерные перспективы",
+}
+
+# Score thresholds -> quality wording for the summary, and the overall explanation
+_QUALITY_BOUNDS = (40, 60, 80)
+_QUALITY = ("базовое соответствие", "среднее соответствие", "хорошее соответствие", "отличное соответствие")
+_EXPLANATION_BOUNDS = (50, 70)
+_EXPLANATION = (
+    "Базовое соответствие. Рассмотрите улучшение показателей.",
+    "Программа подходит, но есть ограничения. Может быть вариантом.",
+    "Программа хорошо соответствует вашему профилю. Рекомендуем рассмотреть.",
+)
+
+_SUMMARY = "{0} — программа '{1}' показывает {2} (оценка: {3:.0f}/100).".format
+_DEFAULT_STRENGTHS = ("Соответствие основным требованиям",)
+
+# A constant text, or a formatter taking the classifier's arguments
+Text = Union[None, str, Callable[..., str]]
+
+# Bound on memoised factor texts; cleared when full
+TEXT_MEMO_SIZE = 20000
+_text_memo: Dict[tuple, Tuple[str, Optional[str], Optional[str]]] = {}
+
+
+def _compile(template: Optional[str]) -> Text:
+    if template is None or "{" not in template:
+        return template
+    return template.format
+
+
+def _table(rows: Dict[str, Tuple[Optional[str], Optional[str], Optional[str]]]) -> Dict[str, Tuple[Text, Text, Text]]:
+    """status -> (value, strength, consideration) texts."""
+    return {status: tuple(_compile(t) for t in texts) for status, texts in rows.items()}
+
+
+# Templates take the arguments returned by the factor's classifier
+_TEMPLATES = {
+    "ent": _table({
+        # (user, required, gap)
+        "meets": ("Ваш результат ({0:.0f}) соответствует требованию ({1:.0f})", "Результат ЕНТ соответствует требованиям", None),
+        "below": ("Ваш результат ({0:.0f}) ниже требования ({1:.0f})", None, "Нужно улучшить ЕНТ на {2:.0f} баллов"),
+    }),
+    "ielts": _table({
+        # (user, required, gap)
+        "not_required": ("IELTS не требуется", None, None),
+        "meets": ("Ваш IELTS ({0:.1f}) соответствует требованию ({1:.1f})", "IELTS соответствует требованиям", None),
+        "below": ("Ваш IELTS ({0:.1f}) ниже требования ({1:.1f})", None, "Нужно улучшить IELTS на {2:.1f} балла"),
+    }),
+    "budget": _table({
+        # (budget, tuition, shortfall)
+        "free": ("Бесплатное обучение (грант)", "Бесплатное обучение", None),
+        "covers": ("Бюджет ({0:,.0f}) ≥ стоимость ({1:,.0f})", None, None),
+        "shortfall": ("Нужно {2:,.0f} тенге дополнительно", None, "Недостаток средств: {2:,.0f} тенге/год"),
+    }),
+    "city": _table({
+        # (university_city, preferred, distance_km)
+        "any": ("Город совпадает ({0})", None, None),
+        "matches": ("Город совпадает ({0})", "Университет в предпочитаемом городе ({0})", None),
+        "nearby": ("{0} рядом с {1} (~{2} км)", None, None),
+        "different": ("Город отличается: {0} vs {1}", None, None),
+    }),
+    "outcomes": _table({
+        # (employment, avgSalary)
+        "high": ("Трудоустройство: {0}%, зарплата: {1:,.0f} тенге", "Высокое трудоустройство ({0}%)", None),
+        "normal": ("Трудоустройство: {0}%, зарплата: {1:,.0f} тенге", None, None),
+    }),
+}
+
+
+def _classify_ent(f: Dict[str, Any]) -> Tuple[str, tuple]:
+    user = float(f.get("user", 0))
+    required = float(f.get("required", 0))
+    if user >= required:
+        return "meets", (user, required)
+    return "below", (user, required, required - user)
+
+
+def _classify_ielts(f: Dict[str, Any]) -> Tuple[str, tuple]:
+    user = float(f.get("user", 0))
+    required = float(f.get("required", 0))
+    if required == 0:
+        return "not_required", ()
+    if user >= required:
+        return "meets", (user, required)
+    return "below", (user, required, required - user)
+
+
+def _classify_budget(f: Dict[str, Any]) -> Tuple[str, tuple]:
+    budget = float(f.get("budget", 0))
+    tuition = float(f.get("tuition", 0))
+    if tuition == 0:
+        return "free", ()
+    if budget >= tuition:
+        return "covers", (budget, tuition)
+    return "shortfall", (budget, tuition, tuition - budget)
+
+
+def _classify_city(f: Dict[str, Any]) -> Tuple[str, tuple]:
+    preferred = f.get("preferred", "Любой")
+    uni_city = f.get("university_city", "")
+    status = f.get("status")
+    if preferred == "Любой" or preferred == uni_city or status == "matches":
+        return ("any" if preferred == "Любой" else "matches"), (uni_city,)
+    if status == "nearby":
+        # str() keeps 10 and 10.0 apart in the render_fallbacks memo ("{}" formats them alike)
+        return "nearby", (uni_city, preferred, str(f.get("distance_km")))
+    return "different", (uni_city, preferred)
+
+
+def _classify_outcomes(f: Dict[str, Any]) -> Tuple[str, tuple]:
+    employment = float(f.get("employment", 0))
+    salary = float(f.get("avgSalary", 0))
+    return ("high" if employment >= 85 else "normal"), (employment, salary)
+
+
+_CLASSIFIERS = {
+    "ent": _classify_ent,
+    "ielts": _classify_ielts,
+    "budget": _classify_budget,
+    "city": _classify_city,
+    "outcomes": _classify_outcomes,
+}
+
+
+def _empty() -> Dict[str, Any]:
+    return {
+        "summary": "Программа доступна в вашем профиле.",
+        "key_factors": [],
+        "explanation": "Рекомендация основана на соответствии критериям.",
+        "strengths": [],
+        "considerations": [],
+    }
+
+
+def _text(text: Text, args: tuple) -> Optional[str]:
+    return text if text is None or isinstance(text, str) else text(*args)
+
+
+def _factor_texts(fname: str, status: str, args: tuple) -> Tuple[str, Optional[str], Optional[str]]:
+    """(value, strength, consideration) for a classified factor, memoised."""
+    key = (fname, status, args)
+    texts = _text_memo.get(key)
+    if texts is None:
+        value, strength, consideration = _TEMPLATES[fname][status]
+        texts = (_text(value, args), _text(strength, args), _text(consideration, args))
+        if len(_text_memo) >= TEXT_MEMO_SIZE:
+            _text_memo.clear()
+        _text_memo[key] = texts
+    return texts
+
+
+def _render(facts: Dict[str, Any]) -> Dict[str, Any]:
+    if not facts:
+        return _empty()
+
+    score = float(facts.get("score", 0))
+    summary = _SUMMARY(
+        facts.get("university_name", "Университет"),
+        facts.get("program_name", "Программа"),
+        _QUALITY[bisect_right(_QUALITY_BOUNDS, score)],
+        score,
+    )
+
+    key_factors = []
+    strengths = []
+    considerations = []
+    factors = facts.get("factors", {})
+    if isinstance(factors, dict):
+        for fname, fdata in factors.items():
+            if not isinstance(fdata, dict):
+                continue
+            contribution = float(fdata.get("contribution", 0))
+            classify = _CLASSIFIERS.get(fname)
+            if classify is None:
+                value_desc = str(fdata)
+            else:
+                status, args = classify(fdata)
+                value_desc, strength, consideration = _factor_texts(fname, status, args)
+                if strength is not None:
+                    strengths.append(strength)
+                if consideration is not None:
+                    considerations.append(consideration)
+            key_factors.append({
+                "factor": _FACTOR_NAMES.get(fname, fname),
+                "value": value_desc,
+                "contribution": round(contribution, 1),
+            })
+
+    return {
+        "summary": summary,
+        "key_factors": key_factors[:5],
+        "explanation": _EXPLANATION[bisect_right(_EXPLANATION_BOUNDS, score)],
+        "strengths": strengths[:3] if strengths else list(_DEFAULT_STRENGTHS),
+        "considerations": considerations[:3],
+    }
+
+
+def render_fallback(facts: Dict[str, Any]) -> Dict[str, Any]:
+    """Deterministic explanation for one program's facts."""
+    return _render(facts)
+
+
+def render_fallbacks(facts_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Fallback explanations for a list of scored programs, in order."""
+    return list(map(_render, facts_list))
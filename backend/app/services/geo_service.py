@@ -0,0 +1,148 @@
+"""City geography for the proximity factor in compute_program_score.
+
+Every known city gets an integer code. At import time we precompute an
+n x n matrix of road distances and the city-factor points they earn, so
+scoring never does geometry per request:
+
+    points = PROXIMITY_POINTS[preferred_code * n + university_code]
+
+WHY GRADED PROXIMITY:
+The old city factor was binary (10 or 0), so a student in Almaty saw SDU
+in Kaskelen (~30 km away) exactly like a university in Astana (~1200 km).
+Points now fall off linearly with road distance and reach 0 at
+PROXIMITY_RADIUS_KM.
+
+DISTANCES:
+Great-circle distance between city centres times ROAD_FACTOR, a typical
+ratio of road to straight-line distance in Kazakhstan. Precise enough for
+a 10-point preference factor.
+"""
+
+import math
+from array import array
+from operator import itemgetter
+from typing import Dict, List, Optional, Sequence
+
+# Full points within the same city, zero beyond this road distance
+CITY_MAX_POINTS = 10.0
+PROXIMITY_RADIUS_KM = 300.0
+ROAD_FACTOR = 1.3
+
+# Code = position in this list. Aliases cover Russian, Kazakh and English
+# spellings used by the catalog and the frontend quiz.
+CITIES = [
+    ("Astana", 51.169, 71.449, ["Астана", "Нур-Султан", "Nur-Sultan", "Nursultan"]),
+    ("Almaty", 43.238, 76.946, ["Алматы", "Алма-Ата", "Alma-Ata"]),
+    ("Kaskelen", 43.200, 76.620, ["Каскелен", "Қаскелең"]),
+    ("Shymkent", 42.342, 69.590, ["Шымкент", "Chimkent"]),
+    ("Karaganda", 49.806, 73.085, ["Караганда", "Қарағанды", "Karagandy"]),
+    ("Aktobe", 50.283, 57.167, ["Актобе", "Ақтөбе", "Aktyubinsk"]),
+    ("Atyrau", 47.094, 51.924, ["Атырау"]),
+    ("Oskemen", 49.948, 82.628, ["Усть-Каменогорск", "Өскемен", "Ust-Kamenogorsk"]),
+    ("Pavlodar", 52.287, 76.967, ["Павлодар"]),
+    ("Taraz", 42.900, 71.367, ["Тараз"]),
+    ("Kostanay", 53.214, 63.625, ["Костанай", "Қостанай"]),
+    ("Semey", 50.411, 80.227, ["Семей", "Семипалатинск"]),
+    ("Turkestan", 43.297, 68.252, ["Туркестан", "Түркістан"]),
+    ("Aktau", 43.651, 51.197, ["Актау", "Ақтау"]),
+    ("Kyzylorda", 44.853, 65.509, ["Кызылорда", "Қызылорда"]),
+    ("Petropavl", 54.865, 69.135, ["Петропавловск", "Петропавл", "Petropavlovsk"]),
+    ("Oral", 51.233, 51.367, ["Уральск", "Орал", "Uralsk"]),
+    ("Taldykorgan", 45.017, 78.383, ["Талдыкорган", "Талдықорған"]),
+    ("Kokshetau", 53.283, 69.383, ["Кокшетау", "Көкшетау"]),
+    ("Talgar", 43.303, 77.240, ["Талгар"]),
+    ("Konaev", 43.866, 77.063, ["Конаев", "Қонаев", "Капчагай", "Kapchagay"]),
+]
+
+# "No preference" values sent by the quiz/profile
+ANY_CITY = (None, "", "Любой")
+
+UNKNOWN_CITY = -1
+
+_FOLD = str.maketrans({
+    "ё": "е", "ә": "а", "ғ": "г", "қ": "к", "ң": "н",
+    "ө": "о", "ұ": "у", "ү": "у", "һ": "х", "і": "и",
+})
+
+
+def _normalize(name: str) -> str:
+    return " ".join(name.lower().translate(_FOLD).replace("-", " ").split())
+
+
+CITY_CODES: Dict[str, int] = {}
+for _code, (_name, _lat, _lon, _aliases) in enumerate(CITIES):
+    for _alias in [_name] + _aliases:
+        CITY_CODES[_normalize(_alias)] = _code
+
+NUM_CITIES = len(CITIES)
+
+
+def _road_km(a: int, b: int) -> float:
+    if a == b:
+        return 0.0
+    _, lat1, lon1, _ = CITIES[a]
+    _, lat2, lon2, _ = CITIES[b]
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    h = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(h)) * ROAD_FACTOR
+
+
+# Flat row-major matrices: index = from_code * NUM_CITIES + to_code
+DISTANCE_KM = array("f", (_road_km(a, b) for a in range(NUM_CITIES) for b in range(NUM_CITIES)))
+PROXIMITY_POINTS = array("f", (
+    CITY_MAX_POINTS * max(0.0, 1.0 - km / PROXIMITY_RADIUS_KM) for km in DISTANCE_KM
+))
+
+
+def city_code(name: Optional[str]) -> int:
+    """Integer code for a city name in any supported spelling (-1 if unknown)."""
+    if not name:
+        return UNKNOWN_CITY
+    return CITY_CODES.get(_normalize(name), UNKNOWN_CITY)
+
+
+def city_aliases(name: Optional[str]) -> List[str]:
+    """All known spellings of a city (just the name itself if unknown)."""
+    code = city_code(name)
+    if code == UNKNOWN_CITY:
+        return [name] if name else []
+    canonical, _, _, aliases = CITIES[code]
+    return [canonical] + aliases
+
+
+def distance_km(from_code: int, to_code: int) -> Optional[float]:
+    if from_code == UNKNOWN_CITY or to_code == UNKNOWN_CITY:
+        return None
+    return DISTANCE_KM[from_code * NUM_CITIES + to_code]
+
+
+def gather_city_points(preferred: Optional[str], city_codes: Sequence[int], city_names: Sequence[Optional[str]]) -> List[float]:
+    """City-factor points for many universities at once.
+
+    One row of the precomputed matrix is selected for the preferred city and
+    all university codes are gathered from it in a single itemgetter call.
+    Unknown cities fall back to the old exact-name rule (10 or 0).
+    """
+    if preferred in ANY_CITY:
+        return [CITY_MAX_POINTS] * len(city_codes)
+
+    pref_code = city_code(preferred)
+    if pref_code == UNKNOWN_CITY or not city_codes:
+        return [CITY_MAX_POINTS if preferred == name else 0.0 for name in city_names]
+
+    # Unknown university cities read slot NUM_CITIES of the padded row (0 points)
+    start = pref_code * NUM_CITIES
+    row = PROXIMITY_POINTS[start:start + NUM_CITIES] + array("f", [0.0])
+    points = itemgetter(*city_codes)(row)
+    if len(city_codes) == 1:
+        points = (points,)
+    return [
+        p if code != UNKNOWN_CITY else (CITY_MAX_POINTS if preferred == name else 0.0)
+        for p, code, name in zip(points, city_codes, city_names)
+    ]
+
+
+def city_points(preferred: Optional[str], city: Optional[str]) -> float:
+    """City-factor points for a single university city."""
+    return gather_city_points(preferred, [city_code(city)], [city])[0]
@@ -0,0 +1,202 @@
+"""Incremental JSON extraction from LLM output.
+
+LLM completions wrap their JSON in prose and ``` fences, and they sometimes
+stop mid-value. A greedy regex plus json.loads fails on all three.
+JSONStreamParser is a single linear scan that tolerates them:
+
+- Text outside a JSON value (prose, fences) is skipped. Each top-level
+  object or array is collected into .values once it closes.
+- feed() can be called with pieces of a token stream. It returns the
+  *elements* that closed in this piece: containers inside a top-level
+  array, or inside the array under element_key of a top-level object
+  (e.g. {"roadmap": [...]}). Callers can act on them before the
+  completion ends.
+- close() repairs a truncated value: it closes the open string, drops a
+  dangling key or partial literal, and closes the brackets.
+
+Only objects and arrays are extracted; top-level scalars are ignored.
+"""
+
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Iterator, List, Optional
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class _Frame:
+    __slots__ = ("open", "start", "key", "expect_key", "last_comma")
+
+    def __init__(self, open_char: str, start: int):
+        self.open = open_char
+        self.start = start
+        self.key: Optional[str] = None
+        self.expect_key = open_char == "{"
+        self.last_comma: Optional[int] = None
+
+
+class JSONStreamParser:
+    """Linear, resumable scanner for JSON values embedded in text."""
+
+    def __init__(self, element_key: Optional[str] = None):
+        self.element_key = element_key
+        self.values: List[Any] = []
+        self.repaired = False  # close() had to complete a truncated value
+        self._text = ""
+        self._pos = 0
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._emitted = 0  # elements emitted for the current top-level value
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Consume more text; returns the elements completed by it."""
+        self._text += chunk
+        text, stack = self._text, self._stack
+        elements: List[Any] = []
+        i, n = self._pos, len(text)
+        while i < n:
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    frame = stack[-1]
+                    if frame.expect_key:
+                        frame.key = _loads(text[self._string_start:i + 1])
+                        frame.expect_key = False
+            elif not stack:
+                if c in _CLOSERS:
+                    stack.append(_Frame(c, i))
+                    self._emitted = 0
+            elif c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c in _CLOSERS:
+                stack.append(_Frame(c, i))
+            elif c == "}" or c == "]":
+                frame = stack.pop()
+                if not stack:
+                    value = _loads(text[frame.start:i + 1])
+                    if value is not None:
+                        self.values.append(value)
+                elif self._is_element_parent():
+                    element = _loads(text[frame.start:i + 1])
+                    if element is not None:
+                        elements.append(element)
+                        self._emitted += 1
+            elif c == ",":
+                frame = stack[-1]
+                frame.last_comma = i
+                frame.expect_key = frame.open == "{"
+            i += 1
+        if stack or self._in_string:
+            self._pos = n
+        else:
+            # Between values nothing is referenced by offset: drop the consumed text
+            self._text, self._pos = "", 0
+        return elements
+
+    def _is_element_parent(self) -> bool:
+        stack = self._stack
+        if len(stack) == 1:
+            return stack[0].open == "["
+        return (
+            len(stack) == 2
+            and self.element_key is not None
+            and stack[0].open == "{"
+            and stack[0].key == self.element_key
+            and stack[1].open == "["
+        )
+
+    def close(self) -> List[Any]:
+        """End of input: repair an unterminated value; returns its remaining elements."""
+        if not self._stack:
+            return []
+        value = self._repair()
+        self._stack = []
+        self._in_string = self._escape = False
+        if value is None:
+            return []
+        self.values.append(value)
+        self.repaired = True
+        if isinstance(value, list):
+            items = value
+        elif isinstance(value, dict) and self.element_key is not None:
+            items = value.get(self.element_key)
+        else:
+            items = None
+        if not isinstance(items, list):
+            return []
+        return [item for item in items[self._emitted:] if isinstance(item, (dict, list))]
+
+    def _repair(self) -> Optional[Any]:
+        stack = self._stack
+        start = stack[0].start
+        closers = "".join(_CLOSERS[frame.open] for frame in reversed(stack))
+
+        # 1. Keep everything: close the open string, give a dangling key a null value
+        head = self._text[start:]
+        if self._in_string:
+            head = (head[:-1] if self._escape else head) + '"'
+        head = head.rstrip()
+        top = stack[-1]
+        if head.endswith(","):
+            head = head[:-1]
+        elif head.endswith(":"):
+            head += "null"
+        elif top.open == "{" and self._in_string and top.expect_key:
+            head += ":null"
+        value = _loads(head + closers)
+        if value is not None:
+            return value
+
+        # 2. Cut the innermost container back to its last complete member
+        cut = top.last_comma if top.last_comma is not None else top.start + 1
+        return _loads(self._text[start:cut] + closers)
+
+
+def _loads(text: str) -> Optional[Any]:
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+def parse_text(text: str) -> JSONStreamParser:
+    """A parser that has consumed the whole text (see .values and .repaired)."""
+    parser = JSONStreamParser()
+    parser.feed(text)
+    parser.close()
+    return parser
+
+
+def extract_json(text: Optional[str], kind: Optional[type] = None) -> Optional[Any]:
+    """First JSON object/array in text (of the given type), repaired if truncated."""
+    if not text:
+        return None
+    for value in parse_text(text).values:
+        if kind is None or isinstance(value, kind):
+            return value
+    return None
+
+
+def iter_json_elements(chunks: Iterable[str], element_key: Optional[str] = None) -> Iterator[Any]:
+    """Yield array elements from a stream of text chunks as soon as each one closes."""
+    parser = JSONStreamParser(element_key)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+async def aiter_json_elements(chunks: AsyncIterable[str], element_key: Optional[str] = None) -> AsyncIterator[Any]:
+    """Async version of iter_json_elements."""
+    parser = JSONStreamParser(element_key)
+    async for chunk in chunks:
+        for element in parser.feed(chunk):
+            yield element
+    for element in parser.close():
+        yield element
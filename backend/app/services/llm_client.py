@@ -0,0 +1,166 @@
+"""Долгоживущие клиенты Groq (sync и async) с общим пулом соединений.
+
+Раньше _call_groq_api создавал новый Groq(...) на каждый вызов: новый пул
+HTTP-соединений и TLS-рукопожатие на каждое объяснение. Теперь клиенты
+создаются один раз при старте приложения (FastAPI lifespan) и
+переиспользуют keep-alive соединения.
+
+Настройки (таймауты, размер пула, ретраи) берутся из config.py.
+"""
+
+import sys
+import threading
+from typing import Any, Dict, Optional
+
+import httpx
+
+from ..config import (
+    GROQ_API_KEY,
+    GROQ_BASE_URL,
+    GROQ_TIMEOUT,
+    GROQ_CONNECT_TIMEOUT,
+    GROQ_MAX_CONNECTIONS,
+    GROQ_MAX_KEEPALIVE,
+    GROQ_KEEPALIVE_EXPIRY,
+    GROQ_MAX_RETRIES,
+)
+
+# Попытаемся импортировать Groq API
+try:
+    from groq import Groq, AsyncGroq, APITimeoutError
+    GROQ_AVAILABLE = True
+    # Исключения, которыми клиент сообщает о таймауте запроса
+    TIMEOUT_ERRORS = (httpx.TimeoutException, APITimeoutError)
+except ImportError:
+    GROQ_AVAILABLE = False
+    TIMEOUT_ERRORS = (httpx.TimeoutException,)
+    print("[AI] WARNING: groq не установлен", file=sys.stderr)
+
+
+class GroqClientManager:
+    """Держит по одному sync и async клиенту Groq на процесс.
+
+    Клиенты создаются лениво (или в startup()), поэтому скрипты и тесты без
+    lifespan тоже работают. Передаём свой httpx-клиент: так мы управляем
+    пулом соединений и таймаутами сами.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = GROQ_API_KEY,
+        base_url: Optional[str] = GROQ_BASE_URL,
+        timeout: float = GROQ_TIMEOUT,
+        connect_timeout: float = GROQ_CONNECT_TIMEOUT,
+        max_connections: int = GROQ_MAX_CONNECTIONS,
+        max_keepalive: int = GROQ_MAX_KEEPALIVE,
+        keepalive_expiry: float = GROQ_KEEPALIVE_EXPIRY,
+        max_retries: int = GROQ_MAX_RETRIES,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.max_retries = max_retries
+        self._client = None
+        self._async_client = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return GROQ_AVAILABLE and bool(self.api_key)
+
+    def _kwargs(self, http_client) -> dict:
+        kwargs = {
+            "api_key": self.api_key,
+            "timeout": self.timeout,
+            "max_retries": self.max_retries,
+            "http_client": http_client,
+        }
+        if self.base_url:
+            kwargs["base_url"] = self.base_url
+        return kwargs
+
+    def client(self):
+        """Синхронный клиент (для sync роутов и фоновых задач)."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    http_client = httpx.Client(timeout=self.timeout, limits=self.limits)
+                    self._client = Groq(**self._kwargs(http_client))
+        return self._client
+
+    def async_client(self):
+        """Асинхронный клиент AsyncGroq (для async роутов)."""
+        if self._async_client is None:
+            with self._lock:
+                if self._async_client is None:
+                    http_client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+                    self._async_client = AsyncGroq(**self._kwargs(http_client))
+        return self._async_client
+
+    def startup(self) -> None:
+        """Создать клиенты заранее, чтобы первый запрос не платил за это."""
+        if not self.available:
+            print("[AI] Groq клиент не создан (нет groq или GROQ_API_KEY)", file=sys.stderr)
+            return
+        self.client()
+        self.async_client()
+        print("[AI] Groq клиенты готовы (пул соединений общий)", file=sys.stderr)
+
+    async def aclose(self) -> None:
+        """Закрыть пулы соединений (вызывается при остановке приложения)."""
+        with self._lock:
+            client, self._client = self._client, None
+            async_client, self._async_client = self._async_client, None
+        if client is not None:
+            client.close()
+        if async_client is not None:
+            await async_client.close()
+
+
+class LLMUsage:
+    """Счётчики токенов и задержки по ответам LLM (поле usage ответа).
+
+    Показывают, сколько стоят вызовы и сколько экономят компактные промпты,
+    батчи и кэш: см. /api/metrics.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {
+            "calls": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+            "latency_seconds": 0.0,
+        }
+
+    def record(self, response, latency_seconds: float) -> None:
+        usage = getattr(response, "usage", None)
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["latency_seconds"] += latency_seconds
+            if usage is None:
+                return
+            self.stats["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+            self.stats["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+            self.stats["total_tokens"] += getattr(usage, "total_tokens", 0) or 0
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = self.stats["calls"]
+            return {
+                **self.stats,
+                "latency_seconds": round(self.stats["latency_seconds"], 3),
+                "avg_prompt_tokens": round(self.stats["prompt_tokens"] / calls, 1) if calls else 0.0,
+                "avg_completion_tokens": round(self.stats["completion_tokens"] / calls, 1) if calls else 0.0,
+                "avg_latency_seconds": round(self.stats["latency_seconds"] / calls, 3) if calls else 0.0,
+            }
+
+
+ai_clients = GroqClientManager()
+llm_usage = LLMUsage()
@@ -0,0 +1,289 @@
+"""Центральный планировщик вызовов LLM: лимиты Groq и приоритеты.
+
+Лимиты Groq (запросы и токены в минуту) общие для всех, кто зовёт LLM:
+объяснения рекомендаций, /ai навигатор, генерация roadmap и прогрев кэша.
+Раньше все они наперегонки шли в _call_groq_api и получали 429 вперемешку.
+
+TOKEN BUCKET:
+Два ведра: LLM_RATE_RPM запросов и LLM_RATE_TPM токенов в минуту
+(0 - без лимита). Вызов резервирует 1 запрос и оценку токенов: промпт +
+LLM_COMPLETION_RESERVE от max_tokens. Резерв всего max_tokens съедал бы
+минутный лимит за несколько вызовов, хотя ответы обычно намного короче.
+После ответа резерв сверяется с реальным usage: лишнее возвращается,
+недостача дозанимается (ведро уходит в минус, следующие вызовы ждут).
+
+ПРИОРИТЕТЫ:
+Класс вызова берётся из contextvar (priority_scope):
+interactive (по умолчанию) > roadmap > background. Когда вёдра пусты,
+вызовы ждут в очереди в порядке (приоритет, время прихода) - прогрев
+не отнимает лимит у живых пользователей.
+
+ДЕДЛАЙН:
+Ожидание ограничено оставшимся бюджетом запроса (resilience.deadline_scope)
+и LLM_QUEUE_WAIT_* для класса. Не дождался - acquire() возвращает None,
+и вызывающий код сразу отдаёт fallback.
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from ..config import (
+    LLM_COMPLETION_RESERVE,
+    LLM_QUEUE_WAIT_BACKGROUND,
+    LLM_QUEUE_WAIT_INTERACTIVE,
+    LLM_QUEUE_WAIT_ROADMAP,
+    LLM_RATE_RPM,
+    LLM_RATE_TPM,
+)
+from .resilience import remaining_budget
+
+INTERACTIVE = "interactive"
+ROADMAP = "roadmap"
+BACKGROUND = "background"
+
+# Меньше - раньше в очереди
+PRIORITIES = {INTERACTIVE: 0, ROADMAP: 1, BACKGROUND: 2}
+
+# Грубая оценка длины промпта в токенах (кириллица ~3 символа на токен)
+CHARS_PER_TOKEN = 3
+
+_priority: ContextVar[str] = ContextVar("llm_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def priority_scope(priority: str) -> Iterator[None]:
+    """Все вызовы LLM внутри блока идут с этим классом приоритета."""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown LLM priority: {priority}")
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+def estimate_tokens(system_prompt: str, user_message: str, max_tokens: int) -> int:
+    """Сколько токенов зарезервировать под вызов: промпт + ожидаемая длина ответа."""
+    return (len(system_prompt) + len(user_message)) // CHARS_PER_TOKEN + math.ceil(max_tokens * LLM_COMPLETION_RESERVE)
+
+
+class TokenBucket:
+    """Ведро на per_minute единиц, пополняется равномерно; 0 - без лимита."""
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self._clock = clock
+        self.level = self.capacity
+        self._updated = clock()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Через сколько секунд в ведре будет amount (больше ёмкости не ждём)."""
+        if self.unlimited:
+            return 0.0
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float, now: float) -> None:
+        if not self.unlimited:
+            self._refill(now)
+            self.level -= min(amount, self.capacity)
+
+    def put(self, amount: float, now: float) -> None:
+        """Вернуть amount в ведро; отрицательный amount - дозанять (usage больше резерва)."""
+        if not self.unlimited and amount:
+            self._refill(now)
+            self.level = min(self.capacity, self.level + amount)
+
+
+class _Waiter:
+    __slots__ = ("priority", "tokens", "deadline", "wake", "done")
+
+    def __init__(self, priority: str, tokens: int, deadline: float, wake: Callable[[], None]):
+        self.priority = priority
+        self.tokens = tokens
+        self.deadline = deadline
+        self.wake = wake
+        self.done = False
+
+
+class Permit:
+    """Разрешение на один вызов; settle/cancel возвращают неиспользованное."""
+
+    def __init__(self, scheduler: "LLMScheduler", tokens: int):
+        self._scheduler = scheduler
+        self.tokens = tokens
+
+    def settle(self, used_tokens: Optional[int]) -> None:
+        """Вызов состоялся: вернуть разницу между резервом и реальным usage (None - оставить резерв)."""
+        if used_tokens is not None:
+            self._scheduler._refund(0, self.tokens - used_tokens)
+
+    def cancel(self) -> None:
+        """Вызова не было (breaker, бюджет): вернуть запрос и токены."""
+        self._scheduler._refund(1, self.tokens)
+
+
+class LLMScheduler:
+    """Token bucket лимиты + очередь с приоритетами и дедлайнами."""
+
+    def __init__(
+        self,
+        rpm: float = LLM_RATE_RPM,
+        tpm: float = LLM_RATE_TPM,
+        max_wait: Optional[Dict[str, float]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._clock = clock
+        self.requests = TokenBucket(rpm, clock)
+        self.tokens = TokenBucket(tpm, clock)
+        self.max_wait = max_wait or {
+            INTERACTIVE: LLM_QUEUE_WAIT_INTERACTIVE,
+            ROADMAP: LLM_QUEUE_WAIT_ROADMAP,
+            BACKGROUND: LLM_QUEUE_WAIT_BACKGROUND,
+        }
+        self._lock = threading.Lock()
+        self._queue: List[tuple] = []
+        self._seq = itertools.count()
+        self.stats = {p: {"granted": 0, "queued": 0, "expired": 0, "wait_seconds": 0.0} for p in PRIORITIES}
+
+    def _deadline(self, priority: str, now: float) -> float:
+        deadline = now + self.max_wait.get(priority, 0.0)
+        remaining = remaining_budget()
+        return deadline if remaining is None else min(deadline, now + remaining)
+
+    def _head(self) -> Optional[_Waiter]:
+        while self._queue and self._queue[0][2].done:
+            heapq.heappop(self._queue)
+        return self._queue[0][2] if self._queue else None
+
+    def _leave(self, waiter: _Waiter) -> None:
+        """Убрать waiter из очереди и разбудить следующего (под lock)."""
+        waiter.done = True
+        head = self._head()
+        if head is not None:
+            head.wake()
+
+    def _poll(self, waiter: _Waiter, now: float) -> float:
+        """Под lock: 0 - разрешение выдано, -1 - дедлайн, иначе сколько ждать."""
+        wait = None
+        if self._head() is waiter:
+            wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(waiter.tokens, now))
+            if wait <= 0:
+                self.requests.take(1, now)
+                self.tokens.take(waiter.tokens, now)
+                self._leave(waiter)
+                return 0.0
+        if now >= waiter.deadline:
+            self._leave(waiter)
+            return -1.0
+        left = waiter.deadline - now
+        return left if wait is None else min(wait, left)
+
+    def _enqueue(self, tokens: int, wake: Callable[[], None]) -> _Waiter:
+        now = self._clock()
+        priority = current_priority()
+        waiter = _Waiter(priority, tokens, self._deadline(priority, now), wake)
+        heapq.heappush(self._queue, (PRIORITIES[priority], next(self._seq), waiter))
+        return waiter
+
+    def _finish(self, waiter: _Waiter, state: float, started: float, queued: bool) -> Optional[Permit]:
+        stats = self.stats[waiter.priority]
+        if queued:
+            stats["queued"] += 1
+            stats["wait_seconds"] += self._clock() - started
+        if state < 0:
+            stats["expired"] += 1
+            return None
+        stats["granted"] += 1
+        return Permit(self, waiter.tokens)
+
+    def acquire(self, tokens: int) -> Optional[Permit]:
+        """Дождаться разрешения (блокирует поток); None - не успели до дедлайна."""
+        event = threading.Event()
+        started = self._clock()
+        with self._lock:
+            waiter = self._enqueue(tokens, event.set)
+        queued = False
+        while True:
+            event.clear()
+            with self._lock:
+                state = self._poll(waiter, self._clock())
+                if state <= 0:
+                    return self._finish(waiter, state, started, queued)
+            queued = True
+            event.wait(state)
+
+    async def acquire_async(self, tokens: int) -> Optional[Permit]:
+        """Асинхронный acquire; отмена задачи убирает её из очереди."""
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        started = self._clock()
+        with self._lock:
+            waiter = self._enqueue(tokens, lambda: loop.call_soon_threadsafe(event.set))
+        queued = False
+        try:
+            while True:
+                event.clear()
+                with self._lock:
+                    state = self._poll(waiter, self._clock())
+                    if state <= 0:
+                        return self._finish(waiter, state, started, queued)
+                queued = True
+                try:
+                    await asyncio.wait_for(event.wait(), state)
+                except asyncio.TimeoutError:
+                    pass
+        except asyncio.CancelledError:
+            with self._lock:
+                if not waiter.done:
+                    self._leave(waiter)
+            raise
+
+    def _refund(self, requests: int, tokens: int) -> None:
+        with self._lock:
+            now = self._clock()
+            self.requests.put(requests, now)
+            self.tokens.put(tokens, now)
+            head = self._head()
+            if head is not None:
+                head.wake()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            now = self._clock()
+            self.requests.wait_time(0, now)
+            self.tokens.wait_time(0, now)
+            return {
+                "rpm": self.requests.capacity,
+                "tpm": self.tokens.capacity,
+                "requests_available": None if self.requests.unlimited else round(self.requests.level, 1),
+                "tokens_available": None if self.tokens.unlimited else round(self.tokens.level),
+                "waiting": sum(not entry[2].done for entry in self._queue),
+                "classes": {
+                    p: {**s, "wait_seconds": round(s["wait_seconds"], 3)} for p, s in self.stats.items()
+                },
+            }
+
+
+llm_scheduler = LLMScheduler()
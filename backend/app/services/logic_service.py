@@ -21,12 +21,24 @@ User Profile → compute_program_score() → Match Score + Factor Breakdown
                                          explain_recommendation() → Human-readable Explanation
 """
 
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 from ..storage.memory import list_universities, get_university
-from .ai_service import explain_recommendation
-
-
-def compute_program_score(profile: Dict[str, Any], university: Dict[str, Any], program: Dict[str, Any]) -> Tuple[float, Dict[str, Any]]:
+from .ai_service import explain_recommendation, explain_many, explain_many_async, iter_explanations_async, fallback_explanations
+from .geo_service import ANY_CITY, city_code, city_points as city_proximity_points, distance_km, gather_city_points
+
+# Explanation modes (RecommendationRequest.explain / WhatIfRequest.explain)
+EXPLAIN_NONE = "none"          # scores and factors only
+EXPLAIN_FALLBACK = "fallback"  # deterministic templates, no LLM
+EXPLAIN_AI = "ai"              # LLM explanation, fallback per program on failure
+EXPLAIN_MODES = (EXPLAIN_NONE, EXPLAIN_FALLBACK, EXPLAIN_AI)
+
+
+def compute_program_score(
+    profile: Dict[str, Any],
+    university: Dict[str, Any],
+    program: Dict[str, Any],
+    city_points: Optional[float] = None,
+) -> Tuple[float, Dict[str, Any]]:
     """
     Compute a heuristic match score (0-100) and return a breakdown of factors.
 
@@ -55,7 +67,9 @@ def compute_program_score(profile: Dict[str, Any], university: Dict[str, Any], p
     
     - City Preference (10 points): Quality of life factor
       - WHY 10%: Nice to have but not critical - users can relocate
-      - Calculation: Binary - matches preference or not
+      - Calculation: Graded by road distance from the preferred city
+        (full points in the same city, 0 beyond ~300 km), read from the
+        precomputed matrix in geo_service
     
     - Career Outcomes (15 points): Long-term value
       - WHY 15%: Employment rate and salary indicate program quality
@@ -65,6 +79,8 @@ def compute_program_score(profile: Dict[str, Any], university: Dict[str, Any], p
         profile: User profile dict with entScore, ieltsScore, budget, preferredCity
         university: University data dict
         program: Program data dict with requirements and outcomes
+        city_points: Precomputed city factor (recommend() gathers these for all
+                     universities at once); looked up here when omitted
 
     Returns:
         Tuple of (final_score_0_to_100, factor_breakdown_dict)
@@ -145,19 +161,29 @@ def compute_program_score(profile: Dict[str, Any], university: Dict[str, Any], p
     score += budget_score
 
     # FACTOR 4: City Preference (10 points) - Quality of life / convenience
-    # Binary scoring - either matches or doesn't. Small weight because relocation is possible.
+    # Graded by distance: same city = 10, nearby towns (e.g. Kaskelen for Almaty)
+    # keep most points, far cities get 0. Small weight because relocation is possible.
     preferred = profile.get("preferredCity")
     uni_city = university.get("city")
     
-    # Match if: no preference, preference is "Любой", or preference matches
-    city_matches = (preferred in (None, "Любой", "") or preferred == uni_city)
-    city_score = 10.0 if city_matches else 0.0
+    if city_points is None:
+        city_points = city_proximity_points(preferred, uni_city)
+    city_score = round(float(city_points), 1)
+    
+    # Status: no preference or same city → matches, partial points → nearby
+    if preferred in ANY_CITY or city_score >= 10.0:
+        city_status = "matches"
+    elif city_score > 0:
+        city_status = "nearby"
+    else:
+        city_status = "different"
     
     breakdown["city"] = {
         "preferred": preferred or "Любой",
         "university_city": uni_city,
+        "distance_km": None if preferred in ANY_CITY else _rounded(distance_km(city_code(preferred), city_code(uni_city))),
         "contribution": city_score,
-        "status": "matches" if city_matches else "different"
+        "status": city_status
     }
     score += city_score
 
@@ -191,47 +217,31 @@ def compute_program_score(profile: Dict[str, Any], university: Dict[str, Any], p
     return final, breakdown
 
 
-def recommend(profile: Dict[str, Any], top_k: int = 5, is_simulation: bool = False) -> List[Dict[str, Any]]:
-    """
-    Generate top-k university program recommendations with structured explanations.
-
-    ALGORITHM:
-    1. Score all programs across all universities using compute_program_score()
-    2. For each scored program, generate AI explanation from computed facts
-    3. Sort by score (descending) and return top-k
-
-    WHY THIS APPROACH:
-    - Exhaustive scoring ensures no good matches are missed
-    - AI explanations are generated from computed facts only (no hallucinations)
-    - Sorting by score provides transparent ranking
-    - Top-k limits results to most relevant options
+def _rounded(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value)
 
-    DATA FLOW:
-    User Profile → Score All Programs → Generate Explanations → Sort → Top-K
 
-    Args:
-        profile: User profile dict with scores, preferences, constraints
-        top_k: Number of top recommendations to return (default: 5)
-        is_simulation: If True, mark these as what-if/simulated recommendations
-                       (used for frontend to distinguish real vs. simulated data)
+def score_programs(profile: Dict[str, Any], is_simulation: bool = False) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Score every program and return (candidate, facts) pairs, best first.
 
-    Returns:
-        List of recommendation dicts, each containing:
-        - university_id, program_id: Identifiers
-        - university_name, program_name: Display names
-        - score: Match score (0-100)
-        - factors: Detailed breakdown of scoring factors
-        - explanation: AI-generated explanation with summary, key_factors, strengths, etc.
-        - is_simulation: Boolean flag indicating if this is a simulated recommendation
+    Pure CPU work - no AI calls. Candidates have "explanation": None; facts
+    hold the computed data an explainer may use (no external knowledge).
     """
-    candidates: List[Dict[str, Any]] = []
+    ranked: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+    universities = list_universities()
+    
+    # City factor for every university in one gather from the precomputed matrix
+    uni_cities = [uni.get("city") for uni in universities]
+    uni_city_points = gather_city_points(
+        profile.get("preferredCity"), [city_code(c) for c in uni_cities], uni_cities
+    )
     
-    # STEP 1: Score all programs across all universities
     # We evaluate every program to ensure comprehensive matching
-    for uni in list_universities():
+    for uni, uni_points in zip(universities, uni_city_points):
         for prog in uni.get("programs", []):
             # Compute deterministic match score
-            score, breakdown = compute_program_score(profile, uni, prog)
+            score, breakdown = compute_program_score(profile, uni, prog, city_points=uni_points)
             
             # Build facts dictionary for AI explanation
             # Only include computed/verified data - no external knowledge
@@ -251,41 +261,158 @@ def recommend(profile: Dict[str, Any], top_k: int = 5, is_simulation: bool = Fal
                 }
             }
 
-            # STEP 2: Generate AI explanation from facts
-            # AI only interprets computed scores - it doesn't score itself
-            try:
-                explanation_data = explain_recommendation({"facts": facts})
-            except Exception as e:
-                # If AI fails, use minimal fallback explanation
-                import sys
-                print(f"[Logic Service] AI explanation failed for {uni.get('id')}/{prog.get('id')}: {e}", file=sys.stderr)
-                explanation_data = {
-                    "summary": f"{uni.get('name')} — {prog.get('name')}. Балл соответствия: {score:.1f}/100.",
-                    "key_factors": [],
-                    "explanation": "Рекомендация основана на анализе соответствия критериев.",
-                    "strengths": [],
-                    "considerations": []
-                }
-
-            # STEP 3: Build candidate recommendation
-            candidates.append({
+            ranked.append(({
                 "university_id": uni.get("id"),
                 "program_id": prog.get("id"),
                 "university_name": uni.get("name"),
                 "program_name": prog.get("name"),
                 "score": score,
                 "factors": breakdown,
-                "explanation": explanation_data,
+                "explanation": None,
                 "is_simulation": is_simulation,
-            })
+            }, facts))
+
+    # Higher scores indicate better matches (stable sort keeps catalog order on ties)
+    ranked.sort(key=lambda pair: pair[0]["score"], reverse=True)
+    return ranked
+
+
+def _check_explain(explain: str) -> None:
+    if explain not in EXPLAIN_MODES:
+        raise ValueError(f"Unknown explain mode: {explain}")
 
-    # STEP 4: Sort by score (descending) and return top-k
-    # Higher scores indicate better matches
-    candidates.sort(key=lambda x: x["score"], reverse=True)
-    return candidates[:top_k]
 
+def _attach_explanations(ranked: List[Tuple[Dict[str, Any], Dict[str, Any]]], explanations: List[Optional[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    for (candidate, _), explanation in zip(ranked, explanations):
+        candidate["explanation"] = explanation
+    return [candidate for candidate, _ in ranked]
 
-def what_if(profile: Dict[str, Any], changes: Dict[str, Any], top_k: int = 5) -> Dict[str, Any]:
+
+def _cpu_explanations(ranked: List[Tuple[Dict[str, Any], Dict[str, Any]]], explain: str) -> List[Optional[Dict[str, Any]]]:
+    """Explanations for the modes that never call the LLM."""
+    if explain == EXPLAIN_NONE:
+        return [None] * len(ranked)
+    return fallback_explanations([facts for _, facts in ranked])
+
+
+def recommend(
+    profile: Dict[str, Any],
+    top_k: int = 5,
+    is_simulation: bool = False,
+    explain: str = EXPLAIN_AI,
+) -> List[Dict[str, Any]]:
+    """
+    Generate top-k university program recommendations with structured explanations.
+
+    ALGORITHM:
+    1. Score all programs across all universities using compute_program_score()
+    2. Sort by score (descending) and keep top-k
+    3. Generate an AI explanation from computed facts for each of the top-k
+
+    WHY THIS APPROACH:
+    - Exhaustive scoring ensures no good matches are missed
+    - AI explanations are generated from computed facts only (no hallucinations)
+    - Sorting by score provides transparent ranking
+    - Only the top-k are explained: programs that are not returned never
+      cost an LLM call
+
+    DATA FLOW:
+    User Profile → Score All Programs → Sort → Top-K → Generate Explanations
+
+    Args:
+        profile: User profile dict with scores, preferences, constraints
+        top_k: Number of top recommendations to return (default: 5)
+        is_simulation: If True, mark these as what-if/simulated recommendations
+                       (used for frontend to distinguish real vs. simulated data)
+        explain: "ai" (default) - LLM explanations; "fallback" - deterministic
+                 explanations only; "none" - explanation stays None.
+                 The last two are pure CPU work.
+
+    Returns:
+        List of recommendation dicts, each containing:
+        - university_id, program_id: Identifiers
+        - university_name, program_name: Display names
+        - score: Match score (0-100)
+        - factors: Detailed breakdown of scoring factors
+        - explanation: AI-generated explanation with summary, key_factors, strengths, etc.
+        - is_simulation: Boolean flag indicating if this is a simulated recommendation
+    """
+    _check_explain(explain)
+    ranked = score_programs(profile, is_simulation)[:top_k]
+    if explain != EXPLAIN_AI:
+        return _attach_explanations(ranked, _cpu_explanations(ranked, explain))
+
+    # AI only interprets computed scores - it doesn't score itself.
+    # A failing explanation falls back for that program only.
+    return _attach_explanations(ranked, explain_many([facts for _, facts in ranked]))
+
+
+async def recommend_async(
+    profile: Dict[str, Any],
+    top_k: int = 5,
+    is_simulation: bool = False,
+    explain: str = EXPLAIN_AI,
+) -> List[Dict[str, Any]]:
+    """
+    Same result as recommend(), but the top-k explanations run concurrently.
+
+    End-to-end latency becomes roughly the slowest single explanation
+    instead of the sum of all of them. Concurrency and per-item timeout come
+    from config (EXPLANATION_CONCURRENCY, EXPLANATION_TIMEOUT); each program
+    that fails or times out falls back independently.
+    """
+    _check_explain(explain)
+    ranked = score_programs(profile, is_simulation)[:top_k]
+    if explain != EXPLAIN_AI:
+        return _attach_explanations(ranked, _cpu_explanations(ranked, explain))
+    return _attach_explanations(ranked, await explain_many_async([facts for _, facts in ranked]))
+
+
+async def stream_recommendations(
+    profile: Dict[str, Any],
+    top_k: int = 5,
+    is_simulation: bool = False,
+    explain: str = EXPLAIN_AI,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Recommendation events for streaming to the client.
+
+    EVENTS (in order):
+    1. {"type": "recommendations", "recommendations": [...]} - the scored,
+       ranked top-k with "explanation": None. Sent before any LLM call, so
+       time-to-first-content does not depend on the LLM.
+    2. {"type": "explanation", "id": "<university_id>-<program_id>", ...}
+       - one per program, in completion order (not rank order).
+    3. {"type": "done"}
+
+    With explain "none" or "fallback" nothing needs the LLM: the
+    recommendations event already carries the final explanations and no
+    explanation events follow.
+    """
+    _check_explain(explain)
+    ranked = score_programs(profile, is_simulation)[:top_k]
+    if explain != EXPLAIN_AI:
+        yield {"type": "recommendations", "recommendations": _attach_explanations(ranked, _cpu_explanations(ranked, explain))}
+        yield {"type": "done"}
+        return
+
+    yield {"type": "recommendations", "recommendations": [candidate for candidate, _ in ranked]}
+
+    async for index, explanation in iter_explanations_async([facts for _, facts in ranked]):
+        candidate = ranked[index][0]
+        candidate["explanation"] = explanation
+        yield {
+            "type": "explanation",
+            "id": f"{candidate['university_id']}-{candidate['program_id']}",
+            "university_id": candidate["university_id"],
+            "program_id": candidate["program_id"],
+            "explanation": explanation,
+        }
+
+    yield {"type": "done"}
+
+
+def what_if(profile: Dict[str, Any], changes: Dict[str, Any], top_k: int = 5, explain: str = EXPLAIN_AI) -> Dict[str, Any]:
     """
     Perform what-if analysis: simulate how recommendations change with parameter modifications.
 
@@ -309,6 +436,8 @@ def what_if(profile: Dict[str, Any], changes: Dict[str, Any], top_k: int = 5) ->
         profile: Current user profile
         changes: Dict of changes to apply (e.g., {"entScore": 125, "budget": 1500000})
         top_k: Number of recommendations to compare
+        explain: Explanation mode for both sides (see recommend); sliders
+                 that only compare scores pass "none"
 
     Returns:
         Dict with:
@@ -318,7 +447,7 @@ def what_if(profile: Dict[str, Any], changes: Dict[str, Any], top_k: int = 5) ->
           Each delta item contains: id, before, after, delta_score
     """
     # Generate baseline recommendations
-    base = recommend(profile, top_k=top_k)
+    base = recommend(profile, top_k=top_k, explain=explain)
     
     # Create scenario profile by applying changes
     # Changes override existing profile values
@@ -326,7 +455,7 @@ def what_if(profile: Dict[str, Any], changes: Dict[str, Any], top_k: int = 5) ->
     scenario_profile.update(changes)
     
     # Generate scenario recommendations
-    scenario = recommend(scenario_profile, top_k=top_k)
+    scenario = recommend(scenario_profile, top_k=top_k, explain=explain)
 
     # Compute deltas: compare programs that appear in both base and scenario
     # Use composite key "university_id-program_id" for matching
@@ -0,0 +1,143 @@
+"""Устойчивость вызовов LLM: бюджет задержки запроса и circuit breaker.
+
+БЮДЖЕТ (DEADLINE):
+Каждый HTTP запрос получает бюджет задержки - заголовок X-Latency-Budget-Ms
+или REQUEST_LATENCY_BUDGET_MS из config. Дедлайн хранится в contextvar,
+поэтому доходит до любого вызова LLM внутри запроса (в том числе в
+asyncio задачах и threadpool). Вызов получает таймаут не больше оставшегося
+бюджета; если бюджет исчерпан, вызова нет - сразу детерминированный fallback.
+
+CIRCUIT BREAKER:
+После LLM_BREAKER_FAILURES подряд неудачных вызовов (ошибка, таймаут Groq)
+breaker размыкается: вызовы сразу получают fallback, не дожидаясь таймаутов.
+Через LLM_BREAKER_RECOVERY_SECONDS он переходит в half-open и пропускает
+один пробный вызов: успех замыкает цепь, ошибка снова размыкает.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from ..config import LLM_BREAKER_FAILURES, LLM_BREAKER_RECOVERY_SECONDS
+
+# Абсолютный дедлайн текущего запроса (time.monotonic), None - без бюджета
+_deadline: ContextVar[Optional[float]] = ContextVar("llm_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(budget_seconds: Optional[float]) -> Iterator[None]:
+    """Ограничить вложенный код бюджетом; вложенные бюджеты только сужают внешний."""
+    if budget_seconds is None:
+        yield
+        return
+    deadline = time.monotonic() + max(0.0, budget_seconds)
+    outer = _deadline.get()
+    if outer is not None:
+        deadline = min(deadline, outer)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_budget() -> Optional[float]:
+    """Сколько секунд осталось до дедлайна (None - бюджета нет)."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def clip_timeout(timeout: float) -> float:
+    """Таймаут вызова, урезанный до оставшегося бюджета."""
+    remaining = remaining_budget()
+    return timeout if remaining is None else min(timeout, remaining)
+
+
+class CircuitBreaker:
+    """Размыкается после N ошибок подряд, через recovery_timeout пробует снова."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_timeout = recovery_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self.stats = {"successes": 0, "failures": 0, "short_circuits": 0, "opened": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self) -> bool:
+        """Можно ли сейчас вызывать сервис. False - сразу использовать fallback."""
+        now = self._clock()
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and now - self._opened_at >= self.recovery_timeout:
+                self._state = self.HALF_OPEN
+                self._probe_started = None
+            if self._state == self.HALF_OPEN:
+                # Один пробный вызов; зависшая проба не блокирует навсегда
+                if self._probe_started is None or now - self._probe_started >= self.recovery_timeout:
+                    self._probe_started = now
+                    return True
+            self.stats["short_circuits"] += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.stats["successes"] += 1
+            self._failures = 0
+            self._state = self.CLOSED
+            self._probe_started = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.stats["failures"] += 1
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.stats["opened"] += 1
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._probe_started = None
+
+    def release(self) -> None:
+        """Вызов прерван не по вине сервиса (исчерпан бюджет, отмена) - без счёта."""
+        with self._lock:
+            self._probe_started = None
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            retry_in = None
+            if self._state == self.OPEN:
+                retry_in = round(max(0.0, self.recovery_timeout - (self._clock() - self._opened_at)), 1)
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "retry_in_seconds": retry_in,
+                **self.stats,
+            }
+
+
+groq_breaker = CircuitBreaker("groq", LLM_BREAKER_FAILURES, LLM_BREAKER_RECOVERY_SECONDS)
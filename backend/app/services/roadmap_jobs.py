@@ -0,0 +1,172 @@
+"""Roadmap generation jobs: a bounded worker pool for the LLM call.
+
+generate_roadmap blocks on Groq for seconds. Run inside a sync route, that
+holds one of the threads every other sync route shares. So POST /roadmap:
+
+1. Returns a cached roadmap straight away when its skeleton is cached.
+2. Otherwise saves and returns the deterministic fallback roadmap as a
+   placeholder, plus a job id.
+3. A worker (ROADMAP_WORKERS threads) generates the AI roadmap and saves
+   it with save_roadmap; GET /roadmap/jobs/{job_id} reports the status.
+
+JOB STATES: pending -> running -> done | failed
+
+Only the user's latest job may save its result, so a slow older job never
+overwrites a newer roadmap. Routes that save a roadmap themselves (a cache
+hit, the streaming endpoint) call supersede() first. At most ROADMAP_QUEUE_MAX jobs wait for a
+worker; beyond that submit() raises RoadmapQueueFull and the placeholder
+stays. Finished jobs are forgotten after ROADMAP_JOB_TTL_SECONDS.
+shutdown() fails the jobs that never started, so none stays pending.
+"""
+
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from ..config import ROADMAP_JOB_TTL_SECONDS, ROADMAP_QUEUE_MAX, ROADMAP_WORKERS
+from ..storage.memory import save_roadmap
+from .ai_service import generate_roadmap
+from .llm_scheduler import ROADMAP, priority_scope
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class RoadmapQueueFull(Exception):
+    """Too many roadmap jobs are waiting for a worker."""
+
+
+class RoadmapJobs:
+    """Bounded pool of roadmap generation jobs, tracked by id."""
+
+    def __init__(
+        self,
+        workers: int = ROADMAP_WORKERS,
+        queue_max: int = ROADMAP_QUEUE_MAX,
+        ttl_seconds: float = ROADMAP_JOB_TTL_SECONDS,
+        generate: Callable[[Dict[str, Any]], Dict[str, Any]] = generate_roadmap,
+        save: Callable[[str, List[Dict[str, Any]]], None] = save_roadmap,
+    ):
+        self.workers = max(1, workers)
+        self.queue_max = max(0, queue_max)
+        self.ttl_seconds = ttl_seconds
+        self._generate = generate
+        self._save = save
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._latest: Dict[str, str] = {}
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def submit(self, user_id: str, context: Dict[str, Any]) -> str:
+        """Queue AI generation of the user's roadmap; returns the job id."""
+        with self._lock:
+            self._purge()
+            if self._active >= self.workers + self.queue_max:
+                raise RoadmapQueueFull()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="roadmap")
+            job_id = str(uuid.uuid4())
+            self._jobs[job_id] = {
+                "id": job_id,
+                "user_id": user_id,
+                "status": PENDING,
+                "roadmap": None,
+                "error": None,
+                "created_at": time.time(),
+                "finished_at": None,
+            }
+            self._latest[user_id] = job_id
+            self._active += 1
+            executor = self._executor
+        executor.submit(self._run, job_id, context)
+        return job_id
+
+    def supersede(self, user_id: str) -> None:
+        """Stop the user's queued or running job from saving its result.
+
+        Call before saving a roadmap by another route (cache hit, stream),
+        so a slow job cannot overwrite it later. The job still runs and
+        reports its roadmap through get().
+        """
+        with self._lock:
+            self._latest.pop(user_id, None)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Snapshot of a job (None if unknown or expired)."""
+        with self._lock:
+            self._purge()
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _run(self, job_id: str, context: Dict[str, Any]) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            if job["status"] != PENDING:
+                # Failed by shutdown() before a worker got to it
+                return
+            job["status"] = RUNNING
+        try:
+            # Under Groq rate limits roadmaps yield to interactive explanations
+            with priority_scope(ROADMAP):
+                items = self._generate(context).get("roadmap", [])
+            with self._lock:
+                # Save under the lock so a newer job cannot slip in between
+                if self._latest.get(job["user_id"]) == job_id:
+                    self._save(job["user_id"], items)
+                job.update(status=DONE, roadmap=items)
+        except Exception as e:
+            print(f"[Roadmap] Job {job_id} failed: {type(e).__name__}: {e}", file=sys.stderr)
+            with self._lock:
+                job.update(status=FAILED, error=str(e))
+        finally:
+            with self._lock:
+                job["finished_at"] = time.time()
+                self._active -= 1
+
+    def _purge(self) -> None:
+        """Drop finished jobs older than the TTL (caller holds the lock)."""
+        cutoff = time.time() - self.ttl_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["finished_at"] is not None and job["finished_at"] < cutoff
+        ]
+        for job_id in expired:
+            user_id = self._jobs.pop(job_id)["user_id"]
+            if self._latest.get(user_id) == job_id:
+                del self._latest[user_id]
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            statuses = [job["status"] for job in self._jobs.values()]
+            return {
+                "workers": self.workers,
+                "queue_max": self.queue_max,
+                "active": self._active,
+                **{status: statuses.count(status) for status in (PENDING, RUNNING, DONE, FAILED)},
+            }
+
+    def shutdown(self) -> None:
+        """Stop the workers; queued jobs that have not started fail with "shutdown".
+
+        Running jobs finish on their own. The object stays usable: the next
+        submit() starts a new pool.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            now = time.time()
+            for job in self._jobs.values():
+                if job["status"] == PENDING:
+                    job.update(status=FAILED, error="shutdown", finished_at=now)
+                    self._active -= 1
+
+
+roadmap_jobs = RoadmapJobs()
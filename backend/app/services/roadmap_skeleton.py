@@ -0,0 +1,145 @@
+"""Roadmap skeletons: one LLM roadmap per (program, gap buckets, date window).
+
+A generated roadmap depends on a handful of inputs: the program, how far
+the student is from its ENT / IELTS / budget requirements, and how much
+time there is until the deadline. So generate_roadmap:
+
+1. Reduces the request to a signature: program identity, bucketed gaps
+   (e.g. ENT gap "6-15") and a bucketed start-to-deadline window.
+2. Describes the student to the LLM by those buckets rather than exact
+   numbers, so the answer is valid for everyone with the same signature.
+3. Caches a skeleton: the roadmap with every date replaced by a day
+   offset from the start date.
+4. On a hit, re-bases the offsets on this request's start_date (clamped
+   to its deadline) and assigns fresh item ids.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from .explanation_signature import _bucket
+
+# Human-readable descriptions for the prompt, keyed by bucket label
+_ENT_GAP_TEXT = {
+    "0": "выполнен",
+    "1-5": "не хватает 1-5 баллов",
+    "6-15": "не хватает 6-15 баллов",
+    "16-30": "не хватает 16-30 баллов",
+    "31+": "не хватает больше 30 баллов",
+}
+_IELTS_GAP_TEXT = {
+    "none": "не требуется",
+    "0": "выполнен",
+    "0.5": "не хватает 0.5 балла",
+    "1.0": "не хватает 1 балла",
+    "1.5+": "не хватает 1.5 балла и больше",
+}
+_BUDGET_GAP_TEXT = {
+    "free": "обучение бесплатное",
+    "0": "бюджет покрывает стоимость",
+    "<10%": "не хватает до 10% стоимости",
+    "10-30%": "не хватает 10-30% стоимости",
+    "30-60%": "не хватает 30-60% стоимости",
+    "60%+": "не хватает больше 60% стоимости",
+}
+_WINDOW_TEXT = {
+    "none": "дедлайн не указан",
+    "past": "дедлайн уже прошёл",
+    "<=30d": "до дедлайна меньше месяца",
+    "<=90d": "до дедлайна 1-3 месяца",
+    "<=180d": "до дедлайна 3-6 месяцев",
+    "<=365d": "до дедлайна 6-12 месяцев",
+    ">365d": "до дедлайна больше года",
+}
+
+
+def roadmap_signature(
+    profile: Dict[str, Any],
+    uni: Dict[str, Any],
+    program: Dict[str, Any],
+    start_date: datetime,
+    deadline: Optional[datetime],
+) -> Dict[str, Any]:
+    """Bucketed inputs that drive the roadmap; used as the cache key."""
+    ent_gap = max(0.0, float(program.get("minENT", 0) or 0) - float(profile.get("entScore", 0) or 0))
+    min_ielts = float(program.get("minIELTS", 0) or 0)
+    ielts_gap = max(0.0, min_ielts - float(profile.get("ieltsScore", 0) or 0))
+    tuition = float(program.get("tuition", 0) or 0)
+    shortfall = max(0.0, tuition - float(profile.get("budget", 0) or 0))
+
+    if deadline is None:
+        window = "none"
+    else:
+        days = (deadline - start_date).days
+        window = "past" if days < 0 else _bucket(days, [30, 90, 180, 365], ["<=30d", "<=90d", "<=180d", "<=365d", ">365d"])
+
+    return {
+        "university_id": uni.get("id"),
+        "university_name": uni.get("name"),
+        "program_id": program.get("id"),
+        "program_name": program.get("name"),
+        "gaps": {
+            "ent": _bucket(ent_gap, [0, 5, 15, 30], ["0", "1-5", "6-15", "16-30", "31+"]),
+            "ielts": "none" if min_ielts == 0 else _bucket(ielts_gap, [0, 0.5, 1.0], ["0", "0.5", "1.0", "1.5+"]),
+            "budget": "free" if tuition == 0 else _bucket(shortfall / tuition, [0, 0.1, 0.3, 0.6], ["0", "<10%", "10-30%", "30-60%", "60%+"]),
+        },
+        "window": window,
+    }
+
+
+def describe_signature(signature: Dict[str, Any]) -> Dict[str, str]:
+    """Prompt-ready descriptions of the bucketed student situation."""
+    gaps = signature["gaps"]
+    return {
+        "ent": _ENT_GAP_TEXT[gaps["ent"]],
+        "ielts": _IELTS_GAP_TEXT[gaps["ielts"]],
+        "budget": _BUDGET_GAP_TEXT[gaps["budget"]],
+        "window": _WINDOW_TEXT[signature["window"]],
+    }
+
+
+def _offset(date_iso: Any, start_date: datetime) -> Optional[int]:
+    try:
+        return (datetime.fromisoformat(str(date_iso)).date() - start_date.date()).days
+    except (TypeError, ValueError):
+        return None
+
+
+def to_skeleton(items: List[Dict[str, Any]], start_date: datetime) -> List[Dict[str, Any]]:
+    """Strip ids and turn due dates into day offsets from start_date."""
+    skeleton = []
+    for item in items:
+        entry = {k: v for k, v in item.items() if k not in ("id", "due_date", "subtasks")}
+        entry["due_offset"] = _offset(item.get("due_date"), start_date)
+        entry["subtasks"] = [
+            {**{k: v for k, v in sub.items() if k != "due_date"}, "due_offset": _offset(sub.get("due_date"), start_date)}
+            for sub in item.get("subtasks", []) or []
+            if isinstance(sub, dict)
+        ]
+        skeleton.append(entry)
+    return skeleton
+
+
+def _rebase(offset: Optional[int], start_date: datetime, deadline: Optional[datetime]) -> Optional[str]:
+    if offset is None:
+        return None
+    due = start_date + timedelta(days=offset)
+    if deadline is not None and start_date <= deadline < due:
+        due = deadline
+    return due.date().isoformat()
+
+
+def from_skeleton(skeleton: List[Dict[str, Any]], start_date: datetime, deadline: Optional[datetime]) -> List[Dict[str, Any]]:
+    """Concrete roadmap items for this request: new ids, dates re-based on start_date."""
+    items = []
+    for entry in skeleton:
+        item = {k: v for k, v in entry.items() if k not in ("due_offset", "subtasks")}
+        item["id"] = str(uuid.uuid4())
+        item["due_date"] = _rebase(entry.get("due_offset"), start_date, deadline)
+        item["subtasks"] = [
+            {**{k: v for k, v in sub.items() if k != "due_offset"}, "due_date": _rebase(sub.get("due_offset"), start_date, deadline)}
+            for sub in entry.get("subtasks", [])
+        ]
+        items.append(item)
+    return items
@@ -0,0 +1,440 @@
+"""Server-side catalog search: BM25 full-text ranking and prefix autocomplete.
+
+The index covers every university and program in storage.memory. Each
+university and each program is one document:
+- University doc "{university_id}": name + city
+- Program doc "{university_id}-{program_id}": program name (boosted),
+  degree, university name and city
+
+TOKENIZATION:
+Lowercase, split on Unicode word characters (Cyrillic, Kazakh and Latin
+alike), then fold Kazakh-specific letters and "ё" to their closest Russian
+letters so "Қаскелең" and "Каскелен" land on the same token. City names
+are expanded with their Russian/Kazakh/English spellings.
+
+STRUCTURES:
+- postings: term -> {doc_id: term frequency} (inverted index for BM25)
+- ranked: term -> rank keys of its documents in suggestion order, so
+  multi-word autocomplete can stop after the first `limit` matches
+- trie: one node per term prefix; each node caches the best SUGGEST_LIMIT
+  documents in its subtree, so autocomplete is a walk of len(prefix)
+  nodes plus a read of a short list - independent of catalog size
+
+UPDATES:
+storage.memory notifies us when a university (or one of its programs)
+changes; only that university's documents are re-indexed.
+
+LOCKING:
+Updates and the short autocomplete walks hold the index lock. BM25 search
+only copies the query terms' postings under the lock and scores outside
+it, so a long search never stalls autocomplete or catalog updates.
+"""
+
+import bisect
+import heapq
+import math
+import operator
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..storage.memory import list_universities, get_university, add_catalog_listener
+from .geo_service import city_aliases
+
+# BM25 parameters (standard defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Program names count this many times towards term frequency
+TITLE_BOOST = 2
+# Documents cached per trie node (upper bound for autocomplete results)
+SUGGEST_LIMIT = 10
+# Multi-word autocomplete tests the prefix with posting lookups when it has
+# at most this many completions, otherwise with a per-document term match
+PREFIX_MERGE_LIMIT = 32
+# Documents one multi-word autocomplete may examine; past it the suggestions
+# found so far are returned, which bounds the latency of rare combinations
+AUTOCOMPLETE_MAX_SCAN = 8192
+# First chunk of that scan (doubles each round)
+SCAN_CHUNK = 64
+
+# Rank keys end with the doc id
+_DOC_ID = operator.itemgetter(-1)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_FOLD = str.maketrans({
+    "ё": "е", "ә": "а", "ғ": "г", "қ": "к", "ң": "н",
+    "ө": "о", "ұ": "у", "ү": "у", "һ": "х", "і": "и",
+})
+
+def tokenize(text: str) -> List[str]:
+    """Split text into normalised search tokens."""
+    return [t for t in _TOKEN_RE.findall((text or "").lower().translate(_FOLD)) if t != "_"]
+
+
+def _city_text(city: Optional[str]) -> str:
+    if not city:
+        return ""
+    return " ".join(city_aliases(city))
+
+
+class _TrieNode:
+    __slots__ = ("children", "terminal", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.terminal = False  # True if a term ends at this node
+        self.top: List[Tuple] = []  # sorted rank keys of the best docs below
+
+
+class SearchIndex:
+    """Inverted index + autocomplete trie over catalog documents."""
+
+    def __init__(self, suggest_limit: int = SUGGEST_LIMIT):
+        self.suggest_limit = suggest_limit
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.doc_terms: Dict[str, Dict[str, int]] = {}
+        self.sorted_terms: Dict[str, Tuple[str, ...]] = {}
+        self.doc_len: Dict[str, int] = {}
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.ranked: Dict[str, List[Tuple]] = {}
+        self.total_len = 0
+        self.rank_keys: Dict[str, Tuple] = {}
+        self.uni_docs: Dict[str, Set[str]] = {}
+        self.root = _TrieNode()
+        self._bulk = False  # build(): append to `ranked`, sort once at the end
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Document construction
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _documents_for(uni: Dict[str, Any]) -> List[Tuple[Dict[str, Any], Dict[str, int]]]:
+        city = uni.get("city")
+        city_text = _city_text(city)
+        docs = []
+
+        uni_terms: Dict[str, int] = {}
+        for token in tokenize(uni.get("name", "")) * TITLE_BOOST + tokenize(city_text):
+            uni_terms[token] = uni_terms.get(token, 0) + 1
+        docs.append(({
+            "id": uni["id"],
+            "kind": "university",
+            "title": uni.get("name"),
+            "subtitle": city,
+            "university_id": uni["id"],
+            "program_id": None,
+        }, uni_terms))
+
+        for prog in uni.get("programs", []):
+            terms: Dict[str, int] = {}
+            tokens = (
+                tokenize(prog.get("name", "")) * TITLE_BOOST
+                + tokenize(prog.get("degree", ""))
+                + tokenize(uni.get("name", ""))
+                + tokenize(city_text)
+            )
+            for token in tokens:
+                terms[token] = terms.get(token, 0) + 1
+            docs.append(({
+                "id": f"{uni['id']}-{prog['id']}",
+                "kind": "program",
+                "title": prog.get("name"),
+                "subtitle": f"{uni.get('name')}, {city}" if city else uni.get("name"),
+                "university_id": uni["id"],
+                "program_id": prog["id"],
+            }, terms))
+        return docs
+
+    @staticmethod
+    def _rank_key(doc: Dict[str, Any]) -> Tuple:
+        # Universities first, then alphabetical - a stable, query-independent
+        # order that lets trie nodes cache their best documents
+        return (0 if doc["kind"] == "university" else 1, (doc["title"] or "").lower(), doc["id"])
+
+    # ------------------------------------------------------------------
+    # Trie maintenance
+    # ------------------------------------------------------------------
+
+    def _trie_path(self, term: str, create: bool) -> List[_TrieNode]:
+        node = self.root
+        path = [node]
+        for ch in term:
+            child = node.children.get(ch)
+            if child is None:
+                if not create:
+                    return []
+                child = node.children[ch] = _TrieNode()
+            node = child
+            path.append(node)
+        return path
+
+    def _trie_add(self, term: str, rank_key: Tuple) -> None:
+        path = self._trie_path(term, create=True)
+        path[-1].terminal = True
+        for node in path:
+            top = node.top
+            if rank_key in top:
+                continue
+            if len(top) < self.suggest_limit or rank_key < top[-1]:
+                bisect.insort(top, rank_key)
+                del top[self.suggest_limit:]
+
+    def _trie_remove(self, term: str, rank_key: Tuple) -> None:
+        path = self._trie_path(term, create=False)
+        if not path:
+            return
+        if term not in self.postings:
+            path[-1].terminal = False
+        # Rebuild affected nodes bottom-up: a node's best docs are the best of
+        # its own term's postings and its children's cached lists
+        for depth in range(len(path) - 1, -1, -1):
+            node = path[depth]
+            if rank_key not in node.top:
+                break
+            candidates = []
+            if node.terminal:
+                prefix = term[:depth]
+                candidates.extend(self.rank_keys[d] for d in self.postings.get(prefix, {}))
+            for child in node.children.values():
+                candidates.extend(child.top)
+            node.top = heapq.nsmallest(self.suggest_limit, set(candidates))
+        # Drop branches that no longer lead to any term
+        for depth in range(len(path) - 1, 0, -1):
+            node = path[depth]
+            if node.terminal or node.children:
+                break
+            del path[depth - 1].children[term[depth - 1]]
+
+    # ------------------------------------------------------------------
+    # Document add/remove
+    # ------------------------------------------------------------------
+
+    def _add_doc(self, doc: Dict[str, Any], terms: Dict[str, int]) -> None:
+        doc_id = doc["id"]
+        rank_key = self._rank_key(doc)
+        self.docs[doc_id] = doc
+        self.doc_terms[doc_id] = terms
+        self.sorted_terms[doc_id] = tuple(sorted(terms))
+        self.rank_keys[doc_id] = rank_key
+        length = sum(terms.values())
+        self.doc_len[doc_id] = length
+        self.total_len += length
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+            ranked = self.ranked.setdefault(term, [])
+            if self._bulk:
+                ranked.append(rank_key)
+            else:
+                bisect.insort(ranked, rank_key)
+            self._trie_add(term, rank_key)
+
+    def _remove_doc(self, doc_id: str) -> None:
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        rank_key = self.rank_keys[doc_id]
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[term]
+            ranked = self.ranked.get(term)
+            if ranked is not None:
+                pos = bisect.bisect_left(ranked, rank_key)
+                if pos < len(ranked) and ranked[pos] == rank_key:
+                    del ranked[pos]
+                if not ranked:
+                    del self.ranked[term]
+            self._trie_remove(term, rank_key)
+        self.total_len -= self.doc_len.pop(doc_id, 0)
+        self.sorted_terms.pop(doc_id, None)
+        self.docs.pop(doc_id, None)
+        self.rank_keys.pop(doc_id, None)
+
+    def index_university(self, uni: Optional[Dict[str, Any]], uni_id: Optional[str] = None) -> None:
+        """(Re)index one university and its programs; None removes it."""
+        uni_id = uni["id"] if uni else uni_id
+        with self._lock:
+            for doc_id in self.uni_docs.pop(uni_id, set()):
+                self._remove_doc(doc_id)
+            if not uni:
+                return
+            doc_ids = set()
+            for doc, terms in self._documents_for(uni):
+                self._add_doc(doc, terms)
+                doc_ids.add(doc["id"])
+            self.uni_docs[uni_id] = doc_ids
+
+    def build(self, universities: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._bulk = True
+            try:
+                for uni in universities:
+                    self.index_university(uni)
+            finally:
+                self._bulk = False
+                for ranked in self.ranked.values():
+                    ranked.sort()
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Rank documents for a free-text query with Okapi BM25."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        with self._lock:
+            n_docs = len(self.docs)
+            if not n_docs:
+                return []
+            avg_len = self.total_len / n_docs
+            # Copy the postings (a fast C-level dict copy); scoring runs unlocked
+            postings = [self.postings[t].copy() for t in set(tokens) if t in self.postings]
+
+        # Reads below may race with a re-index: removed docs are skipped
+        doc_len = self.doc_len
+        rank_keys = self.rank_keys
+        scores: Dict[str, float] = {}
+        for posting in postings:
+            df = len(posting)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for doc_id, tf in posting.items():
+                length = doc_len.get(doc_id)
+                if length is None:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        best = heapq.nsmallest(limit, scores.items(), key=lambda kv: (-kv[1], rank_keys.get(kv[0], ())))
+
+        with self._lock:
+            return [
+                dict(self.docs[doc_id], score=round(score, 4))
+                for doc_id, score in best if doc_id in self.docs
+            ]
+
+    def autocomplete(self, query: str, limit: int = SUGGEST_LIMIT) -> List[Dict[str, Any]]:
+        """Suggest documents whose terms start with the last query token.
+
+        Earlier tokens must match whole terms. Single-token queries are served
+        straight from the trie node cache.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        limit = min(limit, self.suggest_limit)
+        *complete, prefix = tokens
+        with self._lock:
+            path = self._trie_path(prefix, create=False)
+            if not path:
+                return []
+            node = path[-1]
+
+            if not complete:
+                return [dict(self.docs[key[-1]]) for key in node.top[:limit]]
+
+            # Restrict to docs containing every complete token
+            ranked = [self.ranked.get(t) for t in set(complete)]
+            if not all(ranked):
+                return []
+
+            matches = self._matcher(complete, prefix)
+            hits = [key for key in node.top if matches(key[-1])]
+            if len(hits) >= limit or len(node.top) < self.suggest_limit:
+                # Either enough hits, or the cached list already holds every
+                # document under this prefix
+                return [dict(self.docs[key[-1]]) for key in hits[:limit]]
+
+            # Walk the rarest complete token's docs in suggestion order, a
+            # chunk at a time: set intersections with the other postings
+            # keep the per-candidate work in C. With few completions the
+            # prefix test is also a posting lookup; otherwise the matcher
+            # checks the (already filtered) chunk.
+            rarest = min(ranked, key=len)
+            others = [self.postings[t] for t in set(complete) if self.ranked[t] is not rarest]
+            prefix_terms = self._subtree_terms(node, prefix, PREFIX_MERGE_LIMIT)
+            completions = [self.postings[t] for t in prefix_terms] if prefix_terms is not None else None
+            found: List[str] = []
+            start, size = 0, SCAN_CHUNK
+            while start < min(len(rarest), AUTOCOMPLETE_MAX_SCAN):
+                chunk = list(map(_DOC_ID, rarest[start:start + size]))
+                start, size = start + size, size * 2
+                ids = chunk
+                for posting in others:
+                    ids = posting.keys() & ids
+                if completions is not None:
+                    keep = set()
+                    for posting in completions:
+                        keep |= posting.keys() & ids
+                else:
+                    keep = set(filter(matches, ids))
+                found.extend(filter(keep.__contains__, chunk))
+                if len(found) >= limit:
+                    break
+            return [dict(self.docs[doc_id]) for doc_id in found[:limit]]
+
+    @staticmethod
+    def _subtree_terms(node: _TrieNode, prefix: str, cap: int) -> Optional[List[str]]:
+        """Terms under a trie node, or None if there are more than `cap`."""
+        terms: List[str] = []
+        stack = [(node, prefix)]
+        while stack:
+            current, text = stack.pop()
+            if current.terminal:
+                terms.append(text)
+                if len(terms) > cap:
+                    return None
+            stack.extend((child, text + ch) for ch, child in current.children.items())
+        return terms
+
+    def _matcher(self, complete: List[str], prefix: str):
+        """Build a doc_id predicate: has every complete token and a prefix term."""
+        doc_terms = self.doc_terms
+        sorted_terms = self.sorted_terms
+        complete = list(set(complete))
+
+        def matches(doc_id: str) -> bool:
+            terms = doc_terms[doc_id]
+            for term in complete:
+                if term not in terms:
+                    return False
+            # Terms are sorted, so the first term >= prefix is the only
+            # candidate that can start with it
+            ordered = sorted_terms[doc_id]
+            pos = bisect.bisect_left(ordered, prefix)
+            return pos < len(ordered) and ordered[pos].startswith(prefix)
+
+        return matches
+
+
+_index: Optional[SearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def _on_catalog_change(uni_id: str) -> None:
+    if _index is not None:
+        _index.index_university(get_university(uni_id), uni_id=uni_id)
+
+
+def get_index() -> SearchIndex:
+    """Return the catalog index, building it on first use."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                index = SearchIndex()
+                index.build(list_universities())
+                _index = index
+                add_catalog_listener(_on_catalog_change)
+    return _index
+
+
+def search_catalog(query: str, limit: int = 10) -> List[Dict[str, Any]]:
+    return get_index().search(query, limit=limit)
+
+
+def autocomplete_catalog(query: str, limit: int = SUGGEST_LIMIT) -> List[Dict[str, Any]]:
+    return get_index().autocomplete(query, limit=limit)
@@ -0,0 +1,156 @@
+"""Single-flight: одинаковые одновременные вызовы LLM делят один запрос.
+
+Когда группа студентов с одинаковыми ответами квиза одновременно открывает
+/recommendations, каждый запрос шлёт в Groq тот же промпт. Кэш объяснений
+не помогает: ответа ещё нет, все промахиваются одновременно.
+SingleFlight по ключу (хэш промпта) пропускает к Groq первого вызывающего
+(ведущего), а остальные ждут его результат.
+
+ОШИБКИ: исключение ведущего получают все ожидающие.
+
+ОТМЕНА (async): общий вызов идёт в отдельной задаче, ожидающие ждут его
+через asyncio.shield - отмена одного из них не прерывает вызов для
+остальных. Если отменились все, общий вызов тоже отменяется.
+
+ДЕДЛАЙН: ожидающий ждёт не дольше своего бюджета запроса
+(resilience.remaining_budget), а без бюджета - не дольше max_wait для
+своего класса приоритета. Не дождался - TimeoutError, вызывающий берёт
+fallback; общий вызов продолжается для остальных.
+
+ПРИОРИТЕТ: класс llm_scheduler входит в ключ. Интерактивный запрос не
+присоединяется к фоновому вызову (который может минутами стоять в
+очереди лимитов) - он делит вызов только с запросами своего класса.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .llm_scheduler import current_priority
+from .resilience import remaining_budget
+
+# Сколько ждёт ожидающий без бюджета, если класса нет в max_wait
+FOLLOWER_WAIT = 60.0
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class _AsyncFlight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Объединяет одновременные вызовы с одинаковым ключом (sync и async)."""
+
+    def __init__(self, name: str, max_wait: Optional[Dict[str, float]] = None):
+        self.name = name
+        self.max_wait = max_wait or {}
+        self._lock = threading.Lock()
+        self._flights: Dict[Tuple[str, str], _Flight] = {}
+        self._async_flights: Dict[Tuple[int, str, str], _AsyncFlight] = {}
+        self.stats = {"calls": 0, "coalesced": 0, "timeouts": 0}
+
+    def _wait_limit(self, priority: str) -> float:
+        """Сколько ждать общий вызов: бюджет запроса, без него - max_wait класса."""
+        remaining = remaining_budget()
+        return self.max_wait.get(priority, FOLLOWER_WAIT) if remaining is None else remaining
+
+    def _timed_out(self) -> TimeoutError:
+        with self._lock:
+            self.stats["timeouts"] += 1
+        return TimeoutError(f"{self.name}: shared call did not finish within the caller's deadline")
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Вызвать fn() или дождаться результата уже идущего вызова с тем же ключом."""
+        priority = current_priority()
+        key = (priority, key)
+        with self._lock:
+            self.stats["calls"] += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            if not flight.done.wait(self._wait_limit(priority)):
+                raise self._timed_out()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Async вариант do(): общий вызов в отдельной задаче, ожидающие под shield."""
+        loop = asyncio.get_running_loop()
+        priority = current_priority()
+        flight_key = (id(loop), priority, key)
+        with self._lock:
+            self.stats["calls"] += 1
+            flight = self._async_flights.get(flight_key)
+            if flight is None:
+                flight = self._async_flights[flight_key] = _AsyncFlight(loop.create_task(fn()))
+                flight.task.add_done_callback(lambda _: self._forget(flight_key, flight))
+            else:
+                self.stats["coalesced"] += 1
+            flight.waiters += 1
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(flight.task), self._wait_limit(priority))
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if flight.task.done():
+                # Ошибка или отмена самого общего вызова (например, остановка event loop)
+                raise
+            self._leave(flight_key, flight)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise self._timed_out() from None
+
+    def _leave(self, flight_key: Tuple[int, str, str], flight: _AsyncFlight) -> None:
+        """Ожидающий ушёл; ушли все - общий вызов отменяется."""
+        with self._lock:
+            flight.waiters -= 1
+            abandoned = flight.waiters == 0
+            if abandoned:
+                # Новые вызывающие начнут свой вызов, а не получат отмену
+                self._drop(flight_key, flight)
+        if abandoned:
+            flight.task.cancel()
+
+    def _forget(self, flight_key: Tuple[int, str, str], flight: _AsyncFlight) -> None:
+        with self._lock:
+            self._drop(flight_key, flight)
+
+    def _drop(self, flight_key: Tuple[int, str, str], flight: _AsyncFlight) -> None:
+        """Убрать завершённый/брошенный вызов из таблицы (под lock)."""
+        if self._async_flights.get(flight_key) is flight:
+            del self._async_flights[flight_key]
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "in_flight": len(self._flights) + len(self._async_flights),
+            }
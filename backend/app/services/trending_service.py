@@ -0,0 +1,179 @@
+"""Streaming popularity counters for the "popular this week" panel.
+
+Events (favorites, comparison adds, roadmap creations, recommendation
+impressions) are folded into approximate counters whose memory does not
+grow with traffic.
+
+STRUCTURES:
+- CountMinSketch: fixed width x depth counter table. Estimates never
+  undercount; overcount is bounded by total_events * e / width.
+- SpaceSaving: keeps at most `capacity` candidate heavy hitters per bucket.
+  Any item whose true share exceeds 1/capacity is guaranteed to be kept.
+- TrendingWindow: a ring of time buckets (one sketch + one heavy-hitter
+  table each). Old buckets are recycled instead of decayed, so "this week"
+  is simply the sum of the live buckets.
+
+MEMORY:
+num_buckets * (depth * width counters + capacity entries) per item kind,
+independent of the number of events or distinct items.
+"""
+
+import hashlib
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+# How much each event type counts towards popularity
+EVENT_WEIGHTS = {
+    "favorite": 3,
+    "comparison": 2,
+    "roadmap": 4,
+    "impression": 1,
+}
+
+# One bucket per day, seven buckets = "this week"
+BUCKET_SECONDS = 24 * 60 * 60
+NUM_BUCKETS = 7
+SKETCH_WIDTH = 2048
+SKETCH_DEPTH = 4
+HEAVY_HITTERS_CAPACITY = 64
+
+
+class CountMinSketch:
+    """Fixed-size frequency estimator (never underestimates)."""
+
+    def __init__(self, width: int = SKETCH_WIDTH, depth: int = SKETCH_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.rows = [array("Q", bytes(8 * width)) for _ in range(depth)]
+
+    def _indexes(self, key: str) -> List[int]:
+        # Double hashing (h1 + i * h2) gives `depth` independent-enough rows
+        # from a single digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, key: str, count: int = 1) -> None:
+        for row, idx in zip(self.rows, self._indexes(key)):
+            row[idx] += count
+
+    def estimate(self, key: str) -> int:
+        return min(row[idx] for row, idx in zip(self.rows, self._indexes(key)))
+
+    def clear(self) -> None:
+        for row in self.rows:
+            for i in range(self.width):
+                row[i] = 0
+
+
+class SpaceSaving:
+    """Space-Saving heavy hitters: top items with bounded memory."""
+
+    def __init__(self, capacity: int = HEAVY_HITTERS_CAPACITY):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+
+    def add(self, key: str, count: int = 1) -> None:
+        if key in self.counts:
+            self.counts[key] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[key] = count
+        else:
+            # Replace the smallest candidate; the newcomer inherits its count
+            # as the error bound (classic Space-Saving)
+            victim = min(self.counts, key=self.counts.__getitem__)
+            floor = self.counts.pop(victim)
+            self.counts[key] = floor + count
+
+    def candidates(self) -> List[str]:
+        return list(self.counts)
+
+    def clear(self) -> None:
+        self.counts.clear()
+
+
+class TrendingWindow:
+    """Sliding window of time buckets, each with a sketch and heavy hitters."""
+
+    def __init__(
+        self,
+        bucket_seconds: int = BUCKET_SECONDS,
+        num_buckets: int = NUM_BUCKETS,
+        width: int = SKETCH_WIDTH,
+        depth: int = SKETCH_DEPTH,
+        capacity: int = HEAVY_HITTERS_CAPACITY,
+    ):
+        self.bucket_seconds = bucket_seconds
+        self.num_buckets = num_buckets
+        # Absolute bucket number each slot currently holds (-1 = never used)
+        self.epochs = [-1] * num_buckets
+        self.sketches = [CountMinSketch(width, depth) for _ in range(num_buckets)]
+        self.heavy = [SpaceSaving(capacity) for _ in range(num_buckets)]
+        self._lock = threading.Lock()
+
+    def _slot(self, now: float) -> int:
+        epoch = int(now // self.bucket_seconds)
+        slot = epoch % self.num_buckets
+        if self.epochs[slot] != epoch:
+            # Recycle a bucket that fell out of the window
+            self.sketches[slot].clear()
+            self.heavy[slot].clear()
+            self.epochs[slot] = epoch
+        return slot
+
+    def _live_slots(self, now: float) -> List[int]:
+        current = int(now // self.bucket_seconds)
+        oldest = current - self.num_buckets + 1
+        return [slot for slot, epoch in enumerate(self.epochs) if oldest <= epoch <= current]
+
+    def record(self, key: str, count: int = 1, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        with self._lock:
+            slot = self._slot(now)
+            self.sketches[slot].add(key, count)
+            self.heavy[slot].add(key, count)
+
+    def top(self, n: int = 10, now: Optional[float] = None) -> List[Tuple[str, int]]:
+        now = time.time() if now is None else now
+        with self._lock:
+            slots = self._live_slots(now)
+            candidates = set()
+            for slot in slots:
+                candidates.update(self.heavy[slot].candidates())
+            scored = [
+                (key, sum(self.sketches[slot].estimate(key) for slot in slots))
+                for key in candidates
+            ]
+        scored.sort(key=lambda kv: (-kv[1], kv[0]))
+        return scored[:n]
+
+
+# One window per item kind: programs ("uni-prog") and universities ("uni")
+_windows = {
+    "program": TrendingWindow(),
+    "university": TrendingWindow(),
+}
+
+
+def record_event(kind: str, item_id: str, event: str, now: Optional[float] = None) -> None:
+    """Count one event for an item. Unknown kinds/events are ignored."""
+    window = _windows.get(kind)
+    weight = EVENT_WEIGHTS.get(event)
+    if window is None or weight is None or not item_id:
+        return
+    window.record(item_id, weight, now=now)
+
+
+def top_trending(kind: str = "program", limit: int = 10, now: Optional[float] = None) -> List[Tuple[str, int]]:
+    """Return [(item_id, weighted_count)] for the current window, best first."""
+    window = _windows.get(kind)
+    if window is None:
+        return []
+    return window.top(limit, now=now)
+
+
+def window_days() -> float:
+    return BUCKET_SECONDS * NUM_BUCKETS / 86400
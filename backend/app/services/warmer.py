@@ -0,0 +1,233 @@
+"""Cache warmer: precompute explanations and roadmaps for common profiles.
+
+With a cold cache the first students of the day pay full LLM latency for
+every recommendation. The warmer scores popular profiles and explains
+their top-k programs ahead of time, so those requests hit explanation_cache.
+It also generates roadmap skeletons for the top WARMER_ROADMAP_TOP_K
+programs (no deadline window), which any start date can reuse.
+
+WHICH PROFILES:
+1. Recent requests: /recommendations records each canonical profile
+   (the four fields that feed scoring and the explanation facts); the most
+   frequent come first.
+2. A built-in grid of ENT / IELTS / budget / city buckets fills the rest.
+
+BUDGET:
+Each run makes at most WARMER_LLM_BUDGET LLM requests. Profiles whose
+explanations are already cached cost nothing, so repeated runs move on to
+new profiles.
+
+RUNNING:
+- In the app: start_warmer() from the FastAPI lifespan when WARMER_ENABLED,
+  once after WARMER_STARTUP_DELAY_SECONDS and then every
+  WARMER_INTERVAL_MINUTES.
+- Offline: python -m app.services.warmer --budget 500 [--profiles log.jsonl]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from itertools import product
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..config import (
+    EXPLANATION_STRATEGY,
+    WARMER_ENABLED,
+    WARMER_INTERVAL_MINUTES,
+    WARMER_LLM_BUDGET,
+    WARMER_MAX_PROFILES,
+    WARMER_STARTUP_DELAY_SECONDS,
+    WARMER_ROADMAP_TOP_K,
+    WARMER_TOP_K,
+)
+from .ai_service import explain_many, explanation_is_cached, generate_roadmap, roadmap_is_cached
+from .llm_scheduler import BACKGROUND, priority_scope
+from .logic_service import score_programs
+from .roadmap_skeleton import roadmap_signature
+from ..storage.memory import get_program, get_university
+
+# Built-in grid: typical quiz answers
+GRID_ENT = (130, 110, 90, 70)
+GRID_IELTS = (6.5, 0.0, 5.5, 7.5)
+GRID_BUDGET = (2500000, 1000000, 5000000, 0)
+GRID_CITIES = ("Любой", "Алматы", "Астана")
+
+# Bound on distinct profiles remembered from requests
+MAX_LOGGED_PROFILES = 5000
+
+_request_log: Counter = Counter()
+_log_lock = threading.Lock()
+
+
+def canonical_profile(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Only the fields that reach scoring and the explanation facts, normalised."""
+    return {
+        "entScore": int(profile.get("entScore") or 0),
+        "ieltsScore": float(profile.get("ieltsScore") or 0),
+        "budget": int(profile.get("budget") or 0),
+        "preferredCity": profile.get("preferredCity") or "Любой",
+    }
+
+
+def _profile_key(profile: Dict[str, Any]) -> Tuple:
+    p = canonical_profile(profile)
+    return (p["entScore"], p["ieltsScore"], p["budget"], p["preferredCity"])
+
+
+def record_profile(profile: Dict[str, Any]) -> None:
+    """Remember a requested profile so the warmer can prioritise it."""
+    key = _profile_key(profile)
+    with _log_lock:
+        _request_log[key] += 1
+        if len(_request_log) > MAX_LOGGED_PROFILES:
+            # Keep the most frequent half; rare profiles are not worth warming
+            kept = _request_log.most_common(MAX_LOGGED_PROFILES // 2)
+            _request_log.clear()
+            _request_log.update(dict(kept))
+
+
+def popular_profiles(limit: int) -> List[Dict[str, Any]]:
+    """Most frequently requested canonical profiles."""
+    with _log_lock:
+        top = _request_log.most_common(limit)
+    return [
+        {"entScore": ent, "ieltsScore": ielts, "budget": budget, "preferredCity": city}
+        for (ent, ielts, budget, city), _ in top
+    ]
+
+
+def profile_grid() -> List[Dict[str, Any]]:
+    """Built-in grid of common profiles, most typical first."""
+    return [
+        {"entScore": ent, "ieltsScore": ielts, "budget": budget, "preferredCity": city}
+        for ent, ielts, budget, city in product(GRID_ENT, GRID_IELTS, GRID_BUDGET, GRID_CITIES)
+    ]
+
+
+def candidate_profiles(limit: int = WARMER_MAX_PROFILES, extra: Iterable[Dict[str, Any]] = ()) -> List[Dict[str, Any]]:
+    """Profiles to warm: extra (e.g. from a file), recent requests, then the grid."""
+    profiles: List[Dict[str, Any]] = []
+    seen = set()
+    for profile in [*extra, *popular_profiles(limit), *profile_grid()]:
+        key = _profile_key(profile)
+        if key in seen:
+            continue
+        seen.add(key)
+        profiles.append(canonical_profile(profile))
+        if len(profiles) >= limit:
+            break
+    return profiles
+
+
+def warm(
+    profiles: Iterable[Dict[str, Any]],
+    top_k: int = WARMER_TOP_K,
+    llm_budget: int = WARMER_LLM_BUDGET,
+    dry_run: bool = False,
+    roadmap_top_k: int = WARMER_ROADMAP_TOP_K,
+) -> Dict[str, Any]:
+    """
+    Explain the top-k programs of each profile until the LLM budget runs out.
+
+    Requests are counted per uncached program (one per batch with
+    EXPLANATION_STRATEGY="batch") plus one per uncached roadmap skeleton.
+    dry_run only counts what would be sent.
+
+    Returns:
+        Run statistics: profiles, explained, already_cached, roadmaps,
+        llm_requests, budget_exhausted
+    """
+    stats = {
+        "profiles": 0, "explained": 0, "already_cached": 0, "roadmaps": 0,
+        "llm_requests": 0, "budget_exhausted": False,
+    }
+    warmed_roadmaps = set()
+    for profile in profiles:
+        ranked = score_programs(profile)[:max(top_k, roadmap_top_k)]
+        facts_list = [facts for _, facts in ranked[:top_k]]
+        missing = [facts for facts in facts_list if not explanation_is_cached(facts)]
+        stats["already_cached"] += len(facts_list) - len(missing)
+
+        roadmaps = []
+        for candidate, _ in ranked[:roadmap_top_k]:
+            uni = get_university(candidate["university_id"]) or {}
+            program = get_program(candidate["university_id"], candidate["program_id"]) or {}
+            signature = roadmap_signature(profile, uni, program, datetime.utcnow(), None)
+            key = json.dumps(signature, sort_keys=True)
+            if key not in warmed_roadmaps and not roadmap_is_cached(signature):
+                warmed_roadmaps.add(key)
+                roadmaps.append({"user_profile": profile, "university": uni, "program": program})
+
+        cost = (1 if EXPLANATION_STRATEGY == "batch" else len(missing)) if missing else 0
+        cost += len(roadmaps)
+        if stats["llm_requests"] + cost > llm_budget:
+            stats["budget_exhausted"] = True
+            break
+        if not dry_run:
+            # Lowest LLM priority: live requests go first under the rate limits
+            with priority_scope(BACKGROUND):
+                if missing:
+                    explain_many(missing)
+                for context in roadmaps:
+                    generate_roadmap(context)
+        stats["llm_requests"] += cost
+        stats["explained"] += len(missing)
+        stats["roadmaps"] += len(roadmaps)
+        stats["profiles"] += 1
+    return stats
+
+
+async def _run_scheduled() -> None:
+    await asyncio.sleep(WARMER_STARTUP_DELAY_SECONDS)
+    while True:
+        try:
+            # Explanations are sync; keep the event loop free for requests
+            stats = await asyncio.to_thread(warm, candidate_profiles())
+            print(f"[Warmer] {stats}", file=sys.stderr)
+        except Exception as e:
+            print(f"[Warmer] Run failed: {type(e).__name__}: {e}", file=sys.stderr)
+        await asyncio.sleep(WARMER_INTERVAL_MINUTES * 60)
+
+
+def start_warmer() -> Optional[asyncio.Task]:
+    """Start the scheduled warmer (called from the app lifespan); None if disabled."""
+    if not WARMER_ENABLED:
+        return None
+    return asyncio.create_task(_run_scheduled())
+
+
+def _load_profiles(path: str) -> List[Dict[str, Any]]:
+    """Profiles from a JSON-lines file: a profile per line, or {"profile": {...}}."""
+    profiles = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            profiles.append(record.get("profile", record))
+    return profiles
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Precompute explanations for popular profiles")
+    parser.add_argument("--budget", type=int, default=WARMER_LLM_BUDGET, help="max LLM requests")
+    parser.add_argument("--top-k", type=int, default=WARMER_TOP_K)
+    parser.add_argument("--roadmap-top-k", type=int, default=WARMER_ROADMAP_TOP_K, help="roadmaps per profile (0 = none)")
+    parser.add_argument("--max-profiles", type=int, default=WARMER_MAX_PROFILES)
+    parser.add_argument("--profiles", help="JSON-lines file of profiles (e.g. exported request logs)")
+    parser.add_argument("--dry-run", action="store_true", help="only count the LLM requests needed")
+    args = parser.parse_args(argv)
+
+    extra = _load_profiles(args.profiles) if args.profiles else []
+    profiles = candidate_profiles(args.max_profiles, extra)
+    stats = warm(profiles, top_k=args.top_k, llm_budget=args.budget, dry_run=args.dry_run, roadmap_top_k=args.roadmap_top_k)
+    print(json.dumps(stats, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
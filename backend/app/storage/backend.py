@@ -0,0 +1,57 @@
+"""Storage backend selection for the mutable tables (STORAGE_BACKEND).
+
+- memory: plain dicts, lost on restart (default)
+- sqlite: SQLiteTable views over one SQLiteStore at STORAGE_PATH
+
+Modules create their tables once at import with open_table(name) and use
+them like dicts; see sqlite_store for the write-back rule.
+"""
+
+import atexit
+import threading
+from typing import Any, Dict, MutableMapping, Optional
+
+from ..config import STORAGE_BACKEND, STORAGE_BATCH_SIZE, STORAGE_FLUSH_INTERVAL_MS, STORAGE_PATH
+from .sqlite_store import SQLiteStore
+
+BACKENDS = ("memory", "sqlite")
+
+_store: Optional[SQLiteStore] = None
+_lock = threading.Lock()
+
+
+def _sqlite_store() -> SQLiteStore:
+    global _store
+    with _lock:
+        if _store is None:
+            _store = SQLiteStore(STORAGE_PATH, STORAGE_BATCH_SIZE, STORAGE_FLUSH_INTERVAL_MS / 1000)
+            # CLI tools exit without the app lifespan; do not drop buffered writes
+            atexit.register(_store.close)
+        return _store
+
+
+def open_table(name: str) -> MutableMapping[str, Any]:
+    """A named table on the configured backend."""
+    if STORAGE_BACKEND not in BACKENDS:
+        raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+    if STORAGE_BACKEND == "sqlite":
+        return _sqlite_store().table(name)
+    return {}
+
+
+def flush_storage() -> None:
+    if _store is not None:
+        _store.flush()
+
+
+def close_storage() -> None:
+    """Commit buffered writes and close connections (app shutdown)."""
+    if _store is not None:
+        _store.close()
+
+
+def storage_metrics() -> Dict[str, Any]:
+    metrics: Dict[str, Any] = {"backend": STORAGE_BACKEND}
+    if _store is not None:
+        metrics.update(_store.metrics())
+    return metrics
@@ -4,8 +4,9 @@ This module provides in-memory data storage for the UniSmart platform.
 
 STORAGE STRUCTURES:
 - memory_store: Conversation memory per user (for AI navigator)
-- users_db: User accounts and profiles (indexed by email)
+- users: User accounts and profiles (UserRepository: id -> record, email -> id)
 - universities: Static dataset of universities and programs
+- catalog_listeners: Callbacks told which university changed (search index)
 
 DATA STRUCTURE:
 Each university has:
@@ -33,16 +34,25 @@ WHY IN-MEMORY:
 - Performance: Instant access for small datasets
 - Migration: Can replace with DB without changing business logic
 
-For production, replace functions with database queries while maintaining
-the same interface.
+PERSISTENCE:
+memory_store, the users indexes, roadmap_store and applications_store come from
+backend.open_table: dicts by default, SQLite tables with
+STORAGE_BACKEND=sqlite. Functions write changed values back with
+table[key] = value so both backends behave the same. The university
+catalog is static data and always stays in memory.
 """
 
-memory_store = {}
-users_db = {}
-# Roadmap storage per user (in-memory)
-roadmap_store = {}
-# Applications storage per user (in-memory)
-applications_store = {}
+from .backend import open_table
+from .users import UserRepository
+
+memory_store = open_table("memory")
+users = UserRepository(open_table("users_by_id"), open_table("user_emails"))
+# Roadmap storage per user
+roadmap_store = open_table("roadmaps")
+# Applications storage per user
+applications_store = open_table("applications")
+# Callbacks notified with a university id whenever the catalog changes
+catalog_listeners = []
 
 # Dataset of universities and programs in Kazakhstan
 # This data is used by logic_service to compute match scores
@@ -122,9 +132,7 @@ def get_user_memory(user_id: str):
 
 
 def save_to_memory(user_id: str, data: str):
-    if user_id not in memory_store:
-        memory_store[user_id] = []
-    memory_store[user_id].append(data)
+    memory_store[user_id] = memory_store.get(user_id, []) + [data]
 
 
 def list_universities():
@@ -142,16 +150,106 @@ def get_program(uni_id: str, program_id: str):
     return next((p for p in uni.get("programs", []) if p["id"] == program_id), None)
 
 
-def add_user(user: dict):
-    users_db[user["id"]] = user
+def add_catalog_listener(callback):
+    """Register callback(university_id) to be called after catalog changes."""
+    catalog_listeners.append(callback)
+
+
+def _notify_catalog_change(uni_id: str):
+    for callback in list(catalog_listeners):
+        callback(uni_id)
+
+
+def upsert_university(university: dict):
+    """Add a university or replace an existing one (programs included)."""
+    for i, uni in enumerate(universities):
+        if uni["id"] == university["id"]:
+            universities[i] = university
+            break
+    else:
+        universities.append(university)
+    _notify_catalog_change(university["id"])
+
+
+def remove_university(uni_id: str) -> bool:
+    for i, uni in enumerate(universities):
+        if uni["id"] == uni_id:
+            del universities[i]
+            _notify_catalog_change(uni_id)
+            return True
+    return False
+
+
+def upsert_program(uni_id: str, program: dict) -> bool:
+    """Add a program to a university or replace the one with the same id."""
+    uni = get_university(uni_id)
+    if not uni:
+        return False
+    programs = uni.setdefault("programs", [])
+    for i, prog in enumerate(programs):
+        if prog["id"] == program["id"]:
+            programs[i] = program
+            break
+    else:
+        programs.append(program)
+    _notify_catalog_change(uni_id)
+    return True
+
+
+def remove_program(uni_id: str, program_id: str) -> bool:
+    uni = get_university(uni_id)
+    if not uni:
+        return False
+    programs = uni.get("programs", [])
+    for i, prog in enumerate(programs):
+        if prog["id"] == program_id:
+            del programs[i]
+            _notify_catalog_change(uni_id)
+            return True
+    return False
+
+
+def describe_item(item_id: str):
+    """Resolve a "uni_id" or "uni_id-program_id" item id to display data."""
+    uni = get_university(item_id)
+    if uni:
+        return {
+            "id": item_id,
+            "kind": "university",
+            "university_id": uni["id"],
+            "program_id": None,
+            "university_name": uni.get("name"),
+            "program_name": None,
+        }
+
+    if "-" not in item_id:
+        return None
+    uni_id, prog_id = item_id.split("-", 1)
+    uni = get_university(uni_id)
+    prog = get_program(uni_id, prog_id)
+    if not uni or not prog:
+        return None
+    return {
+        "id": item_id,
+        "kind": "program",
+        "university_id": uni_id,
+        "program_id": prog_id,
+        "university_name": uni.get("name"),
+        "program_name": prog.get("name"),
+    }
+
+
+def add_user(user: dict) -> bool:
+    """Store a new user; False if the email is already registered."""
+    return users.add(user)
 
 
 def get_user(user_id: str):
-    return users_db.get(user_id)
+    return users.get(user_id)
 
 
 def save_roadmap(user_id: str, roadmap: list):
-    """Save generated roadmap for a user (in-memory)."""
+    """Save generated roadmap for a user."""
     roadmap_store[user_id] = roadmap
 
 
@@ -160,7 +258,7 @@ def get_roadmap(user_id: str):
 
 
 def save_applications(user_id: str, applications: list):
-    """Save applications list for a user (in-memory)."""
+    """Save applications list for a user."""
     applications_store[user_id] = applications
 
 
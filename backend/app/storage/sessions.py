@@ -0,0 +1,270 @@
+"""Session store: login tokens with expiry and a per-user cap.
+
+EXPIRY:
+A session ends at whichever comes first:
+- absolute TTL: created + SESSION_TTL_HOURS, however active it is
+- idle TTL: last use + SESSION_IDLE_TTL_HOURS
+
+verify() slides the idle window forward (capped by the absolute TTL).
+The new last-use time is written back at most once per
+SESSION_RENEW_SECONDS, so busy users do not turn every authenticated
+request into a storage write. The idle window is exact to that interval.
+
+SWEEPING:
+Expiry times sit in a min-heap of (expires_at, token). A background
+thread pops due entries every SESSION_SWEEP_INTERVAL_SECONDS. A renewal
+pushes a fresh entry instead of moving the old one; stale entries are
+recognised on pop and skipped, and the heap is rebuilt when they
+outnumber live sessions. verify() also checks expiry itself, so a token
+is never valid past its deadline, whenever the sweeper runs.
+
+CAP:
+A user keeps at most SESSION_MAX_PER_USER sessions; logging in once more
+ends their oldest session.
+
+Session data lives in a backend.open_table table (memory or SQLite);
+the heap and the per-user index are rebuilt from it on start.
+
+LOCKING:
+The lock guards the in-memory indexes only. Table reads and writes (a
+SQLite round-trip on that backend) happen outside it, so verifying one
+token does not serialise every other request. A renewal written back
+after a concurrent revoke is deleted again by the recheck that follows
+it.
+"""
+
+import heapq
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, MutableMapping, Optional, Tuple
+
+# Approximate bytes per index entry (uuid4 tokens), for metrics() without walking the indexes
+_TOKEN = "x" * 36
+_LIVE_ENTRY_BYTES = sys.getsizeof(_TOKEN) + sys.getsizeof((0, 0.0, 0.0)) + 2 * sys.getsizeof(0.0)
+_USER_ENTRY_BYTES = sys.getsizeof(OrderedDict.fromkeys([_TOKEN]))
+_HEAP_ENTRY_BYTES = sys.getsizeof((0.0, ""))
+
+
+class SessionStore:
+    """Tokens with absolute/idle TTLs, a per-user cap and a background sweeper."""
+
+    def __init__(
+        self,
+        table: MutableMapping[str, Any],
+        absolute_ttl: float,
+        idle_ttl: float,
+        max_per_user: int,
+        sweep_interval: float = 60.0,
+        renew_every: float = 60.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self._table = table
+        self.absolute_ttl = absolute_ttl
+        self.idle_ttl = idle_ttl
+        self.max_per_user = max(1, max_per_user)
+        self.sweep_interval = sweep_interval
+        self.renew_every = renew_every
+        self._clock = clock
+        self._lock = threading.Lock()
+        # token -> (user_id, created, last_seen): everything expiry needs, without reading the table
+        self._live: Dict[str, Tuple[str, float, float]] = {}
+        # user_id -> tokens, oldest first
+        self._by_user: Dict[str, "OrderedDict[str, None]"] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._wake = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        self.stats = {"created": 0, "expired": 0, "evicted": 0, "revoked": 0, "renewed": 0}
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Index (caller holds the lock)
+    # ------------------------------------------------------------------
+
+    def _expires_at(self, created: float, last_seen: float) -> float:
+        return min(created + self.absolute_ttl, last_seen + self.idle_ttl)
+
+    def _index(self, token: str, user_id: str, created: float, last_seen: float) -> None:
+        self._live[token] = (user_id, created, last_seen)
+        self._by_user.setdefault(user_id, OrderedDict())[token] = None
+        heapq.heappush(self._heap, (self._expires_at(created, last_seen), token))
+
+    def _remove(self, token: str, reason: str) -> str:
+        """Drop a token from the indexes; the caller deletes its row after the lock."""
+        user_id, _, _ = self._live.pop(token)
+        tokens = self._by_user.get(user_id)
+        if tokens is not None:
+            tokens.pop(token, None)
+            if not tokens:
+                del self._by_user[user_id]
+        self.stats[reason] += 1
+        return token
+
+    def _drop_rows(self, tokens: Iterable[str]) -> None:
+        """Delete removed sessions from the table (called without the lock)."""
+        for token in tokens:
+            self._table.pop(token, None)
+
+    def _load(self) -> None:
+        """Rebuild the in-memory indexes from sessions already in the table."""
+        now = self._clock()
+        rows = sorted(self._table.items(), key=lambda item: _timestamp(item[1], "created"))
+        dropped = []
+        with self._lock:
+            for token, data in rows:
+                created = _timestamp(data, "created")
+                last_seen = data.get("last_seen", created)
+                if self._expires_at(created, last_seen) <= now:
+                    dropped.append(token)
+                    continue
+                self._index(token, data["user_id"], created, last_seen)
+                tokens = self._by_user[data["user_id"]]
+                if len(tokens) > self.max_per_user:
+                    dropped.append(self._remove(next(iter(tokens)), "evicted"))
+        self._drop_rows(dropped)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def create(self, token: str, user_id: str, email: str) -> None:
+        """Start a session; the user's oldest session ends if they are at the cap."""
+        now = self._clock()
+        # Written before it is indexed: an indexed token always has its row
+        self._table[token] = {
+            "user_id": user_id,
+            "email": email,
+            "created_at": datetime.fromtimestamp(now).isoformat(),
+            "created": now,
+            "last_seen": now,
+        }
+        evicted = []
+        with self._lock:
+            tokens = self._by_user.get(user_id)
+            while tokens and len(tokens) >= self.max_per_user:
+                evicted.append(self._remove(next(iter(tokens)), "evicted"))
+                tokens = self._by_user.get(user_id)
+            self._index(token, user_id, now, now)
+            self.stats["created"] += 1
+            if self._sweeper is None:
+                self._start_sweeper()
+        self._drop_rows(evicted)
+
+    def verify(self, token: str) -> Optional[Dict[str, Any]]:
+        """Session data for a live token (renewing its idle window), else None."""
+        now = self._clock()
+        with self._lock:
+            entry = self._live.get(token)
+            if entry is None:
+                return None
+            user_id, created, last_seen = entry
+            if self._expires_at(created, last_seen) <= now:
+                self._remove(token, "expired")
+                expired = True
+            else:
+                expired = False
+        if expired:
+            self._drop_rows([token])
+            return None
+
+        data = self._table.get(token)
+        with self._lock:
+            entry = self._live.get(token)
+            if entry is None:
+                # Revoked or expired while we read the row
+                return None
+            if data is None:
+                # Removed from the table behind our back
+                self._remove(token, "revoked")
+                return None
+            # Only the first verify past the interval renews; the rest see its last_seen
+            renew = entry[2] == last_seen and now - last_seen >= self.renew_every
+            if renew:
+                self._live[token] = (user_id, created, now)
+                heapq.heappush(self._heap, (self._expires_at(created, now), token))
+                self.stats["renewed"] += 1
+        if renew:
+            data["last_seen"] = now
+            self._table[token] = data
+            with self._lock:
+                revoked = token not in self._live
+            if revoked:
+                self._drop_rows([token])
+        return dict(data)
+
+    def revoke(self, token: str) -> bool:
+        with self._lock:
+            if token not in self._live:
+                return False
+            self._remove(token, "revoked")
+        self._drop_rows([token])
+        return True
+
+    def sweep(self) -> int:
+        """Remove every session past its deadline; returns how many."""
+        now = self._clock()
+        removed = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, token = heapq.heappop(self._heap)
+                entry = self._live.get(token)
+                # Stale entry: session already gone, or renewed with a later deadline
+                if entry is None or self._expires_at(entry[1], entry[2]) > now:
+                    continue
+                removed.append(self._remove(token, "expired"))
+            if len(self._heap) > 2 * len(self._live) + 64:
+                self._heap = [(self._expires_at(c, s), t) for t, (_, c, s) in self._live.items()]
+                heapq.heapify(self._heap)
+        self._drop_rows(removed)
+        return len(removed)
+
+    def _start_sweeper(self) -> None:
+        """Background sweep every sweep_interval (caller holds the lock)."""
+        self._wake = threading.Event()
+        self._sweeper = threading.Thread(target=self._sweep_loop, args=(self._wake,), name="session-sweep", daemon=True)
+        self._sweeper.start()
+
+    def _sweep_loop(self, wake: threading.Event) -> None:
+        while not wake.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"[Sessions] Sweep failed: {type(e).__name__}: {e}", file=sys.stderr)
+
+    def stop(self) -> None:
+        """Stop the sweeper thread (it restarts with the next new session)."""
+        with self._lock:
+            sweeper, self._sweeper = self._sweeper, None
+            self._wake.set()
+        if sweeper is not None:
+            sweeper.join()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            live = len(self._live)
+            return {
+                **self.stats,
+                "live": live,
+                "users": len(self._by_user),
+                "heap_entries": len(self._heap),
+                "index_bytes": self._index_bytes(),
+            }
+
+    def _index_bytes(self) -> int:
+        """Approximate memory held by the in-process indexes (caller holds the lock).
+
+        Estimated from the entry counts with typical entry sizes, so it
+        costs the same however many sessions are live.
+        """
+        size = sys.getsizeof(self._live) + sys.getsizeof(self._by_user) + sys.getsizeof(self._heap)
+        size += len(self._live) * _LIVE_ENTRY_BYTES + len(self._by_user) * _USER_ENTRY_BYTES
+        return size + len(self._heap) * _HEAP_ENTRY_BYTES
+
+
+def _timestamp(data: Dict[str, Any], key: str) -> float:
+    """Epoch seconds of a stored session field; older rows only have created_at (ISO)."""
+    if key in data:
+        return data[key]
+    return datetime.fromisoformat(data["created_at"]).timestamp()
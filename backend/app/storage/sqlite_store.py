@@ -0,0 +1,253 @@
+"""SQLite persistence for the mutable storage tables (users, sessions, roadmaps...).
+
+Each table (see backend.open_table) is a dict-like view over one namespace
+of a single key/value table: JSON values keyed by (namespace, key). Code
+written against plain dicts keeps working, as long as it writes a changed
+value back (table[key] = value) instead of mutating what it read.
+
+CONNECTIONS:
+One connection per thread (threading.local), opened lazily. WAL mode lets
+those readers run while a batch is being committed. Every statement is a
+module constant, so sqlite3's per-connection statement cache compiles it
+once and reuses the prepared statement.
+
+BATCHED WRITES:
+Writes land in a pending buffer (last write per key wins) and are
+committed in one transaction when STORAGE_BATCH_SIZE keys are pending, or
+by a background flusher every STORAGE_FLUSH_INTERVAL_MS. Reads check the
+buffer first, so a write is visible immediately; only a crash inside the
+flush interval can lose it. Batch size 1 writes through.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS kv ("
+    "ns TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+    "PRIMARY KEY (ns, key)) WITHOUT ROWID"
+)
+_SELECT = "SELECT value FROM kv WHERE ns = ? AND key = ?"
+_SELECT_NS = "SELECT key, value FROM kv WHERE ns = ?"
+_UPSERT = "INSERT INTO kv (ns, key, value) VALUES (?, ?, ?) ON CONFLICT (ns, key) DO UPDATE SET value = excluded.value"
+_DELETE = "DELETE FROM kv WHERE ns = ? AND key = ?"
+
+# Pending value that marks a deleted key
+_DELETED = None
+
+
+class SQLiteStore:
+    """Key/value store on one SQLite file: per-thread connections, batched commits."""
+
+    def __init__(self, path: str, batch_size: int = 64, flush_interval: float = 0.05):
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()        # guards the buffers and the connection list
+        self._flush_lock = threading.Lock()  # one committing writer at a time
+        # (ns, key) -> JSON text or _DELETED
+        self._pending: Dict[Tuple[str, str], Optional[str]] = {}
+        # Batch being committed: still visible to readers until the commit lands
+        self._flushing: Dict[Tuple[str, str], Optional[str]] = {}
+        self._wake = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self.stats = {"reads": 0, "writes": 0, "coalesced": 0, "flushes": 0, "flushed_rows": 0}
+        conn = self._conn()
+        conn.execute(_SCHEMA)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # check_same_thread=False only so close() can close every thread's connection
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _buffered(self, item: Tuple[str, str]) -> Tuple[bool, Optional[str]]:
+        """(found, value) from the write buffers (caller holds the lock)."""
+        for layer in (self._pending, self._flushing):
+            if item in layer:
+                return True, layer[item]
+        return False, None
+
+    def get(self, ns: str, key: str) -> Optional[str]:
+        """Stored JSON text for the key, or None."""
+        with self._lock:
+            self.stats["reads"] += 1
+            found, value = self._buffered((ns, key))
+        if found:
+            return value
+        row = self._conn().execute(_SELECT, (ns, key)).fetchone()
+        return row[0] if row else None
+
+    def items(self, ns: str) -> List[Tuple[str, str]]:
+        """All (key, JSON text) pairs of a namespace, buffered writes included.
+
+        The buffers are copied before the SELECT: a batch committed while
+        the SELECT runs is then still in the copy, so no write is missed.
+        """
+        with self._lock:
+            self.stats["reads"] += 1
+            buffered = [
+                (key, value)
+                for layer in (self._flushing, self._pending)
+                for (item_ns, key), value in layer.items()
+                if item_ns == ns
+            ]
+        rows = dict(self._conn().execute(_SELECT_NS, (ns,)).fetchall())
+        for key, value in buffered:
+            if value is _DELETED:
+                rows.pop(key, None)
+            else:
+                rows[key] = value
+        return list(rows.items())
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def put(self, ns: str, key: str, value: Optional[str]) -> None:
+        """Buffer a write (value None deletes the key)."""
+        with self._lock:
+            self.stats["writes"] += 1
+            if (ns, key) in self._pending:
+                self.stats["coalesced"] += 1
+            self._pending[(ns, key)] = value
+            full = len(self._pending) >= self.batch_size
+            if not full and self._flusher is None:
+                self._start_flusher()
+        if full:
+            self.flush()
+
+    def delete(self, ns: str, key: str) -> None:
+        self.put(ns, key, _DELETED)
+
+    def flush(self) -> None:
+        """Commit all buffered writes in one transaction."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                self._flushing, self._pending = self._pending, {}
+                batch = self._flushing
+            upserts = [(ns, key, value) for (ns, key), value in batch.items() if value is not _DELETED]
+            deletes = [(ns, key) for (ns, key), value in batch.items() if value is _DELETED]
+            conn = self._conn()
+            try:
+                with conn:
+                    if upserts:
+                        conn.executemany(_UPSERT, upserts)
+                    if deletes:
+                        conn.executemany(_DELETE, deletes)
+            except Exception:
+                # Put the batch back under newer writes so nothing is lost
+                with self._lock:
+                    self._pending = {**batch, **self._pending}
+                    self._flushing = {}
+                raise
+            with self._lock:
+                self._flushing = {}
+                self.stats["flushes"] += 1
+                self.stats["flushed_rows"] += len(batch)
+
+    def _start_flusher(self) -> None:
+        """Background thread flushing every flush_interval (caller holds the lock)."""
+        self._wake = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, args=(self._wake,), name="storage-flush", daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self, wake: threading.Event) -> None:
+        while not wake.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[Storage] Flush failed, will retry: {type(e).__name__}: {e}", file=sys.stderr)
+
+    def close(self) -> None:
+        """Flush pending writes, stop the flusher and close every connection.
+
+        The store stays usable: later calls reopen connections lazily.
+        """
+        with self._lock:
+            flusher, self._flusher = self._flusher, None
+            self._wake.set()
+        if flusher is not None:
+            flusher.join()
+        self.flush()
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def table(self, ns: str) -> "SQLiteTable":
+        return SQLiteTable(self, ns)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "pending": len(self._pending),
+                "connections": len(self._connections),
+            }
+
+
+class SQLiteTable(MutableMapping):
+    """Dict-like namespace of a SQLiteStore; values are stored as JSON.
+
+    Reads return fresh copies: mutating one does not change the table
+    until it is assigned back.
+    """
+
+    def __init__(self, store: SQLiteStore, ns: str):
+        self.store = store
+        self.ns = ns
+
+    def __getitem__(self, key: str) -> Any:
+        raw = self.store.get(self.ns, key)
+        if raw is None:
+            raise KeyError(key)
+        return json.loads(raw)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.store.put(self.ns, key, json.dumps(value, ensure_ascii=False, separators=(",", ":")))
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self.store.delete(self.ns, key)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self.store.get(self.ns, key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([key for key, _ in self.store.items(self.ns)])
+
+    def __len__(self) -> int:
+        return len(self.store.items(self.ns))
+
+    def items(self) -> List[Tuple[str, Any]]:  # type: ignore[override]
+        """All (key, value) pairs in one query (not a live view)."""
+        return [(key, json.loads(raw)) for key, raw in self.store.items(self.ns)]
+
+    def values(self) -> List[Any]:  # type: ignore[override]
+        return [value for _, value in self.items()]
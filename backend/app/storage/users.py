@@ -0,0 +1,71 @@
+"""User repository: O(1) lookups by id and by email.
+
+INDEXES:
+- records: user id -> user record (primary)
+- emails:  email -> user id (secondary, unique)
+
+Both are tables from backend.open_table, so they live in memory or in
+SQLite together. Every change goes through add/update under one lock,
+which keeps the two indexes consistent: an email always points at a
+record that has that email, and no two records share one.
+"""
+
+import copy
+import threading
+from typing import Any, Callable, Dict, List, MutableMapping, Optional
+
+
+class UserRepository:
+    """Users indexed by id, with a unique email index."""
+
+    def __init__(self, records: MutableMapping[str, Any], emails: MutableMapping[str, Any]):
+        self._records = records
+        self._emails = emails
+        self._lock = threading.Lock()
+
+    def add(self, user: Dict[str, Any]) -> bool:
+        """Store a new user; False if the email is already registered."""
+        with self._lock:
+            if user["email"] in self._emails:
+                return False
+            self._records[user["id"]] = user
+            self._emails[user["email"]] = user["id"]
+            return True
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return self._records.get(user_id)
+
+    def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        user_id = self._emails.get(email)
+        return self._records.get(user_id) if user_id is not None else None
+
+    def update(self, user_id: str, change: Callable[[Dict[str, Any]], None]) -> bool:
+        """Apply change(record) and store the result; False if there is no such user.
+
+        The read-modify-write runs under the lock, so concurrent updates of
+        one user are not lost. An email change moves the email index entry;
+        a change to an email that belongs to someone else raises ValueError.
+        """
+        with self._lock:
+            stored = self._records.get(user_id)
+            if stored is None:
+                return False
+            # Work on a copy so a rejected change leaves the stored record untouched
+            user = copy.deepcopy(stored)
+            old_email = user["email"]
+            change(user)
+            new_email = user["email"]
+            if new_email != old_email:
+                if new_email in self._emails:
+                    raise ValueError(f"Email already registered: {new_email}")
+                self._emails[new_email] = user_id
+                del self._emails[old_email]
+            self._records[user_id] = user
+            return True
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Every user record (one query on SQLite; not a live view)."""
+        return list(self._records.values())
+
+    def __len__(self) -> int:
+        return len(self._records)
@@ -0,0 +1,62 @@
+"""Shared test fixtures: isolated AI caches, fake Groq calls and sample facts"""
+
+import inspect
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import ai_service
+from app.services.content_cache import ContentCache
+
+
+@pytest.fixture
+def fresh_caches(monkeypatch):
+    """Empty in-memory explanation and roadmap caches, exact explanation mode."""
+    caches = SimpleNamespace(explanation=ContentCache("t"), roadmap=ContentCache("r"))
+    monkeypatch.setattr(ai_service, "explanation_cache", caches.explanation)
+    monkeypatch.setattr(ai_service, "roadmap_cache", caches.roadmap)
+    monkeypatch.setattr(ai_service, "EXPLANATION_MODE", "exact")
+    return caches
+
+
+@pytest.fixture
+def fake_groq(monkeypatch, fresh_caches):
+    """Replace the sync and async Groq calls with reply(system_prompt, user_message, max_tokens).
+
+    reply may return text, None (no answer) or an awaitable of either; the
+    sync call does not accept awaitables. Returns the list of
+    (system_prompt, user_message, max_tokens) calls.
+    """
+    calls = []
+
+    def install(reply):
+        def call(system_prompt, user_message, max_tokens=1000):
+            calls.append((system_prompt, user_message, max_tokens))
+            return reply(system_prompt, user_message, max_tokens)
+
+        async def acall(system_prompt, user_message, max_tokens=1000):
+            calls.append((system_prompt, user_message, max_tokens))
+            result = reply(system_prompt, user_message, max_tokens)
+            return await result if inspect.isawaitable(result) else result
+
+        monkeypatch.setattr(ai_service, "_call_groq_api", call)
+        monkeypatch.setattr(ai_service, "_acall_groq_api", acall)
+        return calls
+
+    return install
+
+
+@pytest.fixture
+def offline_groq(fake_groq):
+    """Groq never answers: every explanation is the deterministic fallback."""
+    return fake_groq(lambda system_prompt, user_message, max_tokens: None)
+
+
+@pytest.fixture
+def make_facts():
+    """facts(program_id) for a NU program scored 80 (empty factor breakdown)."""
+    def facts(program_id):
+        return {"university_id": "nu", "program_id": program_id, "university_name": "NU",
+                "program_name": program_id, "score": 80.0, "factors": {}}
+
+    return facts
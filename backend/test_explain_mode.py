@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Test per-request explanation modes (none / fallback / ai)"""
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.main import app
+from app.services import ai_service, logic_service
+
+PROFILE = {"entScore": 110, "ieltsScore": 6.5, "budget": 3000000, "preferredCity": "Любой"}
+
+
+@pytest.fixture
+def no_llm(monkeypatch):
+    def forbidden(*args, **kwargs):
+        raise AssertionError("explainer must not be called")
+
+    for name in ("explain_many", "explain_many_async", "iter_explanations_async"):
+        monkeypatch.setattr(logic_service, name, forbidden)
+
+
+def test_cheap_modes_skip_the_explainer(no_llm):
+    assert all(r["explanation"] is None for r in logic_service.recommend(PROFILE, top_k=3, explain="none"))
+
+    recs = logic_service.recommend(PROFILE, top_k=3, explain="fallback")
+    assert [r["explanation"] for r in recs] == ai_service.fallback_explanations(
+        [facts for _, facts in logic_service.score_programs(PROFILE)[:3]]
+    )
+
+    result = logic_service.what_if(PROFILE, {"entScore": 130}, top_k=3, explain="none")
+    assert all(r["explanation"] is None for r in result["base"] + result["scenario"])
+
+    with pytest.raises(ValueError):
+        logic_service.recommend(PROFILE, explain="llm")
+
+
+def test_routes_pass_the_mode_through(no_llm, monkeypatch):
+    # Keep impressions out of the shared trending counters
+    monkeypatch.setattr(routes, "record_event", lambda *args: None)
+    client = TestClient(app)
+
+    recs = client.post("/api/recommendations", json={"profile": PROFILE, "top_k": 2, "explain": "fallback"}).json()
+    assert all(r["explanation"]["summary"] for r in recs["recommendations"])
+
+    response = client.post("/api/recommendations/stream", json={"profile": PROFILE, "top_k": 2, "explain": "none"})
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [e["type"] for e in events] == ["recommendations", "done"]
+
+    what_if = client.post("/api/what-if", json={"profile": PROFILE, "changes": {"budget": 5000000}, "explain": "none"})
+    assert what_if.status_code == 200 and what_if.json()["deltas"]
+
+    bad = client.post("/api/what-if", json={"profile": PROFILE, "changes": {}, "explain": "llm"})
+    assert bad.status_code == 422
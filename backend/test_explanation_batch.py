@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Test the batched multi-program explainer"""
+
+import asyncio
+import json
+import re
+
+from app.services import ai_service
+
+
+def _element(item_id, summary):
+    return {"id": item_id, "summary": summary, "key_factors": [{"factor": "ЕНТ", "value": "ok", "contribution": 40}],
+            "explanation": "Подходит.", "strengths": [], "considerations": []}
+
+
+def _setup(fake_groq, batch_reply):
+    calls = {"batch": 0, "single": []}
+
+    def fake_call(system_prompt, user_message, max_tokens):
+        if "JSON МАССИВ" in system_prompt:
+            calls["batch"] += 1
+            ids = re.findall(r'"id":"([\w-]+)"', user_message)
+            return batch_reply(ids)
+        program_id = re.search(r'"p":"(\w+)"', user_message).group(1)
+        calls["single"].append(program_id)
+        return json.dumps(_element(None, f"single {program_id}"), ensure_ascii=False)
+
+    fake_groq(fake_call)
+    return calls
+
+
+def test_one_request_for_all_programs(fake_groq, make_facts):
+    # Reply out of order, wrapped in prose
+    reply = lambda ids: "Вот ответ: " + json.dumps([_element(i, f"batch {i}") for i in reversed(ids)], ensure_ascii=False)
+    calls = _setup(fake_groq, reply)
+
+    results = ai_service.explain_batch([make_facts("a"), make_facts("b"), make_facts("c")])
+
+    assert calls["batch"] == 1 and calls["single"] == []
+    assert [r["summary"] for r in results] == ["batch nu-a", "batch nu-b", "batch nu-c"]
+    assert results[0]["key_factors"][0]["contribution"] == 40.0
+
+    # Items are cached individually: the per-item path hits the cache
+    assert ai_service.explain_recommendation({"facts": make_facts("b")})["summary"] == "batch nu-b"
+    assert calls["single"] == []
+
+
+def test_invalid_elements_fall_back_per_item(fake_groq, make_facts):
+    def reply(ids):
+        bad = _element(ids[1], "bad")
+        bad["key_factors"] = [{"contribution": "много"}]
+        return json.dumps([_element(ids[0], "batch ok"), bad], ensure_ascii=False)
+
+    calls = _setup(fake_groq, reply)
+    results = ai_service.explain_batch([make_facts("a"), make_facts("b"), make_facts("c")])
+
+    assert results[0]["summary"] == "batch ok"
+    assert [r["summary"] for r in results[1:]] == ["single b", "single c"]
+    assert calls["single"] == ["b", "c"]
+
+
+def test_malformed_response_falls_back_per_item(fake_groq, make_facts):
+    _setup(fake_groq, lambda ids: "не JSON")
+    results = ai_service.explain_batch([make_facts("a"), make_facts("b")])
+    assert [r["summary"] for r in results] == ["single a", "single b"]
+
+
+def test_missing_response_falls_back_without_retries(fake_groq, make_facts):
+    # No answer at all: deterministic fallback, no per-item retries
+    calls = _setup(fake_groq, lambda ids: None)
+    results = ai_service.explain_batch([make_facts("a")])
+    assert results[0] == ai_service._fallback_explanation(make_facts("a"))
+    assert calls["single"] == []
+
+
+def test_async_strategy_switch(monkeypatch, fake_groq, make_facts):
+    async def reply(system_prompt, user_message, max_tokens):
+        ids = re.findall(r'"id":"([\w-]+)"', user_message)
+        return json.dumps([_element(i, f"batch {i}") for i in ids], ensure_ascii=False)
+
+    calls = fake_groq(reply)
+    monkeypatch.setattr(ai_service, "EXPLANATION_STRATEGY", "batch")
+
+    results = asyncio.run(ai_service.explain_many_async([make_facts("a"), make_facts("b")]))
+
+    assert [r["summary"] for r in results] == ["batch nu-a", "batch nu-b"]
+    assert len(calls) == 1 and calls[0][2] > 1000
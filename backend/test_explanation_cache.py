@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Test the content-addressed explanation cache (memory LRU + SQLite)"""
+
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+
+from app.services import ai_service
+from app.services.content_cache import ContentCache, cache_key
+
+AI_JSON = json.dumps({
+    "summary": "Хорошая программа.",
+    "key_factors": [{"factor": "ЕНТ", "value": "ok", "contribution": 40}],
+    "explanation": "Подходит.",
+    "strengths": ["ЕНТ"],
+    "considerations": [],
+}, ensure_ascii=False)
+
+FACTS = {"university_id": "nu", "program_id": "cs", "score": 90.0, "factors": {"ent": {"status": "meets"}}}
+
+
+def test_key_is_canonical():
+    assert cache_key({"a": 1, "b": [1, 2]}) == cache_key({"b": [1, 2], "a": 1})
+    assert cache_key({"a": 1}) != cache_key({"a": 2})
+
+
+def test_disk_tier_survives_restart():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "c.sqlite3")
+        cache = ContentCache("t", path=path)
+        cache.put("k", {"x": 1}, cost_seconds=1.5)
+        cache.close()
+
+        reopened = ContentCache("t", path=path)
+        assert reopened.get("k") == {"x": 1}
+        assert reopened.get("k") == {"x": 1}
+        metrics = reopened.metrics()
+        assert metrics["disk_hits"] == 1 and metrics["memory_hits"] == 1
+        assert metrics["latency_saved_seconds"] == 3.0
+        reopened.close()
+
+
+def test_disk_writes_are_queued_and_readable(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ContentCache("t", path=os.path.join(tmp, "c.sqlite3"), memory_size=1)
+        # Hold the writer back: queued rows must still be readable
+        gate = threading.Event()
+        write_batch = cache._write_batch
+        monkeypatch.setattr(cache, "_write_batch", lambda batch: gate.wait() and write_batch(batch))
+        cache.put("a", {"x": 1})
+        cache.put("b", {"x": 2})
+        assert cache.metrics()["disk_queued"] == 2 and cache.metrics()["disk_entries"] == 0
+        assert cache.contains("a") and cache.get("a") == {"x": 1}
+        gate.set()
+        cache.flush()
+        assert cache.metrics()["disk_entries"] == 2
+        cache.close()
+
+        # Async lookups answer from disk without blocking the event loop
+        reopened = ContentCache("t", path=os.path.join(tmp, "c.sqlite3"))
+        assert asyncio.run(reopened.aget("b")) == {"x": 2}
+        assert asyncio.run(reopened.aget("missing")) is None
+        metrics = reopened.metrics()
+        assert metrics["disk_hits"] == 1 and metrics["misses"] == 1
+        reopened.close()
+
+
+def test_disk_count_matches_the_table_when_clear_races_writes():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ContentCache("t", path=os.path.join(tmp, "c.sqlite3"), memory_size=1, disk_max_entries=50)
+
+        def write(worker):
+            for i in range(200):
+                cache.put(f"{worker}-{i}", i)
+
+        writers = [threading.Thread(target=write, args=(w,)) for w in range(3)]
+        for thread in writers:
+            thread.start()
+        for _ in range(5):
+            cache.clear()
+        for thread in writers:
+            thread.join()
+        cache.flush()
+
+        rows = cache._conn().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        assert cache.metrics()["disk_entries"] == rows <= 50
+        cache.close()
+
+
+def test_ttl_and_size_eviction():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ContentCache("t", path=os.path.join(tmp, "c.sqlite3"), memory_size=2, disk_max_entries=3, ttl_seconds=0.05)
+        for i in range(5):
+            cache.put(f"k{i}", i)
+        cache.flush()
+        assert cache.metrics()["disk_entries"] == 3
+        assert cache.get("k0") is None
+        assert cache.get("k4") == 4
+        time.sleep(0.1)
+        assert cache.get("k4") is None
+        cache.close()
+
+
+def test_explain_recommendation_uses_cache(fake_groq):
+    calls = fake_groq(lambda system_prompt, user_message, max_tokens: AI_JSON)
+
+    first = ai_service.explain_recommendation({"facts": FACTS})
+    second = ai_service.explain_recommendation({"facts": dict(reversed(list(FACTS.items())))})
+    assert first == second
+    assert first["summary"] == "Хорошая программа."
+    assert len(calls) == 1
+
+
+def test_fallback_is_not_cached(offline_groq, fresh_caches):
+    ai_service.explain_recommendation({"facts": FACTS})
+    assert fresh_caches.explanation.metrics()["writes"] == 0
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
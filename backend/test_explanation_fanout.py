@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Test concurrent explanation fan-out for the top-k recommendations"""
+
+import asyncio
+import json
+import re
+
+from app.services import ai_service, logic_service
+
+
+def _ai_json(program_id):
+    return json.dumps({
+        "summary": f"AI {program_id}",
+        "key_factors": [],
+        "explanation": "Подходит.",
+        "strengths": [],
+        "considerations": [],
+    }, ensure_ascii=False)
+
+
+def _slow_groq(fake_groq, delays, fail=()):
+    state = {"active": 0, "peak": 0}
+
+    async def reply(system_prompt, user_message, max_tokens):
+        program_id = re.search(r'"p":"(\w+)"', user_message).group(1)
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        try:
+            await asyncio.sleep(delays.get(program_id, 0.01))
+            if program_id in fail:
+                raise RuntimeError("boom")
+            return _ai_json(program_id)
+        finally:
+            state["active"] -= 1
+
+    fake_groq(reply)
+    return state
+
+
+def test_results_keep_rank_order_and_respect_concurrency(fake_groq, make_facts):
+    ids = [f"p{i}" for i in range(6)]
+    # Later ranks finish first
+    state = _slow_groq(fake_groq, {pid: 0.05 - i * 0.008 for i, pid in enumerate(ids)})
+
+    results = asyncio.run(ai_service.explain_many_async([make_facts(pid) for pid in ids], concurrency=2, timeout=1))
+
+    assert [r["summary"] for r in results] == [f"AI {pid}" for pid in ids]
+    assert state["peak"] == 2
+
+
+def test_timeout_and_error_fall_back_per_item(fake_groq, make_facts):
+    _slow_groq(fake_groq, {"slow": 0.5}, fail={"bad"})
+
+    results = asyncio.run(ai_service.explain_many_async(
+        [make_facts("ok"), make_facts("slow"), make_facts("bad")], concurrency=3, timeout=0.1
+    ))
+
+    assert results[0]["summary"] == "AI ok"
+    fallback_slow = ai_service._fallback_explanation(make_facts("slow"))
+    assert results[1] == fallback_slow
+    assert results[2]["summary"] != "AI bad"
+
+
+def test_recommend_async_explains_only_top_k(monkeypatch):
+    explained = []
+
+    async def fake_many(facts_list, concurrency=None, timeout=None):
+        explained.extend(facts_list)
+        return [{"summary": f["program_id"]} for f in facts_list]
+
+    monkeypatch.setattr(logic_service, "explain_many_async", fake_many)
+    profile = {"entScore": 110, "ieltsScore": 6.5, "budget": 3000000, "preferredCity": "Любой"}
+
+    recs = asyncio.run(logic_service.recommend_async(profile, top_k=3))
+
+    assert len(recs) == len(explained) == 3
+    assert [r["explanation"]["summary"] for r in recs] == [r["program_id"] for r in recs]
+    assert [r["score"] for r in recs] == sorted((r["score"] for r in recs), reverse=True)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Test status-signature explanation templates (one LLM call per signature)"""
+
+import json
+
+from app.services import ai_service
+from app.services.logic_service import compute_program_score
+from app.storage.memory import get_university
+
+TEMPLATE_JSON = json.dumps({
+    "summary": "ЕНТ {ent_user} при минимуме {ent_required}, не хватает {ent_gap}.",
+    "key_factors": [{"factor": "ЕНТ", "value": "{ent_user} из {ent_required}", "contribution": 1, "key": "ent"}],
+    "explanation": "Бюджет {budget} против {tuition}; {unknown} остаётся как есть.",
+    "strengths": ["Трудоустройство {employment}%"],
+    "considerations": [],
+}, ensure_ascii=False)
+
+
+def _facts(ent):
+    uni = get_university("kaznu")
+    prog = uni["programs"][0]
+    score, breakdown = compute_program_score(
+        {"entScore": ent, "ieltsScore": 6.0, "budget": 500000, "preferredCity": "Almaty"}, uni, prog
+    )
+    return {"university_id": "kaznu", "university_name": uni["name"], "program_id": prog["id"],
+            "program_name": prog["name"], "score": score, "factors": breakdown}
+
+
+def test_same_signature_shares_one_llm_call(monkeypatch, fake_groq):
+    calls = fake_groq(lambda system_prompt, user_message, max_tokens: TEMPLATE_JSON)
+    monkeypatch.setattr(ai_service, "EXPLANATION_MODE", "signature")
+
+    # ENT gaps 8 and 12 fall in the same "6-15" bucket
+    first = ai_service.explain_recommendation({"facts": _facts(72)})
+    second = ai_service.explain_recommendation({"facts": _facts(68)})
+    assert len(calls) == 1
+    user_message = calls[0][1]
+    assert '"ent_user"' not in user_message and "72" not in user_message
+
+    assert first["summary"] == "ЕНТ 72 при минимуме 80, не хватает 8."
+    assert second["summary"] == "ЕНТ 68 при минимуме 80, не хватает 12."
+    assert second["explanation"] == "Бюджет 500,000 против 900,000; {unknown} остаётся как есть."
+    assert second["key_factors"][0]["contribution"] == _facts(68)["factors"]["ent"]["contribution"]
+
+    # A different bucket (gap 25) needs its own template
+    ai_service.explain_recommendation({"facts": _facts(55)})
+    assert len(calls) == 2
+
+
+if __name__ == "__main__":
+    import pytest
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Test compact prompt encoding and LLM token accounting"""
+
+import json
+from types import SimpleNamespace
+
+from app.services.fact_encoding import compact_json, encode_facts
+from app.services.llm_client import LLMUsage
+from app.services.logic_service import score_programs
+
+PROFILE = {"entScore": 110, "ieltsScore": 6.0, "budget": 2000000, "preferredCity": "Алматы"}
+
+
+def test_compact_encoding_keeps_facts_and_drops_redundancy():
+    _, facts = score_programs(PROFILE)[0]
+    encoded = encode_facts(facts)
+
+    assert "user_profile" not in encoded
+    assert encoded["s"] == facts["score"]
+    ent = facts["factors"]["ent"]
+    assert encoded["ent"][:3] == [ent["user"], ent["required"], ent["contribution"]]
+    assert encoded["city"][-1] in ("=", "~", "x")
+
+    verbose = json.dumps(facts, ensure_ascii=False, indent=2)
+    assert len(compact_json(encoded)) < len(verbose) / 2
+
+
+def test_facts_without_a_breakdown_pass_through():
+    facts = {"memory": "Хочу учиться в Алматы", "query": "Какие программы по IT?"}
+    assert encode_facts(facts) == facts
+
+
+def test_usage_is_accumulated():
+    usage = LLMUsage()
+    usage.record(SimpleNamespace(usage=SimpleNamespace(prompt_tokens=300, completion_tokens=100, total_tokens=400)), 0.5)
+    usage.record(SimpleNamespace(usage=None), 0.25)
+
+    metrics = usage.metrics()
+    assert metrics["calls"] == 2
+    assert metrics["prompt_tokens"] == 300 and metrics["total_tokens"] == 400
+    assert metrics["avg_prompt_tokens"] == 150.0
+    assert metrics["latency_seconds"] == 0.75
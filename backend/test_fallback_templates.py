@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""Test precompiled fallback explanations against the original implementation"""
+
+import json
+
+from app.services.fallback_templates import render_fallback, render_fallbacks
+from tools.bench_fallback import _facts_vectors, legacy_fallback_explanation
+
+
+def _dump(value):
+    return json.dumps(value, ensure_ascii=False)
+
+
+def test_identical_to_original_for_scored_programs():
+    for facts_list in _facts_vectors(30):
+        expected = [legacy_fallback_explanation(facts) for facts in facts_list]
+        assert _dump(render_fallbacks(facts_list)) == _dump(expected)
+
+
+def test_identical_on_edge_cases():
+    cases = [
+        {},
+        {"score": 45, "factors": "not a dict"},
+        {"score": 12, "factors": {"x": {"a": 1}, "city": "bad"}},
+        {"score": 70, "factors": {
+            "ielts": {"user": 5.5, "required": 6.5},
+            "budget": {"budget": 100, "tuition": 1234567.8},
+            "city": {"preferred": "Алматы", "university_city": "Каскелен", "status": "nearby", "distance_km": 10},
+        }},
+        # Same texts but a float distance: must not reuse the memoised "10"
+        {"score": 70, "factors": {
+            "city": {"preferred": "Алматы", "university_city": "Каскелен", "status": "nearby", "distance_km": 10.0},
+        }},
+    ]
+    for facts in cases:
+        assert _dump(render_fallback(facts)) == _dump(legacy_fallback_explanation(facts))
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Test the distance-aware city factor"""
+
+from app.services.geo_service import city_code, city_points, gather_city_points
+from app.services.logic_service import compute_program_score
+from app.storage.memory import get_university
+
+
+def test_city_codes_cover_spellings():
+    assert city_code("Almaty") == city_code("Алматы") == city_code("алма-ата")
+    assert city_code("Қаскелең") == city_code("Kaskelen")
+    assert city_code("Atlantis") == -1
+
+
+def test_proximity_is_graded():
+    assert city_points("Almaty", "Almaty") == 10.0
+    assert 7.0 < city_points("Almaty", "Kaskelen") < 10.0
+    assert city_points("Almaty", "Astana") == 0.0
+    assert city_points("Любой", "Astana") == 10.0
+    # Unknown cities keep the old exact-match rule
+    assert city_points("Atlantis", "Atlantis") == 10.0
+
+
+def test_gather_matches_single_lookups():
+    cities = ["Astana", "Kaskelen", "Atlantis", "Almaty"]
+    gathered = gather_city_points("Алматы", [city_code(c) for c in cities], cities)
+    assert gathered == [city_points("Алматы", c) for c in cities]
+
+
+def test_breakdown_status():
+    sdu = get_university("sdu")
+    _, breakdown = compute_program_score({"preferredCity": "Алматы"}, sdu, sdu["programs"][0])
+    assert breakdown["city"]["status"] == "nearby"
+    assert breakdown["city"]["distance_km"] < 50
+
+    kbtu = get_university("kbtu")
+    _, breakdown = compute_program_score({"preferredCity": "Алматы"}, kbtu, kbtu["programs"][0])
+    assert breakdown["city"]["status"] == "matches"
+    assert breakdown["city"]["contribution"] == 10.0
+
+
+if __name__ == "__main__":
+    test_city_codes_cover_spellings()
+    test_proximity_is_graded()
+    test_gather_matches_single_lookups()
+    test_breakdown_status()
+    print("✓ All geo tests passed!")
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Test incremental JSON extraction from LLM output"""
+
+from app.services import ai_service
+from app.services.json_stream import JSONStreamParser, extract_json, iter_json_elements
+
+
+def test_prose_fences_and_trailing_text():
+    text = 'Конечно! Вот ответ:\n```json\n{"summary": "ok {не скобка}", "n": [1, 2]}\n```\nНадеюсь, помог {:)}'
+    assert extract_json(text) == {"summary": "ok {не скобка}", "n": [1, 2]}
+    assert extract_json('[broken] {"a": "b\\"c"}', dict) == {"a": 'b"c'}
+    assert extract_json("без json") is None
+
+
+def test_elements_are_emitted_as_they_close():
+    text = '{"roadmap": [{"title": "A", "subtasks": [{"title": "a1"}]}, {"title": "B"}], "note": "x"}'
+    parser = JSONStreamParser(element_key="roadmap")
+    seen = []
+    for i in range(0, len(text), 7):
+        seen.append(parser.feed(text[i:i + 7]))
+    flat = [element["title"] for chunk in seen for element in chunk]
+    assert flat == ["A", "B"]
+    # "A" is available well before the completion ends
+    first = next(i for i, chunk in enumerate(seen) if chunk)
+    assert first < len(seen) - 3
+    assert parser.values[0]["note"] == "x"
+
+
+def test_truncation_is_repaired():
+    assert extract_json('{"summary": "Хорошая прог') == {"summary": "Хорошая прог"}
+    assert extract_json('{"a": 1, "b": tru') == {"a": 1}
+    assert extract_json('{"a": 1, "key_fac') == {"a": 1, "key_fac": None}
+    assert extract_json('{"a": {"b": [1, 2,') == {"a": {"b": [1, 2]}}
+    assert extract_json('{"a": 1, "b":') == {"a": 1, "b": None}
+
+    chunks = ['[{"id": "x", "v": 1}, ', '{"id": "y", "v": ', '2}, {"id": "z", "summ']
+    assert [e["id"] for e in iter_json_elements(chunks)] == ["x", "y", "z"]
+
+
+def test_llm_parsers_tolerate_wrapping_and_truncation(fake_groq, fresh_caches, make_facts):
+    explanation = ai_service._parse_explanation('Ответ:\n```json\n{"summary": "S", "key_factors": [{"factor": "ЕНТ", "contribution": 0.4}]}\n```')
+    assert explanation["summary"] == "S" and explanation["key_factors"][0]["contribution"] == 0.4
+
+    # A cut-off explanation falls back and is not cached
+    fake_groq(lambda system_prompt, user_message, max_tokens: '{"summary": "Хорошая прог')
+    explanation = ai_service.explain_recommendation({"facts": make_facts("cs")})
+    assert explanation["summary"] != "Хорошая прог" and explanation["explanation"]
+    assert fresh_caches.explanation.metrics()["writes"] == 0
+
+    batch = ai_service._parse_batch('{"items": [{"id": "nu-cs", "summary": "A"}, {"id": "kbtu-it", "summ')
+    # The cut-off element is left for a per-item retry
+    assert batch == {"nu-cs": batch["nu-cs"]} and batch["nu-cs"]["summary"] == "A"
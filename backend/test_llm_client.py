@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""Test the shared Groq client manager (one pooled client per process)"""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.llm_client import GroqClientManager
+
+
+def test_clients_are_reused_and_closed():
+    manager = GroqClientManager(api_key="test-key", max_connections=3, timeout=2.0)
+    client = manager.client()
+    assert manager.client() is client
+    assert manager.async_client() is manager.async_client()
+    assert client.timeout.read == 2.0
+
+    asyncio.run(manager.aclose())
+    assert manager._client is None and manager._async_client is None
+    assert manager.client() is not client
+
+
+def test_lifespan_starts_and_stops():
+    with TestClient(app) as client:
+        assert client.get("/api/hello").status_code == 200
+
+
+if __name__ == "__main__":
+    test_clients_are_reused_and_closed()
+    test_lifespan_starts_and_stops()
+    print("✓ All client manager tests passed!")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Test the LLM token-bucket scheduler and priority classes"""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from app.services import ai_service
+from app.services.llm_scheduler import (
+    BACKGROUND,
+    INTERACTIVE,
+    ROADMAP,
+    LLMScheduler,
+    TokenBucket,
+    estimate_tokens,
+    priority_scope,
+)
+from app.services.resilience import deadline_scope
+
+WAITS = {INTERACTIVE: 2.0, ROADMAP: 2.0, BACKGROUND: 2.0}
+
+
+def test_token_bucket_refills_and_refunds():
+    now = [0.0]
+    bucket = TokenBucket(60, clock=lambda: now[0])
+    bucket.take(60, 0.0)
+    assert bucket.wait_time(1, 0.0) == 1.0
+    assert bucket.wait_time(1, 0.5) == 0.5
+    bucket.put(10, 0.5)
+    assert bucket.level == 10.5
+    # Usage above the reservation goes into debt
+    bucket.put(-20, 0.5)
+    assert bucket.wait_time(1, 0.5) == 10.5
+    assert TokenBucket(0).wait_time(10 ** 9, 0.0) == 0.0
+
+
+def test_interactive_overtakes_queued_background():
+    scheduler = LLMScheduler(rpm=600, tpm=0, max_wait=WAITS)
+    scheduler.requests.level = 0  # 1 request per 0.1s from now on
+    order = []
+
+    def call(priority):
+        with priority_scope(priority):
+            assert scheduler.acquire(10) is not None
+        order.append(priority)
+
+    threads = []
+    for priority in (BACKGROUND, ROADMAP, INTERACTIVE):
+        threads.append(threading.Thread(target=call, args=(priority,)))
+        threads[-1].start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+
+    assert order == [INTERACTIVE, ROADMAP, BACKGROUND]
+    metrics = scheduler.metrics()["classes"]
+    assert metrics[BACKGROUND]["queued"] == 1 and metrics[INTERACTIVE]["granted"] == 1
+
+
+def test_queue_deadline_degrades_instead_of_waiting():
+    scheduler = LLMScheduler(rpm=1, tpm=0, max_wait={**WAITS, INTERACTIVE: 0.05})
+    assert scheduler.acquire(1) is not None
+
+    started = time.monotonic()
+    assert scheduler.acquire(1) is None
+    # The request budget also bounds the wait
+    with priority_scope(BACKGROUND), deadline_scope(0.05):
+        assert scheduler.acquire(1) is None
+    assert time.monotonic() - started < 0.5
+    assert scheduler.metrics()["classes"][INTERACTIVE]["expired"] == 1
+    assert scheduler.metrics()["waiting"] == 0
+
+
+def test_cancelled_async_waiter_leaves_the_queue():
+    scheduler = LLMScheduler(rpm=1, tpm=0, max_wait=WAITS)
+    scheduler.requests.level = 0
+
+    async def run():
+        try:
+            await asyncio.wait_for(scheduler.acquire_async(1), 0.05)
+        except asyncio.TimeoutError:
+            pass
+
+    asyncio.run(run())
+    assert scheduler.metrics()["waiting"] == 0
+
+
+def test_settle_returns_unused_tokens():
+    scheduler = LLMScheduler(rpm=0, tpm=1000, max_wait=WAITS)
+    permit = scheduler.acquire(800)
+    assert round(scheduler.tokens.level) == 200
+    permit.settle(300)
+    assert round(scheduler.tokens.level) == 700
+    scheduler.acquire(100).cancel()
+    assert round(scheduler.tokens.level) == 700
+
+
+def test_default_budget_fits_a_page_of_explanations():
+    # Reserve the expected reply, not max_tokens; settle against usage
+    tokens = estimate_tokens(ai_service._EXPLANATION_SYSTEM_PROMPT, "x" * 600, 1000)
+    assert tokens < 1000
+    scheduler = LLMScheduler(max_wait=WAITS)
+    permits = [scheduler.acquire(tokens) for _ in range(6)]
+    assert all(permits)
+
+    permits[0].settle(tokens + 400)
+    assert scheduler.tokens.level < scheduler.tokens.capacity - 6 * tokens
+
+
+def test_rate_limited_call_falls_back(monkeypatch, fresh_caches):
+    calls = []
+    fake = SimpleNamespace(with_options=lambda **kw: fake)
+    fake.chat = SimpleNamespace(completions=SimpleNamespace(create=lambda **kw: calls.append(kw)))
+    scheduler = LLMScheduler(rpm=1, tpm=0, max_wait={**WAITS, INTERACTIVE: 0.05})
+    scheduler.requests.level = 0
+    monkeypatch.setattr(ai_service, "llm_scheduler", scheduler)
+    monkeypatch.setattr(ai_service, "_groq_ready", lambda: True)
+    monkeypatch.setattr(ai_service.ai_clients, "client", lambda: fake)
+
+    facts = {"university_name": "U", "program_name": "P", "score": 50, "factors": {}}
+    assert ai_service.explain_recommendation({"facts": facts}) == ai_service._fallback_explanation(facts)
+    assert calls == []
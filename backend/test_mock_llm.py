@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Test the local mock LLM server against the real Groq SDK"""
+
+import asyncio
+
+import httpx
+from fastapi.testclient import TestClient
+from groq import AsyncGroq
+
+from app.services import ai_service
+from tools.mock_llm_server import MockSettings, create_app, parse_latency
+
+
+def _messages(system, user):
+    return [{"role": "system", "content": system}, {"role": "user", "content": user}]
+
+
+def test_groq_sdk_talks_to_mock():
+    async def call():
+        transport = httpx.ASGITransport(app=create_app())
+        async with httpx.AsyncClient(transport=transport) as http_client:
+            client = AsyncGroq(api_key="mock-key", base_url="http://mock", http_client=http_client)
+            return await client.chat.completions.create(
+                model="mock",
+                messages=_messages(ai_service._EXPLANATION_SYSTEM_PROMPT, '{"u":"NU","p":"CS","s":90}'),
+            )
+
+    response = asyncio.run(call())
+    explanation = ai_service._parse_explanation(response.choices[0].message.content)
+    assert explanation["summary"] and explanation["key_factors"]
+    assert response.usage.total_tokens > 0
+
+
+def test_batch_and_roadmap_templates():
+    client = TestClient(create_app())
+    batch = client.post("/openai/v1/chat/completions", json={
+        "model": "mock",
+        "messages": _messages("... JSON МАССИВ ...", '[{"id":"nu-cs"},{"id":"kbtu-it"}]'),
+    }).json()
+    assert set(ai_service._parse_batch(batch["choices"][0]["message"]["content"])) == {"nu-cs", "kbtu-it"}
+
+    roadmap = client.post("/openai/v1/chat/completions", json={
+        "model": "mock",
+        "messages": _messages("Создай план (roadmap)", "Дата начала: 2026-01-10"),
+    }).json()
+    assert '"due_date": "2026-01-24"' in roadmap["choices"][0]["message"]["content"]
+
+
+def test_faults_are_seeded_and_counted():
+    def run():
+        client = TestClient(create_app(MockSettings(error_rate=0.3, malformed_rate=0.3, seed=3)))
+        statuses = [
+            client.post("/openai/v1/chat/completions", json={"model": "m", "messages": _messages("s", "u")}).status_code
+            for _ in range(40)
+        ]
+        return statuses, client.get("/stats").json()
+
+    statuses, stats = run()
+    assert (statuses, stats) == run()
+    assert stats["errors"] == sum(s != 200 for s in statuses) > 0
+    assert stats["malformed"] > 0
+
+
+def test_replay_and_latency_specs():
+    settings = MockSettings(replay=[{"match": "ЕНТ", "content": "A"}, {"match": "ЕНТ", "content": "B"}])
+    assert [settings.replayed("про ЕНТ") for _ in range(3)] == ["A", "B", "A"]
+    assert settings.replayed("другое") is None
+
+    rng = MockSettings().rng
+    assert parse_latency("0.25")(rng) == 0.25
+    assert 0.1 <= parse_latency("uniform:0.1,0.2")(rng) <= 0.2
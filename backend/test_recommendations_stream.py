@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Test NDJSON streaming of recommendations and explanations"""
+
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import ai_service
+
+PROFILE = {"entScore": 110, "ieltsScore": 6.5, "budget": 3000000, "preferredCity": "Любой"}
+
+
+def test_ranked_list_first_then_explanations(offline_groq):
+    client = TestClient(app)
+
+    with client.stream("POST", "/api/recommendations/stream", json={"profile": PROFILE, "top_k": 3}) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        events = [json.loads(line) for line in response.iter_lines() if line]
+
+    assert events[0]["type"] == "recommendations"
+    recs = events[0]["recommendations"]
+    assert len(recs) == 3 and all(r["explanation"] is None for r in recs)
+
+    explanations = [e for e in events if e["type"] == "explanation"]
+    ids = {f"{r['university_id']}-{r['program_id']}" for r in recs}
+    assert {e["id"] for e in explanations} == ids
+    assert all(e["explanation"]["summary"] for e in explanations)
+    assert events[-1] == {"type": "done"}
+
+
+def test_explanations_arrive_in_completion_order(monkeypatch):
+    delays = {}
+
+    async def fake_explain(context):
+        program = context["facts"]["program_id"]
+        await asyncio.sleep(delays[program])
+        return {"summary": program}
+
+    monkeypatch.setattr(ai_service, "explain_recommendation_async", fake_explain)
+    monkeypatch.setattr(ai_service, "EXPLANATION_STRATEGY", "per_item")
+    facts = [{"program_id": "slow"}, {"program_id": "fast"}]
+    delays.update(slow=0.1, fast=0.01)
+
+    async def collect():
+        return [item async for item in ai_service.iter_explanations_async(facts)]
+
+    assert asyncio.run(collect()) == [(1, {"summary": "fast"}), (0, {"summary": "slow"})]
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""Test the LLM latency budget and circuit breaker"""
+
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import ai_service
+from app.services.resilience import CircuitBreaker, deadline_scope, remaining_budget
+
+FACTS = {"university_id": "nu", "program_id": "cs", "university_name": "NU", "program_name": "CS", "score": 80.0}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_and_half_opens():
+    clock = FakeClock()
+    breaker = CircuitBreaker("t", failure_threshold=2, recovery_timeout=10, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock.now = 10
+    assert breaker.allow()          # one probe
+    assert not breaker.allow()      # others still short-circuit
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+    assert breaker.metrics()["opened"] == 2
+
+
+def test_deadline_scopes_only_shrink():
+    assert remaining_budget() is None
+    with deadline_scope(5):
+        with deadline_scope(60):
+            assert remaining_budget() <= 5
+    assert remaining_budget() is None
+
+
+class FakeGroq:
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+        self.chat = SimpleNamespace(completions=self)
+
+    def with_options(self, **kwargs):
+        return self
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.fail:
+            raise ConnectionError("down")
+        message = SimpleNamespace(content='{"summary": "AI", "key_factors": []}')
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def _setup(monkeypatch, fake):
+    """Fake Groq client behind a fresh breaker (use with the fresh_caches fixture)."""
+    breaker = CircuitBreaker("t", failure_threshold=2, recovery_timeout=60)
+    monkeypatch.setattr(ai_service, "_groq_ready", lambda: True)
+    monkeypatch.setattr(ai_service.ai_clients, "client", lambda: fake)
+    monkeypatch.setattr(ai_service, "groq_breaker", breaker)
+    return breaker
+
+
+def test_exhausted_budget_skips_the_call(monkeypatch, fresh_caches):
+    fake = FakeGroq()
+    _setup(monkeypatch, fake)
+
+    with deadline_scope(0):
+        result = ai_service.explain_recommendation({"facts": FACTS})
+    assert result == ai_service._fallback_explanation(FACTS)
+    assert fake.calls == []
+
+    with deadline_scope(2):
+        assert ai_service.explain_recommendation({"facts": FACTS})["summary"] == "AI"
+    assert fake.calls[0]["timeout"] <= 2
+
+
+def test_open_breaker_short_circuits(monkeypatch, fresh_caches):
+    fake = FakeGroq(fail=True)
+    breaker = _setup(monkeypatch, fake)
+
+    for _ in range(4):
+        assert ai_service.explain_recommendation({"facts": FACTS}) == ai_service._fallback_explanation(FACTS)
+    assert len(fake.calls) == 2
+    assert breaker.metrics()["state"] == "open"
+    assert breaker.metrics()["short_circuits"] == 2
+
+
+def test_metrics_expose_breaker_state():
+    client = TestClient(app)
+    breaker = client.get("/api/metrics").json()["llm_circuit_breaker"]
+    assert breaker["state"] in ("closed", "open", "half_open")
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Test roadmap skeleton caching and date re-basing"""
+
+import json
+
+from app.services import ai_service
+from app.storage.memory import get_program, get_university
+
+AI_ROADMAP = json.dumps({"roadmap": [
+    {"title": "Документы", "description": "Собрать", "due_date": "2026-01-15", "priority": 1,
+     "subtasks": [{"title": "Паспорт", "due_date": "2026-01-10"}]},
+    {"title": "Подача", "description": "Подать", "due_date": "2026-03-01", "priority": 1},
+]}, ensure_ascii=False)
+
+
+def _context(ent, start_date, deadline=None):
+    return {
+        "user_profile": {"entScore": ent, "ieltsScore": 7.0, "budget": 10000000},
+        "university": get_university("nu"),
+        "program": get_program("nu", "cs"),
+        "start_date": start_date,
+        "deadline": deadline,
+    }
+
+
+def test_similar_students_share_a_rebased_skeleton(fake_groq):
+    prompts = fake_groq(lambda system_prompt, user_message, max_tokens: AI_ROADMAP)
+
+    first = ai_service.generate_roadmap(_context(140, "2026-01-01"))["roadmap"]
+    second = ai_service.generate_roadmap(_context(135, "2026-06-01"))["roadmap"]
+
+    assert len(prompts) == 1
+    assert "140" not in prompts[0][1]
+    assert [i["title"] for i in second] == [i["title"] for i in first]
+    assert second[0]["due_date"] == "2026-06-15"
+    assert second[0]["subtasks"][0]["due_date"] == "2026-06-10"
+    assert second[1]["due_date"] == "2026-07-30"
+    assert {i["id"] for i in second}.isdisjoint(i["id"] for i in first)
+
+
+def test_different_buckets_and_deadline_clamp(fake_groq):
+    prompts = fake_groq(lambda system_prompt, user_message, max_tokens: AI_ROADMAP)
+
+    ai_service.generate_roadmap(_context(140, "2026-01-01", "2026-04-01"))
+    # Same window bucket (1-3 months), deadline closer than the skeleton's last date
+    items = ai_service.generate_roadmap(_context(140, "2026-01-01", "2026-02-20"))["roadmap"]
+    assert len(prompts) == 1
+    assert items[1]["due_date"] == "2026-02-20"
+
+    # ENT far below the minimum is a different signature
+    ai_service.generate_roadmap(_context(60, "2026-01-01", "2026-04-01"))
+    assert len(prompts) == 2
+
+
+def test_truncated_reply_drops_the_partial_item_and_is_not_cached(fake_groq, fresh_caches):
+    truncated = AI_ROADMAP[:AI_ROADMAP.index('"Подать"')]
+    prompts = fake_groq(lambda system_prompt, user_message, max_tokens: truncated)
+
+    items = ai_service.generate_roadmap(_context(140, "2026-01-01"))["roadmap"]
+    assert [i["title"] for i in items] == ["Документы"]
+    assert fresh_caches.roadmap.metrics()["writes"] == 0
+
+    ai_service.generate_roadmap(_context(140, "2026-01-01"))
+    assert len(prompts) == 2
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Test background roadmap generation jobs"""
+
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.main import app
+from app.services.roadmap_jobs import RoadmapJobs, RoadmapQueueFull
+from app.storage.memory import get_roadmap
+
+
+def _wait(jobs, job_id, status="done"):
+    for _ in range(200):
+        if jobs.get(job_id)["status"] == status:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} never reached {status}")
+
+
+def test_only_the_latest_job_saves():
+    release = {"old": threading.Event(), "new": threading.Event()}
+    saved = []
+
+    def generate(context):
+        release[context["tag"]].wait(2)
+        return {"roadmap": [{"title": context["tag"]}]}
+
+    jobs = RoadmapJobs(workers=2, queue_max=0, generate=generate, save=lambda u, items: saved.append(items))
+    old = jobs.submit("u1", {"tag": "old"})
+    new = jobs.submit("u1", {"tag": "new"})
+
+    # Both workers busy, no queue: a third job is rejected
+    try:
+        jobs.submit("u2", {"tag": "new"})
+        raise AssertionError("queue should be full")
+    except RoadmapQueueFull:
+        pass
+
+    release["new"].set()
+    _wait(jobs, new)
+    release["old"].set()
+    _wait(jobs, old)
+    assert saved == [[{"title": "new"}]]
+    assert jobs.get(old)["roadmap"] == [{"title": "old"}]
+    jobs.shutdown()
+
+
+def test_superseded_job_does_not_save():
+    release = threading.Event()
+    saved = []
+
+    def generate(context):
+        release.wait(2)
+        return {"roadmap": [{"title": "job"}]}
+
+    jobs = RoadmapJobs(workers=1, generate=generate, save=lambda u, items: saved.append(items))
+    job_id = jobs.submit("u1", {})
+    # e.g. a cached roadmap was saved by the route in the meantime
+    jobs.supersede("u1")
+    release.set()
+    _wait(jobs, job_id)
+    assert saved == [] and jobs.get(job_id)["roadmap"] == [{"title": "job"}]
+    jobs.shutdown()
+
+
+def test_failed_job_and_ttl():
+    def generate(context):
+        raise RuntimeError("boom")
+
+    jobs = RoadmapJobs(workers=1, ttl_seconds=0, generate=generate, save=lambda u, items: None)
+    job_id = jobs.submit("u1", {})
+    for _ in range(200):
+        if jobs._jobs[job_id]["finished_at"] is not None:
+            break
+        time.sleep(0.01)
+    assert jobs._jobs[job_id]["status"] == "failed"
+    time.sleep(0.01)
+    assert jobs.get(job_id) is None
+    jobs.shutdown()
+
+
+def test_shutdown_fails_queued_jobs_and_frees_their_slots():
+    release = threading.Event()
+
+    def generate(context):
+        release.wait(5)
+        return {"roadmap": [{"title": context["title"]}]}
+
+    jobs = RoadmapJobs(workers=1, queue_max=1, generate=generate, save=lambda u, items: None)
+    running = jobs.submit("u1", {"title": "running"})
+    _wait(jobs, running, "running")
+    queued = jobs.submit("u2", {"title": "queued"})
+    jobs.shutdown()
+
+    assert jobs.get(queued)["status"] == "failed" and jobs.get(queued)["error"] == "shutdown"
+    release.set()
+    _wait(jobs, running)
+    assert jobs.metrics()["active"] == 0
+
+    # Reused after shutdown (lifespan restart): the freed slots take new jobs
+    release.clear()
+    jobs.submit("u3", {"title": "a"})
+    jobs.submit("u4", {"title": "b"})
+    release.set()
+    jobs.shutdown()
+
+
+def test_post_returns_placeholder_then_job_result(monkeypatch, fresh_caches):
+    ai_roadmap = {"roadmap": [{"id": "1", "title": "AI шаг", "description": "", "due_date": "2030-01-01", "priority": 1}]}
+    jobs = RoadmapJobs(workers=1, generate=lambda context: ai_roadmap)
+    monkeypatch.setattr(routes, "roadmap_jobs", jobs)
+
+    client = TestClient(app)
+    user = client.post("/api/auth/register", json={"name": "Job", "email": "jobs@test.kz", "password": "x"}).json()["user"]
+    headers = {"Authorization": f"Bearer {user['token']}"}
+    body = {"user_id": user["id"], "university_id": "nu", "program_id": "cs"}
+
+    data = client.post("/api/roadmap", json=body, headers=headers).json()
+    assert data["status"] == "pending" and data["roadmap"]
+    assert data["roadmap"][0]["title"] != "AI шаг"
+
+    _wait(jobs, data["job_id"])
+    job = client.get(f"/api/roadmap/jobs/{data['job_id']}", headers=headers).json()
+    assert job["status"] == "done" and job["roadmap"][0]["title"] == "AI шаг"
+    assert get_roadmap(user["id"])[0]["title"] == "AI шаг"
+
+    # Someone else's job id is not visible
+    other = client.post("/api/auth/register", json={"name": "O", "email": "other-jobs@test.kz", "password": "x"}).json()["user"]
+    response = client.get(f"/api/roadmap/jobs/{data['job_id']}", headers={"Authorization": f"Bearer {other['token']}"})
+    assert response.status_code == 404
+    jobs.shutdown()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Test token-streamed roadmap generation"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from groq import AsyncGroq
+
+from app.main import app
+from app.services import ai_service
+from app.services.llm_scheduler import LLMScheduler
+from app.storage.memory import get_roadmap
+from tools.mock_llm_server import create_app
+
+CONTEXT = {
+    "user_profile": {"ent_score": 100, "ielts": 6.0, "budget": 2000000},
+    "university": {"name": "NU"},
+    "program": {"name": "CS", "minENT": 110, "minIELTS": 6.5, "tuition": 3000000},
+    "start_date": "2026-01-10",
+    "deadline": None,
+}
+
+
+def _collect(context):
+    async def run():
+        return [event async for event in ai_service.stream_roadmap(context)]
+
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def unlimited(monkeypatch, fresh_caches):
+    """Fresh caches and no LLM rate limits."""
+    monkeypatch.setattr(ai_service, "llm_scheduler", LLMScheduler(rpm=0, tpm=0))
+
+
+def test_items_arrive_before_the_stream_ends(monkeypatch, unlimited):
+    seen = []
+    text = '{"roadmap": [{"title": "IELTS", "due_date": "2026-02-01"}, {"title": "Подача", "due_date": "bad"}]}'
+
+    async def fake_stream(system_prompt, user_message, max_tokens=1000, priority=None):
+        for start in range(0, len(text), 10):
+            seen.append(start)
+            yield text[start:start + 10]
+
+    monkeypatch.setattr(ai_service, "_astream_groq_api", fake_stream)
+
+    async def run():
+        events = []
+        async for event in ai_service.stream_roadmap(CONTEXT):
+            events.append((event, len(seen)))
+        return events
+
+    events = asyncio.run(run())
+    (first, sent_at_first), (second, _), (done, _) = events
+    assert first["item"]["title"] == "IELTS" and sent_at_first < len(text) // 10
+    assert second["item"]["due_date"] == "2026-01-30" and second["item"]["priority"] == 3
+    assert done["source"] == "ai" and done["roadmap"] == [first["item"], second["item"]]
+
+    # The skeleton is cached like a non-streamed AI roadmap
+    assert _collect(CONTEXT)[-1]["source"] == "cache"
+
+
+def test_broken_stream_resets_to_fallback(monkeypatch, unlimited):
+
+    async def broken_stream(system_prompt, user_message, max_tokens=1000, priority=None):
+        yield '{"roadmap": [{"title": "AI"}, {"tit'
+        raise httpx.ReadError("connection reset")
+
+    monkeypatch.setattr(ai_service, "_astream_groq_api", broken_stream)
+    events = _collect(CONTEXT)
+    assert [e["type"] for e in events[:2]] == ["item", "reset"]
+    assert events[-1]["source"] == "fallback"
+    assert events[-1]["roadmap"] == [e["item"] for e in events[2:-1]]
+
+
+def test_truncated_stream_hides_the_partial_item(monkeypatch, unlimited, fresh_caches):
+    async def cut_stream(system_prompt, user_message, max_tokens=1000, priority=None):
+        yield '{"roadmap": [{"title": "IELTS", "due_date": "2026-02-01"}, {"title": "Под'
+
+    monkeypatch.setattr(ai_service, "_astream_groq_api", cut_stream)
+    events = _collect(CONTEXT)
+    assert [e["type"] for e in events] == ["item", "done"]
+    assert events[-1]["source"] == "ai" and [i["title"] for i in events[-1]["roadmap"]] == ["IELTS"]
+    assert fresh_caches.roadmap.metrics()["writes"] == 0
+
+
+def test_groq_stream_through_mock_server(monkeypatch, unlimited):
+    monkeypatch.setattr(ai_service, "_groq_ready", lambda: True)
+    clients = []
+
+    def async_client():
+        if not clients:
+            http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app()))
+            clients.append(AsyncGroq(api_key="mock-key", base_url="http://mock", http_client=http_client))
+        return clients[0]
+
+    monkeypatch.setattr(ai_service.ai_clients, "async_client", async_client)
+    calls_before = ai_service.llm_usage.metrics()["calls"]
+
+    events = _collect(CONTEXT)
+    assert events[-1]["source"] == "ai" and len(events[-1]["roadmap"]) == len(events) - 1
+    assert events[-1]["roadmap"][0]["due_date"] == "2026-01-24"
+    assert ai_service.llm_usage.metrics()["calls"] == calls_before + 1
+
+
+def test_stream_endpoint_saves_the_roadmap(monkeypatch, unlimited):
+    client = TestClient(app)
+    user = client.post("/api/auth/register", json={"name": "S", "email": "stream-roadmap@test.kz", "password": "x"}).json()["user"]
+    body = {"user_id": user["id"], "university_id": "nu", "program_id": "cs"}
+
+    assert client.post("/api/roadmap/stream", json=body).status_code == 401
+    response = client.post("/api/roadmap/stream", json=body, headers={"Authorization": f"Bearer {user['token']}"})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[0]["type"] == "item" and events[-1]["type"] == "done"
+    assert get_roadmap(user["id"]) == events[-1]["roadmap"]
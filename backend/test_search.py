@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Test catalog search (BM25 + prefix autocomplete) and incremental re-indexing"""
+
+import copy
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services import search_service
+from app.services.search_service import SearchIndex, tokenize
+from app.storage import memory
+from tools.bench_search import CITIES, WORDS, synthetic_catalog
+
+client = TestClient(app)
+
+
+def test_tokenize_folds_kazakh_letters():
+    assert tokenize("Қаскелең, Alma-Ata!") == ["каскелен", "alma", "ata"]
+
+
+def test_search_ranks_and_matches_city_aliases():
+    r = client.get("/api/search", params={"q": "computer"})
+    ids = [res["id"] for res in r.json()["results"]]
+    assert set(ids[:2]) == {"nu-cs", "kbtu-kbtu-cs"}
+
+    r = client.get("/api/search", params={"q": "Алматы economics"})
+    assert r.json()["results"][0]["id"] in ("kaznu-economics", "kimep-kimep-econ")
+
+
+def test_autocomplete_prefix():
+    r = client.get("/api/search/autocomplete", params={"q": "cyb"})
+    assert [res["id"] for res in r.json()["results"]] == ["aitu-aitu-cyber"]
+
+    r = client.get("/api/search/autocomplete", params={"q": "astana d"})
+    assert "aitu-aitu-cs" in [res["id"] for res in r.json()["results"]]
+
+
+def test_multi_word_autocomplete_matches_brute_force(monkeypatch):
+    # Tiny scan chunks so the hits of most queries span several chunks
+    monkeypatch.setattr(search_service, "SCAN_CHUNK", 2)
+    index = SearchIndex()
+    index.build(synthetic_catalog(3000))
+
+    for city in CITIES:
+        for word in WORDS:
+            for length in (1, 3):
+                query = f"{city} {word[:length]}"
+                complete, prefix = tokenize(query)
+                expected = sorted(
+                    index.rank_keys[doc_id]
+                    for doc_id, terms in index.doc_terms.items()
+                    if complete in terms and any(t.startswith(prefix) for t in terms)
+                )[:10]
+                assert [d["id"] for d in index.autocomplete(query)] == [k[-1] for k in expected], query
+
+
+def test_incremental_updates_match_full_rebuild():
+    index = SearchIndex(suggest_limit=3)
+    unis = copy.deepcopy(memory.universities)
+    index.build(unis)
+
+    unis[0]["programs"].append({"id": "math", "name": "Mathematics", "degree": "Bachelor"})
+    index.index_university(unis[0])
+    index.index_university(None, uni_id=unis[1]["id"])
+
+    fresh = SearchIndex(suggest_limit=3)
+    fresh.build([unis[0]] + unis[2:])
+
+    for prefix in ["m", "ma", "c", "e", "a", "b", "s"]:
+        assert index.autocomplete(prefix) == fresh.autocomplete(prefix), prefix
+    assert index.search("bachelor economics") == fresh.search("bachelor economics")
+
+
+def test_catalog_change_reindexes():
+    client.get("/api/search", params={"q": "warmup"})
+    assert memory.upsert_program("sdu", {"id": "sdu-geo", "name": "Geodesy", "degree": "Bachelor"})
+    try:
+        r = client.get("/api/search/autocomplete", params={"q": "geod"})
+        assert [res["id"] for res in r.json()["results"]] == ["sdu-sdu-geo"]
+    finally:
+        memory.remove_program("sdu", "sdu-geo")
+    r = client.get("/api/search/autocomplete", params={"q": "geod"})
+    assert r.json()["results"] == []
+
+
+if __name__ == "__main__":
+    test_tokenize_folds_kazakh_letters()
+    test_search_ranks_and_matches_city_aliases()
+    test_autocomplete_prefix()
+    test_incremental_updates_match_full_rebuild()
+    test_catalog_change_reindexes()
+    print("✓ All search tests passed!")
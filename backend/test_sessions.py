@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Test session expiry, renewal, the per-user cap and the sweeper"""
+
+import time
+
+from app.services import auth_service
+from app.storage.sessions import SessionStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_idle_ttl_slides_but_absolute_ttl_holds():
+    clock = Clock()
+    store = SessionStore({}, absolute_ttl=100, idle_ttl=30, max_per_user=5, renew_every=5, clock=clock)
+    store.create("t", "u1", "a@test.kz")
+
+    # Regular use keeps the session alive past the idle TTL...
+    for _ in range(4):
+        clock.now += 20
+        assert store.verify("t")["user_id"] == "u1"
+    # ...but never past the absolute TTL
+    clock.now += 20
+    assert store.verify("t") is None
+
+    store.create("idle", "u1", "a@test.kz")
+    clock.now += 31
+    assert store.verify("idle") is None
+    assert store.metrics()["expired"] == 2 and store.metrics()["live"] == 0
+
+
+def test_renewal_is_written_back_at_most_once_per_interval():
+    clock = Clock()
+    table = {}
+    store = SessionStore(table, absolute_ttl=100, idle_ttl=30, max_per_user=5, renew_every=10, clock=clock)
+    store.create("t", "u1", "a@test.kz")
+    clock.now += 5
+    store.verify("t")
+    assert table["t"]["last_seen"] == clock.now - 5
+    clock.now += 5
+    store.verify("t")
+    assert table["t"]["last_seen"] == clock.now and store.metrics()["renewed"] == 1
+
+
+def test_cap_evicts_the_oldest_session():
+    clock = Clock()
+    store = SessionStore({}, absolute_ttl=100, idle_ttl=100, max_per_user=2, clock=clock)
+    for token in ("a", "b", "c"):
+        clock.now += 1
+        store.create(token, "u1", "a@test.kz")
+    store.create("other", "u2", "b@test.kz")
+    assert store.verify("a") is None and store.verify("b") and store.verify("c")
+    assert store.metrics()["evicted"] == 1 and store.metrics()["users"] == 2
+
+
+def test_sweep_skips_renewed_sessions_and_rebuilds_state():
+    clock = Clock()
+    table = {}
+    store = SessionStore(table, absolute_ttl=1000, idle_ttl=30, max_per_user=5, renew_every=0, clock=clock)
+    store.create("kept", "u1", "a@test.kz")
+    store.create("dropped", "u2", "b@test.kz")
+    clock.now += 20
+    store.verify("kept")
+    clock.now += 20
+    assert store.sweep() == 1
+    assert set(table) == {"kept"} and store.metrics()["heap_entries"] == 1
+    assert store.metrics()["index_bytes"] > 0
+
+    # A restarted process rebuilds the indexes from the table and drops what expired meanwhile
+    table["old"] = {"user_id": "u3", "email": "c@test.kz", "created_at": "2000-01-01T00:00:00"}
+    reloaded = SessionStore(table, absolute_ttl=1000, idle_ttl=30, max_per_user=5, clock=clock)
+    assert reloaded.verify("kept")["user_id"] == "u1" and "old" not in table
+
+
+def test_table_io_runs_outside_the_lock_and_revoke_wins_over_renewal():
+    clock = Clock()
+
+    class Table(dict):
+        on_write = None
+
+        def get(self, key, default=None):
+            assert not store._lock.locked()
+            return super().get(key, default)
+
+        def __setitem__(self, key, value):
+            assert not store._lock.locked()
+            if self.on_write:
+                self.on_write()
+            super().__setitem__(key, value)
+
+    table = Table()
+    store = SessionStore(table, absolute_ttl=100, idle_ttl=30, max_per_user=5, renew_every=10, clock=clock)
+    store.create("t", "u1", "a@test.kz")
+    clock.now += 10
+    assert store.verify("t")["last_seen"] == clock.now
+
+    # A revoke just before the renewal is written back is not undone by it
+    table.on_write = lambda: store.revoke("t")
+    clock.now += 10
+    store.verify("t")
+    assert "t" not in table and store.verify("t") is None
+
+
+def test_background_sweeper_and_auth_integration(monkeypatch):
+    store = SessionStore({}, absolute_ttl=0.05, idle_ttl=0.05, max_per_user=5, sweep_interval=0.01)
+    monkeypatch.setattr(auth_service, "sessions", store)
+    ok, _, user = auth_service.register_user("S", "sessions@test.kz", "pw")
+    assert ok and auth_service.verify_token(user["token"])[0]
+
+    for _ in range(100):
+        if store.metrics()["live"] == 0:
+            break
+        time.sleep(0.01)
+    assert store.metrics()["live"] == 0
+    assert auth_service.verify_token(user["token"]) == (False, None)
+    assert auth_service.logout_user(user["token"])[0] is False
+    store.stop()
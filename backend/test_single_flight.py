@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""Test single-flight coalescing of identical in-flight LLM calls"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services import ai_service
+from app.services.llm_scheduler import BACKGROUND, INTERACTIVE, priority_scope
+from app.services.resilience import deadline_scope
+from app.services.single_flight import SingleFlight
+
+
+def test_sync_callers_share_one_call_and_its_error():
+    flights = SingleFlight("t")
+    calls = []
+
+    def slow(value):
+        calls.append(value)
+        time.sleep(0.1)
+        if value == "boom":
+            raise ValueError("boom")
+        return value
+
+    def run(value, out):
+        try:
+            out.append(flights.do(value, lambda: slow(value)))
+        except ValueError as e:
+            out.append(e)
+
+    for value in ("ok", "boom"):
+        out = []
+        threads = [threading.Thread(target=run, args=(value, out)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if value == "ok":
+            assert out == ["ok"] * 5
+        else:
+            assert len(out) == 5 and all(isinstance(o, ValueError) for o in out)
+
+    assert calls == ["ok", "boom"]
+    assert flights.metrics() == {"calls": 10, "coalesced": 8, "timeouts": 0, "in_flight": 0}
+
+
+def test_async_cancellation_only_stops_the_shared_call_when_all_leave():
+    flights = SingleFlight("t")
+    events = []
+
+    async def slow():
+        events.append("start")
+        try:
+            await asyncio.sleep(0.1)
+        except asyncio.CancelledError:
+            events.append("cancelled")
+            raise
+        return "result"
+
+    async def scenario():
+        # One impatient caller leaves; the other still gets the shared result
+        impatient = asyncio.ensure_future(flights.do_async("k", slow))
+        patient = asyncio.ensure_future(flights.do_async("k", slow))
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        assert await patient == "result"
+        with pytest.raises(asyncio.CancelledError):
+            await impatient
+
+        # Everyone leaves: the call is cancelled and the next caller starts afresh
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(flights.do_async("k", slow), 0.01)
+        await asyncio.sleep(0)
+        assert await flights.do_async("k", slow) == "result"
+
+    asyncio.run(scenario())
+    assert events == ["start", "start", "cancelled", "start"]
+    assert flights.metrics()["in_flight"] == 0
+
+
+def test_async_errors_reach_every_caller():
+    flights = SingleFlight("t")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("down")
+
+    async def scenario():
+        return await asyncio.gather(*(flights.do_async("k", fail) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert flights.metrics()["coalesced"] == 2
+
+
+def test_sync_follower_gives_up_at_its_own_deadline():
+    flights = SingleFlight("t", max_wait={INTERACTIVE: 0.05})
+    release = threading.Event()
+    leader = threading.Thread(target=flights.do, args=("k", lambda: release.wait(5)))
+    leader.start()
+    time.sleep(0.02)
+
+    # No request budget: the follower still stops at max_wait for its class
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        flights.do("k", lambda: "unused")
+    assert time.monotonic() - started < 1
+
+    with deadline_scope(0.02), pytest.raises(TimeoutError):
+        flights.do("k", lambda: "unused")
+
+    release.set()
+    leader.join()
+    assert flights.metrics()["timeouts"] == 2 and flights.metrics()["in_flight"] == 0
+
+
+def test_interactive_callers_do_not_join_background_calls():
+    flights = SingleFlight("t")
+    release = threading.Event()
+
+    def background():
+        with priority_scope(BACKGROUND):
+            flights.do("k", lambda: release.wait(5) and "background")
+
+    worker = threading.Thread(target=background)
+    worker.start()
+    time.sleep(0.02)
+    assert flights.do("k", lambda: "interactive") == "interactive"
+    release.set()
+    worker.join()
+    assert flights.metrics()["coalesced"] == 0
+
+
+def test_async_follower_times_out_without_stopping_the_shared_call():
+    flights = SingleFlight("t", max_wait={INTERACTIVE: 0.02})
+
+    async def slow():
+        await asyncio.sleep(0.1)
+        return "result"
+
+    async def scenario():
+        with priority_scope(BACKGROUND):
+            patient = asyncio.ensure_future(flights.do_async("k", slow))
+            await asyncio.sleep(0.01)
+            with deadline_scope(0.01), pytest.raises(TimeoutError):
+                await flights.do_async("k", slow)
+        with pytest.raises(TimeoutError):
+            await flights.do_async("k", slow)
+        return await patient
+
+    assert asyncio.run(scenario()) == "result"
+    assert flights.metrics() == {"calls": 3, "coalesced": 1, "timeouts": 2, "in_flight": 0}
+
+
+def test_identical_explanations_share_a_groq_call(monkeypatch, fresh_caches):
+    calls = []
+
+    async def fake_request(system_prompt, user_message, max_tokens):
+        calls.append(user_message)
+        await asyncio.sleep(0.05)
+        return '{"summary": "AI", "key_factors": []}'
+
+    monkeypatch.setattr(ai_service, "_agroq_request", fake_request)
+    monkeypatch.setattr(ai_service, "llm_flights", SingleFlight("t"))
+    facts = {"university_name": "U", "program_name": "P", "program_id": "p", "score": 70, "factors": {}}
+
+    async def cohort():
+        return await asyncio.gather(*(ai_service.explain_recommendation_async({"facts": facts}) for _ in range(4)))
+
+    results = asyncio.run(cohort())
+    assert len(calls) == 1
+    assert all(r["summary"] == "AI" for r in results)
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Test the SQLite storage backend"""
+
+import threading
+from types import SimpleNamespace
+
+from app.services import auth_service
+from app.storage import memory
+from app.storage.sessions import SessionStore
+from app.storage.sqlite_store import SQLiteStore
+from app.storage.users import UserRepository
+
+
+def test_table_behaves_like_a_dict_and_persists(tmp_path):
+    path = str(tmp_path / "store.sqlite3")
+    store = SQLiteStore(path, batch_size=100, flush_interval=60)
+    table = store.table("t")
+    table["a"] = {"n": 1}
+    table["b"] = [1, 2]
+    del table["b"]
+
+    # Buffered writes are visible before they are committed
+    assert store.metrics()["pending"] == 2
+    assert table["a"] == {"n": 1} and "b" not in table and table.get("b") is None
+    assert dict(table.items()) == {"a": {"n": 1}} and len(table) == 1
+
+    # Reads are copies: mutating one needs a write-back
+    value = table["a"]
+    value["n"] = 2
+    assert table["a"] == {"n": 1}
+
+    # Namespaces are separate
+    store.table("other")["a"] = "x"
+    store.close()
+
+    reopened = SQLiteStore(path)
+    assert reopened.table("t")["a"] == {"n": 1} and reopened.table("other")["a"] == "x"
+    reopened.close()
+
+
+def test_batches_commit_from_many_threads(tmp_path):
+    store = SQLiteStore(str(tmp_path / "store.sqlite3"), batch_size=16, flush_interval=0.01)
+    table = store.table("t")
+
+    def write(worker):
+        for i in range(50):
+            table[f"{worker}-{i}"] = i
+            assert table[f"{worker}-{i}"] == i
+
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    store.flush()
+
+    metrics = store.metrics()
+    assert len(table) == 200 and metrics["pending"] == 0
+    assert metrics["flushed_rows"] == 200 and metrics["flushes"] < 200
+    store.close()
+
+
+def test_auth_and_roadmaps_survive_a_restart(tmp_path, monkeypatch):
+    path = str(tmp_path / "app.sqlite3")
+
+    def use_store():
+        store = SQLiteStore(path, batch_size=8)
+        monkeypatch.setattr(auth_service, "users", UserRepository(store.table("users_by_id"), store.table("user_emails")))
+        monkeypatch.setattr(auth_service, "sessions", SessionStore(store.table("sessions"), 3600, 3600, 10))
+        monkeypatch.setattr(memory, "roadmap_store", store.table("roadmaps"))
+        return store
+
+    store = use_store()
+    ok, _, user = auth_service.register_user("A", "a@test.kz", "pw")
+    assert ok
+    assert auth_service.save_user_profile(user["id"], {"entScore": 100})
+    assert auth_service.save_user_favorites(user["id"], ["nu"])
+    memory.save_roadmap(user["id"], [{"title": "IELTS"}])
+    store.close()
+
+    store = use_store()
+    assert auth_service.verify_token(user["token"])[1]["user_id"] == user["id"]
+    assert auth_service.login_user("a@test.kz", "pw")[0]
+    assert auth_service.get_user_profile(user["id"]) == {"entScore": 100}
+    assert auth_service.get_user_favorites(user["id"]) == ["nu"]
+    assert memory.get_roadmap(user["id"]) == [{"title": "IELTS"}]
+    store.close()
+
+
+def test_items_sees_a_batch_committed_during_its_select(tmp_path):
+    store = SQLiteStore(str(tmp_path / "store.sqlite3"), batch_size=100, flush_interval=60)
+    table = store.table("t")
+    table["a"] = 1
+    conn = store._conn()
+
+    class FlushAfterSelect:
+        """Commits the buffered batch right after the SELECT has read the file."""
+
+        def execute(self, sql, params):
+            rows = conn.execute(sql, params).fetchall()
+            store._local.conn = conn
+            store.flush()
+            return SimpleNamespace(fetchall=lambda: rows)
+
+    store._local.conn = FlushAfterSelect()
+    assert dict(table.items()) == {"a": 1}
+    assert store.metrics()["pending"] == 0
+    store.close()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Test "students like you chose" suggestions built from favorites/comparison/applications"""
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services import auth_service, collab_service
+from app.storage import memory
+
+client = TestClient(app)
+
+
+def _register(email):
+    r = client.post("/api/auth/register", json={"name": email, "email": email, "password": "pass123"})
+    assert r.status_code == 200
+    return {"Authorization": f"Bearer {r.json()['token']}"}
+
+
+def test_cooccurrence_is_incremental():
+    collab_service.record_user_items("u1", "comparison", ["nu-cs", "kbtu-kbtu-cs"])
+    collab_service.record_user_items("u1", "favorites", ["nu"])
+    assert collab_service.cooccurrence["nu-cs"]["kbtu-kbtu-cs"] == 1
+    assert collab_service.cooccurrence["nu"]["nu-cs"] == 1
+
+    # Removing an item drops exactly its pairs
+    collab_service.record_user_items("u1", "comparison", ["nu-cs"])
+    assert "kbtu-kbtu-cs" not in collab_service.cooccurrence.get("nu-cs", {})
+    assert "kbtu-kbtu-cs" not in collab_service.item_users
+
+    collab_service.record_user_items("u1", "comparison", [])
+    collab_service.record_user_items("u1", "favorites", [])
+    assert "nu-cs" not in collab_service.cooccurrence
+
+
+def test_suggestions_endpoint():
+    peer = _register("peer_suggest@test.com")
+    client.post("/api/user/comparison", json={"comparison_list": ["aitu-aitu-cs", "aitu-aitu-cyber"]}, headers=peer)
+    client.post("/api/user/applications", json={"applications": [
+        {"university": "Astana IT University", "program": "Data Science", "appliedOn": "2025-05-01", "status": "Draft"},
+        {"university": "sdu", "program": "sdu-it", "appliedOn": "2025-05-02", "status": "Draft"},
+    ]}, headers=peer)
+
+    me = _register("me_suggest@test.com")
+    client.post("/api/user/comparison", json={"comparison_list": ["aitu-aitu-cs"]}, headers=me)
+
+    r = client.get("/api/user/suggestions", headers=me)
+    assert r.status_code == 200
+    ids = [s["id"] for s in r.json()["suggestions"]]
+    assert "aitu-aitu-cyber" in ids
+    assert "sdu-sdu-it" in ids
+    assert "aitu-aitu-cs" not in ids
+
+    r = client.get("/api/user/applications", headers=peer)
+    assert len(r.json()["applications"]) == 2
+
+
+def test_matrix_is_rebuilt_from_storage_on_startup():
+    def register(email):
+        headers = _register(email)
+        return client.get("/api/auth/me", headers=headers).json()["user"]["id"]
+
+    # Lists written by an earlier process: in storage, not in the matrix
+    peer, me = register("peer_restart@test.com"), register("me_restart@test.com")
+    auth_service.save_user_favorites(peer, ["kbtu"])
+    auth_service.save_user_comparison(peer, ["kbtu-kbtu-cs"])
+    memory.save_applications(peer, [{"university": "sdu", "program": "sdu-it"}])
+    auth_service.save_user_comparison(me, ["kbtu-kbtu-cs"])
+    assert collab_service.suggest_for_user(me) == []
+
+    assert collab_service.rebuild_cooccurrence(memory.users.records(), memory.applications_store.items()) >= 2
+    assert {s["id"] for s in collab_service.suggest_for_user(me)} >= {"kbtu", "sdu-sdu-it"}
+
+    # Rebuilding again replaces the matrix instead of double counting
+    counts = dict(collab_service.item_users)
+    collab_service.rebuild_cooccurrence(memory.users.records(), memory.applications_store.items())
+    assert collab_service.item_users == counts
+
+if __name__ == "__main__":
+    test_cooccurrence_is_incremental()
+    test_suggestions_endpoint()
+    test_matrix_is_rebuilt_from_storage_on_startup()
+    print("✓ All suggestion tests passed!")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Test streaming trending counters (count-min sketch + heavy hitters)"""
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.trending_service import CountMinSketch, TrendingWindow
+
+client = TestClient(app)
+
+
+def test_sketch_never_underestimates():
+    sketch = CountMinSketch(width=64, depth=4)
+    truth = {}
+    for i in range(2000):
+        key = f"item-{i % 300}"
+        sketch.add(key)
+        truth[key] = truth.get(key, 0) + 1
+    for key, count in truth.items():
+        assert sketch.estimate(key) >= count
+
+
+def test_window_expires_old_buckets():
+    window = TrendingWindow(bucket_seconds=10, num_buckets=3, capacity=4)
+    for _ in range(5):
+        window.record("old", now=0)
+    window.record("new", now=25)
+    assert window.top(5, now=25)[0] == ("old", 5)
+
+    # Bucket 0 leaves the 3-bucket window at t=30
+    assert window.top(5, now=30) == [("new", 1)]
+
+
+def test_heavy_hitters_keep_frequent_items():
+    window = TrendingWindow(capacity=8)
+    for i in range(500):
+        window.record(f"noise-{i}", now=0)
+        if i % 5 == 0:
+            window.record("hot", 3, now=0)
+    assert window.top(1, now=0)[0][0] == "hot"
+
+
+def test_trending_endpoint():
+    r = client.post("/api/auth/register", json={"name": "T", "email": "trend@test.com", "password": "p"})
+    headers = {"Authorization": f"Bearer {r.json()['token']}"}
+    client.post("/api/user/comparison", json={"comparison_list": ["sdu-sdu-law"]}, headers=headers)
+    client.post("/api/user/favorites", json={"favorites": ["sdu"]}, headers=headers)
+
+    r = client.get("/api/trending?kind=program&limit=5")
+    assert r.status_code == 200
+    assert "sdu-sdu-law" in [item["id"] for item in r.json()["items"]]
+
+    r = client.get("/api/trending?kind=university")
+    assert r.json()["items"][0]["id"] == "sdu"
+
+    assert client.get("/api/trending?kind=city").status_code == 400
+
+
+if __name__ == "__main__":
+    test_sketch_never_underestimates()
+    test_window_expires_old_buckets()
+    test_heavy_hitters_keep_frequent_items()
+    test_trending_endpoint()
+    print("✓ All trending tests passed!")
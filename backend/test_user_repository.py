@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Test the indexed user repository"""
+
+import threading
+
+import pytest
+
+from app.services import auth_service
+from app.storage.users import UserRepository
+
+
+def _user(user_id, email):
+    return {"id": user_id, "name": user_id, "email": email}
+
+
+def test_indexes_stay_consistent():
+    repo = UserRepository({}, {})
+    assert repo.add(_user("1", "a@test.kz"))
+    assert not repo.add(_user("2", "a@test.kz"))
+    assert repo.add(_user("2", "b@test.kz"))
+    assert repo.get_by_email("a@test.kz")["id"] == "1" and len(repo) == 2
+
+    # Email change moves the secondary index entry
+    assert repo.update("1", lambda user: user.update(email="c@test.kz"))
+    assert repo.get_by_email("a@test.kz") is None
+    assert repo.get_by_email("c@test.kz")["id"] == "1"
+
+    # Taking someone else's email is rejected and changes nothing
+    with pytest.raises(ValueError):
+        repo.update("1", lambda user: user.update(email="b@test.kz", name="x"))
+    assert repo.get("1")["name"] == "1" and repo.get_by_email("b@test.kz")["id"] == "2"
+    assert not repo.update("missing", lambda user: None)
+
+
+def test_concurrent_registration_and_updates(monkeypatch):
+    repo = UserRepository({}, {})
+    monkeypatch.setattr(auth_service, "users", repo)
+    results = []
+
+    def register():
+        results.append(auth_service.register_user("N", "same@test.kz", "pw")[0])
+
+    threads = [threading.Thread(target=register) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(True) == 1 and len(repo) == 1
+
+    user_id = repo.get_by_email("same@test.kz")["id"]
+
+    def save(field):
+        for i in range(50):
+            auth_service.save_user_profile(user_id, {field: i})
+
+    threads = [threading.Thread(target=save, args=(f"f{n}",)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert auth_service.get_user_profile(user_id) == {f"f{n}": 49 for n in range(4)}
+    assert auth_service.get_user_by_id(user_id)["email"] == "same@test.kz"
+    assert auth_service.get_user_favorites("missing") == []
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Test the explanation cache warmer"""
+
+import json
+
+import pytest
+
+from app.services import ai_service, warmer
+
+AI_JSON = json.dumps({"summary": "AI", "key_factors": [], "explanation": "", "strengths": [], "considerations": []})
+
+
+@pytest.fixture
+def per_item(monkeypatch, fresh_caches):
+    """One explanation request per program, so LLM requests are countable."""
+    monkeypatch.setattr(ai_service, "EXPLANATION_STRATEGY", "per_item")
+    monkeypatch.setattr(warmer, "EXPLANATION_STRATEGY", "per_item")
+
+
+def test_requested_profiles_come_first(monkeypatch):
+    monkeypatch.setattr(warmer, "_request_log", warmer.Counter())
+    warmer.record_profile({"entScore": 101, "ieltsScore": 6, "budget": 1500000, "preferredCity": "Алматы", "interests": ["IT"]})
+    warmer.record_profile({"entScore": 101, "ieltsScore": 6.0, "budget": 1500000, "preferredCity": "Алматы"})
+    warmer.record_profile({"entScore": 95, "ieltsScore": 0, "budget": 0, "preferredCity": None})
+
+    profiles = warmer.candidate_profiles(limit=5)
+    assert profiles[0] == {"entScore": 101, "ieltsScore": 6.0, "budget": 1500000, "preferredCity": "Алматы"}
+    assert profiles[1]["preferredCity"] == "Любой"
+    assert len(profiles) == 5
+
+
+def test_warm_fills_cache_within_budget(per_item, fake_groq):
+    calls = fake_groq(lambda system_prompt, user_message, max_tokens: AI_JSON)
+    profiles = warmer.profile_grid()[:3]
+
+    stats = warmer.warm(profiles, top_k=3, llm_budget=7, roadmap_top_k=0)
+    assert stats["budget_exhausted"] and stats["profiles"] == 2
+    assert len(calls) == stats["llm_requests"] <= 7
+
+    # A warmed profile is served from the cache: no new LLM requests
+    stats = warmer.warm(profiles[:2], top_k=3, llm_budget=7, roadmap_top_k=0)
+    assert stats["llm_requests"] == 0 and stats["already_cached"] == 6
+    assert len(calls) == 6
+
+
+def test_dry_run_sends_nothing(per_item, fake_groq):
+    calls = fake_groq(lambda system_prompt, user_message, max_tokens: AI_JSON)
+    stats = warmer.warm(warmer.profile_grid()[:2], top_k=2, llm_budget=100, dry_run=True, roadmap_top_k=0)
+    assert stats["llm_requests"] == 4 and calls == []
+
+
+def test_roadmaps_are_warmed_once_per_signature(per_item, fake_groq):
+    def reply(system_prompt, user_message, max_tokens):
+        if "roadmap" in system_prompt:
+            return json.dumps({"roadmap": [{"title": "Подать заявку", "due_date": "2030-01-01"}]})
+        return AI_JSON
+
+    calls = fake_groq(reply)
+    # Same bucketed gaps: both profiles share the top program's roadmap skeleton
+    profiles = [
+        {"entScore": 130, "ieltsScore": 7.5, "budget": 5000000, "preferredCity": "Любой"},
+        {"entScore": 131, "ieltsScore": 7.5, "budget": 5000000, "preferredCity": "Любой"},
+    ]
+
+    stats = warmer.warm(profiles, top_k=1, llm_budget=10, roadmap_top_k=1)
+    assert stats["roadmaps"] == 1
+    assert sum("roadmap" in system_prompt for system_prompt, _, _ in calls) == 1
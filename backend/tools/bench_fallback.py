@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""Benchmark precompiled fallback explanations against the original code.
+
+Run from backend/:
+    python -m tools.bench_fallback --profiles 100 --repeat 5
+
+Scores every program for a grid of profiles (app.services.warmer), checks
+that render_fallback and render_fallbacks produce exactly the output of
+the original implementation (copied verbatim below), then times the
+three over the same facts ("*" = with the factor text memo emptied
+before each pass).
+"""
+
+import argparse
+import json
+import time
+from typing import Any, Dict, List
+
+from app.services import fallback_templates
+from app.services.fallback_templates import render_fallback, render_fallbacks
+from app.services.logic_service import score_programs
+from app.services.warmer import profile_grid
+
+
+# Verbatim copy of ai_service._fallback_explanation before the templates
+def legacy_fallback_explanation(facts: Dict[str, Any]) -> Dict[str, Any]:
+    """Генерирует объяснение без AI (детерминировано).
+    
+    Используется когда:
+    - API ключ не установлен
+    - Groq недоступен
+    - Произошла ошибка при вызове AI
+    """
+    
+    if not facts:
+        return {
+            "summary": "Программа доступна в вашем профиле.",
+            "key_factors": [],
+            "explanation": "Рекомендация основана на соответствии критериям.",
+            "strengths": [],
+            "considerations": []
+        }
+    
+    # Извлекаем базовые данные
+    uni_name = facts.get("university_name", "Университет")
+    prog_name = facts.get("program_name", "Программа")
+    score = float(facts.get("score", 0))
+    factors = facts.get("factors", {})
+    
+    # Определяем качество соответствия
+    if score >= 80:
+        quality = "отличное соответствие"
+    elif score >= 60:
+        quality = "хорошее соответствие"
+    elif score >= 40:
+        quality = "среднее соответствие"
+    else:
+        quality = "базовое соответствие"
+    
+    # Основное резюме
+    summary = f"{uni_name} — программа '{prog_name}' показывает {quality} (оценка: {score:.0f}/100)."
+    
+    # Извлекаем ключевые факторы
+    key_factors = []
+    strengths = []
+    considerations = []
+    
+    factor_names_ru = {
+        "ent": "Баллы ЕНТ",
+        "ielts": "IELTS",
+        "budget": "Бюджет",
+        "city": "Город",
+        "outcomes": "Карьерные перспективы"
+    }
+    
+    if isinstance(factors, dict):
+        for fname, fdata in factors.items():
+            if not isinstance(fdata, dict):
+                continue
+            
+            factor_ru = factor_names_ru.get(fname, fname)
+            contribution = float(fdata.get("contribution", 0))
+            
+            # Формируем описание фактора
+            value_desc = ""
+            
+            if fname == "ent":
+                user_ent = float(fdata.get("user", 0))
+                required = float(fdata.get("required", 0))
+                if user_ent >= required:
+                    value_desc = f"Ваш результат ({user_ent:.0f}) соответствует требованию ({required:.0f})"
+                    strengths.append(f"Результат ЕНТ соответствует требованиям")
+                else:
+                    value_desc = f"Ваш результат ({user_ent:.0f}) ниже требования ({required:.0f})"
+                    gap = required - user_ent
+                    considerations.append(f"Нужно улучшить ЕНТ на {gap:.0f} баллов")
+            
+            elif fname == "ielts":
+                user_ielts = float(fdata.get("user", 0))
+                required = float(fdata.get("required", 0))
+                if required == 0:
+                    value_desc = "IELTS не требуется"
+                elif user_ielts >= required:
+                    value_desc = f"Ваш IELTS ({user_ielts:.1f}) соответствует требованию ({required:.1f})"
+                    strengths.append(f"IELTS соответствует требованиям")
+                else:
+                    value_desc = f"Ваш IELTS ({user_ielts:.1f}) ниже требования ({required:.1f})"
+                    gap = required - user_ielts
+                    considerations.append(f"Нужно улучшить IELTS на {gap:.1f} балла")
+            
+            elif fname == "budget":
+                budget = float(fdata.get("budget", 0))
+                tuition = float(fdata.get("tuition", 0))
+                if tuition == 0:
+                    value_desc = "Бесплатное обучение (грант)"
+                    strengths.append("Бесплатное обучение")
+                elif budget >= tuition:
+                    value_desc = f"Бюджет ({budget:,.0f}) ≥ стоимость ({tuition:,.0f})"
+                else:
+                    shortfall = tuition - budget
+                    value_desc = f"Нужно {shortfall:,.0f} тенге дополнительно"
+                    considerations.append(f"Недостаток средств: {shortfall:,.0f} тенге/год")
+            
+            elif fname == "city":
+                preferred = fdata.get("preferred", "Любой")
+                uni_city = fdata.get("university_city", "")
+                status = fdata.get("status")
+                if preferred == "Любой" or preferred == uni_city or status == "matches":
+                    value_desc = f"Город совпадает ({uni_city})"
+                    if preferred != "Любой":
+                        strengths.append(f"Университет в предпочитаемом городе ({uni_city})")
+                elif status == "nearby":
+                    value_desc = f"{uni_city} рядом с {preferred} (~{fdata.get('distance_km')} км)"
+                else:
+                    value_desc = f"Город отличается: {uni_city} vs {preferred}"
+            
+            elif fname == "outcomes":
+                employment = float(fdata.get("employment", 0))
+                salary = float(fdata.get("avgSalary", 0))
+                value_desc = f"Трудоустройство: {employment}%, зарплата: {salary:,.0f} тенге"
+                if employment >= 85:
+                    strengths.append(f"Высокое трудоустройство ({employment}%)")
+            
+            else:
+                value_desc = str(fdata)
+            
+            if value_desc:
+                key_factors.append({
+                    "factor": factor_ru,
+                    "value": value_desc,
+                    "contribution": round(contribution, 1)
+                })
+    
+    # Общее объяснение
+    if score >= 70:
+        explanation = "Программа хорошо соответствует вашему профилю. Рекомендуем рассмотреть."
+    elif score >= 50:
+        explanation = "Программа подходит, но есть ограничения. Может быть вариантом."
+    else:
+        explanation = "Базовое соответствие. Рассмотрите улучшение показателей."
+    
+    return {
+        "summary": summary,
+        "key_factors": key_factors[:5],  # Топ 5 факторов
+        "explanation": explanation,
+        "strengths": strengths[:3] if strengths else ["Соответствие основным требованиям"],
+        "considerations": considerations[:3] if considerations else []
+    }
+
+
+def _facts_vectors(profiles: int) -> List[List[Dict[str, Any]]]:
+    """All scored programs (in rank order) for each profile."""
+    return [[facts for _, facts in score_programs(profile)] for profile in profile_grid()[:profiles]]
+
+
+def _dump(explanations: List[Dict[str, Any]]) -> bytes:
+    return json.dumps(explanations, ensure_ascii=False).encode("utf-8")
+
+
+def _time(label: str, render, vectors, repeat: int, baseline: float = 0.0, cold: bool = False) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        if cold:
+            fallback_templates._text_memo.clear()
+        started = time.perf_counter()
+        for facts_list in vectors:
+            render(facts_list)
+        best = min(best, time.perf_counter() - started)
+    programs = sum(len(v) for v in vectors)
+    speedup = f"  x{baseline / best:.2f}" if baseline else ""
+    print(f"{label:<18} {best * 1000:8.1f} ms  {best / programs * 1e6:6.2f} us/program{speedup}")
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    vectors = _facts_vectors(args.profiles)
+    # Edge cases the grid does not produce
+    vectors.append([{}, {"score": 12, "factors": {"ent": {"user": 0, "required": 0}, "x": {"a": 1}, "city": "bad"}}])
+
+    legacy = lambda facts_list: [legacy_fallback_explanation(f) for f in facts_list]
+    single = lambda facts_list: [render_fallback(f) for f in facts_list]
+    for facts_list in vectors:
+        expected = _dump(legacy(facts_list))
+        assert _dump(single(facts_list)) == expected, "render_fallback differs from the original"
+        assert _dump(render_fallbacks(facts_list)) == expected, "render_fallbacks differs from the original"
+    print(f"identical output for {sum(len(v) for v in vectors)} programs in {len(vectors)} vectors")
+
+    baseline = _time("original", legacy, vectors, args.repeat)
+    # Cold: empty text memo at the start of every pass
+    _time("render_fallbacks*", render_fallbacks, vectors, args.repeat, baseline, cold=True)
+    _time("render_fallback", single, vectors, args.repeat, baseline)
+    _time("render_fallbacks", render_fallbacks, vectors, args.repeat, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Load-test the recommendation path against the mock LLM.
+
+Run from backend/:
+    python -m tools.bench_recommendations --requests 200 --concurrency 20 \\
+        --latency lognormal:0.8,0.4 --error-rate 0.05 --malformed-rate 0.05
+
+Starts tools.mock_llm_server in-process, points the app at it via
+LLM_MOCK_URL (memory-only explanation cache), then fires recommend_async
+calls for random profiles. Reports p50/p99 latency, the explanation cache,
+LLM usage, the circuit breaker and the mock's fault counters.
+Use --profiles to control how often profiles repeat (cache hit rate).
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import threading
+import time
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_mock(args) -> str:
+    import uvicorn
+
+    from tools.mock_llm_server import MockSettings, create_app
+
+    settings = MockSettings(args.latency, args.error_rate, args.malformed_rate, seed=args.seed)
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(create_app(settings), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
+
+
+async def run(args) -> None:
+    # Imported after LLM_MOCK_URL is set: config is read at import time
+    import httpx
+
+    from app.services.ai_service import explanation_cache
+    from app.services.llm_client import ai_clients, llm_usage
+    from app.services.llm_scheduler import llm_scheduler
+    from app.services.logic_service import recommend_async
+    from app.services.resilience import groq_breaker
+
+    rng = random.Random(args.seed)
+    profiles = [
+        {
+            "entScore": rng.randint(60, 140),
+            "ieltsScore": rng.choice([0.0, 5.0, 5.5, 6.0, 6.5, 7.0, 7.5]),
+            "budget": rng.choice([0, 800000, 1500000, 2500000, 5000000]),
+            "preferredCity": rng.choice(["Любой", "Алматы", "Астана", "Шымкент"]),
+        }
+        for _ in range(args.profiles)
+    ]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await recommend_async(rng.choice(profiles), top_k=args.top_k)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"requests: {args.requests} in {elapsed:.2f}s ({args.requests / elapsed:.1f} req/s)")
+    print(f"latency: p50 {statistics.median(latencies) * 1000:.0f} ms, p99 {p99 * 1000:.0f} ms")
+    print(f"explanation cache: {explanation_cache.metrics()}")
+    print(f"llm usage: {llm_usage.metrics()}")
+    print(f"circuit breaker: {groq_breaker.metrics()}")
+    print(f"llm scheduler: {llm_scheduler.metrics()}")
+    print(f"mock: {httpx.get(os.environ['LLM_MOCK_URL'] + '/stats').json()}")
+    await ai_clients.aclose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--profiles", type=int, default=30, help="distinct profiles to sample from")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--latency", default="lognormal:0.5,0.4")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    os.environ["LLM_MOCK_URL"] = start_mock(args)
+    os.environ["EXPLANATION_CACHE_PATH"] = ""
+    os.environ.setdefault("REQUEST_LATENCY_BUDGET_MS", "0")
+    # Measure the app, not Groq's free-tier limits (set them to test queueing)
+    os.environ.setdefault("LLM_RATE_RPM", "0")
+    os.environ.setdefault("LLM_RATE_TPM", "0")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
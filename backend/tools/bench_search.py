@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Benchmark catalog search on a synthetic 100k-program catalog.
+
+Run from backend/:  python -m tools.bench_search [--programs 100000]
+Reports index build time and p50/p99 latency for autocomplete and search.
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from app.services.search_service import SearchIndex
+
+WORDS = [
+    "computer", "science", "engineering", "data", "economics", "business", "law", "medicine",
+    "physics", "chemistry", "biology", "design", "management", "finance", "marketing", "history",
+    "информатика", "экономика", "право", "медицина", "физика", "химия", "менеджмент", "дизайн",
+    "ақпараттық", "жүйелер", "қаржы", "құқық", "software", "cyber", "security", "analytics",
+]
+CITIES = ["Astana", "Almaty", "Kaskelen", "Shymkent", "Karaganda", "Aktobe", "Pavlodar", "Taraz"]
+
+
+def synthetic_catalog(n_programs: int, per_uni: int = 50, seed: int = 7):
+    rng = random.Random(seed)
+    universities = []
+    for u in range(max(1, n_programs // per_uni)):
+        programs = [
+            {
+                "id": f"p{p}",
+                "name": " ".join(rng.sample(WORDS, rng.randint(1, 3))) + f" {p}",
+                "degree": rng.choice(["Bachelor", "Master", "PhD"]),
+            }
+            for p in range(per_uni)
+        ]
+        universities.append({
+            "id": f"u{u}",
+            "name": f"{rng.choice(WORDS).title()} University {u}",
+            "city": rng.choice(CITIES),
+            "programs": programs,
+        })
+    return universities
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return (
+        statistics.median(ordered) * 1000,
+        ordered[int(len(ordered) * 0.99) - 1] * 1000,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--programs", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=5000)
+    args = parser.parse_args()
+
+    catalog = synthetic_catalog(args.programs)
+    index = SearchIndex()
+    start = time.perf_counter()
+    index.build(catalog)
+    print(f"Indexed {len(index.docs)} docs, {len(index.postings)} terms in {time.perf_counter() - start:.1f}s")
+
+    rng = random.Random(11)
+    prefixes = [rng.choice(WORDS)[: rng.randint(1, 5)] for _ in range(args.queries)]
+    multi = [f"{rng.choice(CITIES)} {rng.choice(WORDS)[:3]}" for _ in range(args.queries)]
+    full = [f"{rng.choice(WORDS)} {rng.choice(WORDS)}" for _ in range(args.queries // 10)]
+
+    for label, queries, fn in (
+        ("autocomplete (1 token)", prefixes, index.autocomplete),
+        ("autocomplete (2 tokens)", multi, index.autocomplete),
+        ("search (BM25)", full, index.search),
+    ):
+        samples = []
+        for q in queries:
+            t0 = time.perf_counter()
+            fn(q)
+            samples.append(time.perf_counter() - t0)
+        p50, p99 = percentiles(samples)
+        print(f"{label:<26} p50={p50:.3f}ms  p99={p99:.3f}ms  (n={len(samples)})")
+
+    # Incremental update cost: re-index one university (50 programs)
+    samples = []
+    for uni in rng.sample(catalog, 50):
+        t0 = time.perf_counter()
+        index.index_university(uni)
+        samples.append(time.perf_counter() - t0)
+    p50, p99 = percentiles(samples)
+    print(f"{'reindex university':<26} p50={p50:.3f}ms  p99={p99:.3f}ms  (n={len(samples)})")
+
+
+if __name__ == "__main__":
+    main()
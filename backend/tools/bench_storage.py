@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Benchmark the storage backends: in-memory dicts vs SQLite.
+
+Run from backend/:
+    python -m tools.bench_storage --users 2000 --batch-size 64
+
+Runs the same workload through auth_service and storage.memory on each
+backend: register, login, verify_token, save/get roadmap, and profile
+save/get for a sample of users. Reports per-operation p50/p99
+latency and the total time; for SQLite also the time to flush and the
+database size.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from app.services import auth_service
+from app.storage import memory
+from app.storage.sessions import SessionStore
+from app.storage.sqlite_store import SQLiteStore
+from app.storage.users import UserRepository
+
+
+def use_tables(tables: Callable[[str], object]) -> None:
+    auth_service.users = UserRepository(tables("users_by_id"), tables("user_emails"))
+    auth_service.sessions = SessionStore(tables("sessions"), 3600, 3600, 10)
+    memory.roadmap_store = tables("roadmaps")
+
+
+def timed(samples: Dict[str, List[float]], label: str, fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    samples.setdefault(label, []).append(time.perf_counter() - t0)
+    return result
+
+
+def workload(n_users: int, n_profile: int, seed: int = 7) -> Dict[str, List[float]]:
+    rng = random.Random(seed)
+    samples: Dict[str, List[float]] = {}
+    users = []
+    for i in range(n_users):
+        ok, _, user = timed(samples, "register", auth_service.register_user, f"U{i}", f"u{i}@bench.kz", "pw")
+        users.append(user)
+    for user in users:
+        timed(samples, "login", auth_service.login_user, user["email"], "pw")
+        timed(samples, "verify_token", auth_service.verify_token, user["token"])
+        roadmap = [{"title": f"step {k}", "due_date": "2026-01-01", "priority": 3} for k in range(8)]
+        timed(samples, "save_roadmap", memory.save_roadmap, user["id"], roadmap)
+        timed(samples, "get_roadmap", memory.get_roadmap, user["id"])
+    for user in rng.sample(users, min(n_profile, len(users))):
+        timed(samples, "save_user_profile", auth_service.save_user_profile, user["id"], {"entScore": 100})
+        timed(samples, "get_user_profile", auth_service.get_user_profile, user["id"])
+    return samples
+
+
+def report(name: str, samples: Dict[str, List[float]], total: float) -> None:
+    print(f"\n{name}: {total:.2f}s total")
+    for label, values in samples.items():
+        ordered = sorted(values)
+        p50 = statistics.median(ordered) * 1e6
+        p99 = ordered[max(0, int(len(ordered) * 0.99) - 1)] * 1e6
+        print(f"  {label:<18} p50 {p50:9.1f} us   p99 {p99:9.1f} us   n={len(values)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--profile-ops", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--flush-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    use_tables(lambda name: {})
+    started = time.perf_counter()
+    samples = workload(args.users, args.profile_ops)
+    report("memory (dict)", samples, time.perf_counter() - started)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.sqlite3")
+        store = SQLiteStore(path, args.batch_size, args.flush_ms / 1000)
+        use_tables(store.table)
+        started = time.perf_counter()
+        samples = workload(args.users, args.profile_ops)
+        elapsed = time.perf_counter() - started
+        t0 = time.perf_counter()
+        store.close()
+        report(f"sqlite (batch {args.batch_size}, flush {args.flush_ms:g}ms)", samples, elapsed)
+        metrics = store.metrics()
+        print(f"  close/flush {1000 * (time.perf_counter() - t0):.1f} ms, {metrics['flushes']} commits "
+              f"for {metrics['writes']} writes ({metrics['coalesced']} coalesced), "
+              f"{os.path.getsize(path) / 1024:.0f} KiB on disk")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""Local OpenAI/Groq-compatible stand-in for the LLM.
+
+Serves POST /openai/v1/chat/completions, the path the Groq SDK calls, so
+ai_service can be load-tested without GROQ_API_KEY or network access.
+
+Run from backend/:
+    python -m tools.mock_llm_server --port 8100 --latency lognormal:0.8,0.5 \\
+        --error-rate 0.05 --malformed-rate 0.05
+and point the app at it:
+    LLM_MOCK_URL=http://127.0.0.1:8100 uvicorn app.main:app
+
+RESPONSES:
+- Templated by default: explanation objects, batch arrays with the
+  requested ids, signature templates with placeholders, and roadmaps.
+  Each one is built from the prompt, so the app's parsers accept it.
+- --replay FILE: JSON lines {"match": "substring", "content": "..."};
+  a record is used when its "match" occurs in the prompt (no "match" =
+  any prompt). Recorded contents rotate round-robin.
+
+FAULTS (all drawn from one seeded RNG, so runs are repeatable):
+- --latency: "0.3" fixed, "uniform:a,b", "normal:mean,sd",
+  "lognormal:median,sigma" (seconds)
+- --error-rate: fraction answered with 429/500/503
+- --malformed-rate: fraction with broken JSON (truncated, prose-wrapped
+  or invalid)
+
+STREAMING:
+"stream": true is answered with server-sent events in the OpenAI chunk
+format. The latency above is the time to first token, then a chunk of
+about STREAM_CHUNK_CHARS characters every --token-interval seconds. The
+last chunk carries usage in x_groq, like Groq.
+
+GET /stats returns request, error and malformed counters.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+LatencyFn = Callable[[random.Random], float]
+
+ERROR_STATUSES = (429, 500, 503)
+
+# Characters per streamed chunk (~4 tokens)
+STREAM_CHUNK_CHARS = 16
+
+
+def parse_latency(spec: str) -> LatencyFn:
+    """Latency sampler from a spec like "0.2", "uniform:0.1,0.5", "lognormal:0.8,0.5"."""
+    kind, _, params = spec.partition(":")
+    if not params:
+        fixed = float(kind)
+        return lambda rng: fixed
+    a, b = (float(x) for x in params.split(","))
+    if kind == "uniform":
+        return lambda rng: rng.uniform(a, b)
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(a, b))
+    if kind == "lognormal":
+        return lambda rng: a * math.exp(b * rng.gauss(0.0, 1.0))
+    raise ValueError(f"unknown latency distribution: {kind}")
+
+
+class MockSettings:
+    def __init__(
+        self,
+        latency: str = "0",
+        error_rate: float = 0.0,
+        malformed_rate: float = 0.0,
+        seed: int = 7,
+        replay: Optional[List[Dict[str, str]]] = None,
+        token_interval: float = 0.0,
+    ):
+        self.latency = parse_latency(latency)
+        self.token_interval = token_interval
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.rng = random.Random(seed)
+        self.replay = replay or []
+        self._replay_cycles: Dict[str, Any] = {}
+
+    def replayed(self, prompt: str) -> Optional[str]:
+        matching = [r for r in self.replay if r.get("match", "") in prompt]
+        if not matching:
+            return None
+        key = matching[0].get("match", "")
+        if key not in self._replay_cycles:
+            self._replay_cycles[key] = itertools.cycle(matching)
+        return next(self._replay_cycles[key])["content"]
+
+
+def load_replay(path: str) -> List[Dict[str, str]]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# ---------------------------------------------------------------------------
+# Templated responses
+# ---------------------------------------------------------------------------
+
+def _explanation(rng: random.Random, placeholders: bool = False) -> Dict[str, Any]:
+    ent = "{ent_user} при минимуме {ent_required}" if placeholders else "Балл ЕНТ выше минимума"
+    factors = [
+        {"factor": "ЕНТ", "value": ent, "contribution": 40},
+        {"factor": "Бюджет", "value": "Обучение в пределах бюджета", "contribution": 15},
+    ]
+    if placeholders:
+        factors[0]["key"], factors[1]["key"] = "ent", "budget"
+    return {
+        "summary": rng.choice([
+            "Программа хорошо соответствует профилю студента.",
+            "Сильное совпадение по баллам и бюджету.",
+            "Подходящий вариант с хорошими перспективами трудоустройства.",
+        ]),
+        "key_factors": factors,
+        "explanation": "Итоговый балл {score}/100." if placeholders else "Требования выполнены.",
+        "strengths": ["Проходной балл", "Трудоустройство выпускников"],
+        "considerations": ["Проверьте сроки подачи документов"],
+    }
+
+
+def _roadmap(prompt: str) -> Dict[str, Any]:
+    match = re.search(r"Дата начала: (\d{4}-\d{2}-\d{2})", prompt)
+    start = datetime.fromisoformat(match.group(1)) if match else datetime.utcnow()
+    steps = ["Подготовка к ЕНТ", "Подготовка к IELTS", "Сбор документов", "Подача заявления",
+             "Собеседование", "Финансирование и гранты"]
+    return {"roadmap": [
+        {
+            "title": title,
+            "description": f"{title}: шаг {i + 1}",
+            "due_date": (start + timedelta(days=14 * (i + 1))).strftime("%Y-%m-%d"),
+            "priority": max(1, 5 - i),
+            "notify_before_days": 7,
+            "subtasks": [{"title": f"{title} - проверка", "due_date": (start + timedelta(days=14 * i + 7)).strftime("%Y-%m-%d")}],
+        }
+        for i, title in enumerate(steps)
+    ]}
+
+
+def templated_content(system_prompt: str, user_message: str, rng: random.Random) -> str:
+    """A valid response for the kind of prompt ai_service sends."""
+    if "roadmap" in system_prompt.lower():
+        return json.dumps(_roadmap(user_message), ensure_ascii=False)
+    placeholders = "плейсхолдер" in system_prompt
+    if "JSON МАССИВ" in system_prompt:
+        ids = re.findall(r'"id":\s*"([^"]+)"', user_message)
+        return json.dumps([{"id": i, **_explanation(rng, placeholders)} for i in ids], ensure_ascii=False)
+    return json.dumps(_explanation(rng, placeholders), ensure_ascii=False)
+
+
+def malformed(content: str, rng: random.Random) -> str:
+    """Break a response the way real models do."""
+    kind = rng.choice(("truncate", "prose", "invalid"))
+    if kind == "truncate":
+        return content[: max(1, int(len(content) * rng.uniform(0.2, 0.8)))]
+    if kind == "prose":
+        return "Конечно! Вот ответ:\n```json\n" + content + "\n```\nНадеюсь, это поможет."
+    return content.replace('":', "' =", 3)
+
+
+def _tokens(text: str) -> int:
+    # Rough: ~4 characters per token
+    return max(1, len(text) // 4)
+
+
+async def _stream_chunks(completion_id: str, model: str, content: str, usage: Dict[str, int], interval: float):
+    """Server-sent events in the OpenAI/Groq chat.completion.chunk format."""
+
+    def event(delta: Dict[str, str], finish_reason: Optional[str] = None, x_groq: Optional[Dict[str, Any]] = None) -> str:
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "system_fingerprint": "mock",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason, "logprobs": None}],
+            "x_groq": x_groq,
+        }
+        return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+
+    yield event({"role": "assistant", "content": ""})
+    for i in range(0, len(content), STREAM_CHUNK_CHARS):
+        if interval:
+            await asyncio.sleep(interval)
+        yield event({"content": content[i:i + STREAM_CHUNK_CHARS]})
+    yield event({}, finish_reason="stop", x_groq={"usage": usage})
+    yield "data: [DONE]\n\n"
+
+
+# ---------------------------------------------------------------------------
+# App
+# ---------------------------------------------------------------------------
+
+def create_app(settings: Optional[MockSettings] = None) -> FastAPI:
+    settings = settings or MockSettings()
+    app = FastAPI(title="Mock LLM")
+    stats = {"requests": 0, "errors": 0, "malformed": 0, "replayed": 0}
+    ids = itertools.count(1)
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+        messages = body.get("messages", [])
+        system_prompt = "\n".join(m.get("content", "") for m in messages if m.get("role") == "system")
+        user_message = "\n".join(m.get("content", "") for m in messages if m.get("role") != "system")
+
+        rng = settings.rng
+        await asyncio.sleep(settings.latency(rng))
+
+        if rng.random() < settings.error_rate:
+            stats["errors"] += 1
+            status = rng.choice(ERROR_STATUSES)
+            return JSONResponse(
+                status_code=status,
+                content={"error": {"message": f"mock error {status}", "type": "mock_error", "code": status}},
+            )
+
+        content = settings.replayed(system_prompt + "\n" + user_message)
+        if content is not None:
+            stats["replayed"] += 1
+        else:
+            content = templated_content(system_prompt, user_message, rng)
+        if rng.random() < settings.malformed_rate:
+            stats["malformed"] += 1
+            content = malformed(content, rng)
+
+        prompt_tokens = _tokens(system_prompt + user_message)
+        completion_tokens = min(_tokens(content), int(body.get("max_tokens") or 10**6))
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        completion_id = f"chatcmpl-mock-{next(ids)}"
+        if body.get("stream"):
+            return StreamingResponse(
+                _stream_chunks(completion_id, body.get("model", "mock"), content, usage, settings.token_interval),
+                media_type="text/event-stream",
+            )
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage,
+        }
+
+    @app.get("/openai/v1/models")
+    def models():
+        return {"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "mock"}]}
+
+    @app.get("/stats")
+    def get_stats():
+        return stats
+
+    return app
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Mock OpenAI/Groq-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", default="lognormal:0.8,0.4", help='"0.3", "uniform:a,b", "normal:mean,sd", "lognormal:median,sigma"')
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--replay", help="JSON-lines file of recorded responses")
+    parser.add_argument("--token-interval", type=float, default=0.02, help="seconds between streamed chunks")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    settings = MockSettings(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        malformed_rate=args.malformed_rate,
+        seed=args.seed,
+        replay=load_replay(args.replay) if args.replay else None,
+        token_interval=args.token_interval,
+    )
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
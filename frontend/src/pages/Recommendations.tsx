@@ -57,6 +57,46 @@ const Recommendations = () => {
   const API_BASE = import.meta.env.VITE_API_BASE || "http://localhost:8000/api";
   const { token } = useUser();
 
+  // Read the NDJSON stream from /recommendations/stream: the ranked list
+  // arrives first, explanations are filled in as they resolve.
+  const consumeRecommendationStream = async (response: Response) => {
+    if (!response.body) {
+      throw new Error("Streaming is not supported");
+    }
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    const handleLine = (line: string) => {
+      if (!line.trim()) return;
+      const event = JSON.parse(line);
+      if (event.type === "recommendations") {
+        setRecommendations(event.recommendations || []);
+        setLoading(false);
+      } else if (event.type === "explanation") {
+        setRecommendations((prev) =>
+          prev.map((rec) =>
+            `${rec.university_id}-${rec.program_id}` === event.id
+              ? { ...rec, explanation: event.explanation }
+              : rec
+          )
+        );
+      } else if (event.type === "error") {
+        throw new Error(event.detail || "stream error");
+      }
+    };
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const lines = buffer.split("\n");
+      buffer = lines.pop() || "";
+      lines.forEach(handleLine);
+    }
+    handleLine(buffer);
+  };
+
   // Argumentation modal state
   const [argOpen, setArgOpen] = useState(false);
   const [argumentation, setArgumentation] = useState<any>(null);
@@ -89,7 +129,7 @@ const Recommendations = () => {
       const bodyProfile = profileOverride || profile;
       // When fetching for a simulated profile, indicate simulate=true to backend
       const simulateParam = profileOverride ? "?simulate=true" : "";
-      const response = await fetch(`${API_BASE}/recommendations${simulateParam}`, {
+      const response = await fetch(`${API_BASE}/recommendations/stream${simulateParam}`, {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -101,8 +141,7 @@ const Recommendations = () => {
         const errData = await response.json().catch(() => ({}));
         throw new Error(errData.detail || `HTTP ${response.status}`);
       }
-      const data = await response.json();
-      setRecommendations(data.recommendations || []);
+      await consumeRecommendationStream(response);
     } catch (err) {
       console.error("Recommendations fetch error:", err);
       setError(`Ошибка загрузки: ${err instanceof Error ? err.message : "неизвестная ошибка"}`);
@@ -139,7 +178,7 @@ const Recommendations = () => {
     setError(null);
 
     try {
-      const response = await fetch(`${API_BASE}/recommendations`, {
+      const response = await fetch(`${API_BASE}/recommendations/stream`, {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -163,8 +202,7 @@ const Recommendations = () => {
         throw new Error(errData.detail || `HTTP ${response.status}`);
       }
 
-      const data = await response.json();
-      setRecommendations(data.recommendations || []);
+      await consumeRecommendationStream(response);
     } catch (err) {
       console.error("Recommendations fetch error:", err);
       setError(`Ошибка загрузки: ${err instanceof Error ? err.message : "неизвестная ошибка"}`);
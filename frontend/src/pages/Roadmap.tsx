@@ -64,6 +64,87 @@ const RoadmapPage = () => {
     }
   };
 
+  // The AI roadmap is generated in the background; poll its job and swap it in
+  const pollRoadmapJob = async (jobId: string) => {
+    for (let attempt = 0; attempt < 40; attempt++) {
+      await new Promise((resolve) => setTimeout(resolve, 1500));
+      const res = await fetch(`${API_BASE}/roadmap/jobs/${jobId}`, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      if (!res.ok) return;
+      const data = await res.json();
+      if (data.status === "done") {
+        setRoadmap(data.roadmap || []);
+        return;
+      }
+      if (data.status === "failed") return;
+    }
+  };
+
+  // Items arrive one by one as the model writes them; "done" carries the saved roadmap
+  const consumeRoadmapStream = async (response: Response) => {
+    if (!response.body) {
+      throw new Error("Streaming is not supported");
+    }
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    let finished = false;
+
+    const handleLine = (line: string) => {
+      if (!line.trim()) return;
+      const event = JSON.parse(line);
+      if (event.type === "item") {
+        setRoadmap((prev) => [...prev, event.item]);
+        setLoading(false);
+      } else if (event.type === "reset") {
+        setRoadmap([]);
+      } else if (event.type === "done") {
+        setRoadmap(event.roadmap || []);
+        finished = true;
+      } else if (event.type === "error") {
+        throw new Error(event.detail || "stream error");
+      }
+    };
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const lines = buffer.split("\n");
+      buffer = lines.pop() || "";
+      lines.forEach(handleLine);
+    }
+    handleLine(buffer);
+    if (!finished) {
+      throw new Error("Roadmap stream ended early");
+    }
+  };
+
+  // Non-streaming path: placeholder now, AI roadmap from a background job
+  const createRoadmapWithJob = async (payload: object) => {
+    const res = await fetch(`${API_BASE}/roadmap`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        Authorization: `Bearer ${token}`,
+      },
+      body: JSON.stringify(payload),
+    });
+
+    if (!res.ok) {
+      const d = await res.json().catch(() => ({}));
+      throw new Error(d.detail || `HTTP ${res.status}`);
+    }
+
+    const data = await res.json();
+    setRoadmap(data.roadmap || []);
+    if (data.job_id) {
+      // Placeholder is shown right away; the polling runs after the spinner stops
+      pollRoadmapJob(data.job_id).catch(() => undefined);
+    }
+  };
+
   const createRoadmap = async (uniId?: string, programId?: string) => {
     const actualUni = uniId || uni;
     const actualProgram = programId || program;
@@ -80,22 +161,22 @@ const RoadmapPage = () => {
         preferences: {}
       };
 
-      const res = await fetch(`${API_BASE}/roadmap`, {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-          Authorization: `Bearer ${token}`,
-        },
-        body: JSON.stringify(payload),
-      });
-
-      if (!res.ok) {
-        const d = await res.json().catch(() => ({}));
-        throw new Error(d.detail || `HTTP ${res.status}`);
+      try {
+        const res = await fetch(`${API_BASE}/roadmap/stream`, {
+          method: "POST",
+          headers: {
+            "Content-Type": "application/json",
+            Authorization: `Bearer ${token}`,
+          },
+          body: JSON.stringify(payload),
+        });
+        if (!res.ok) throw new Error(`HTTP ${res.status}`);
+        setRoadmap([]);
+        await consumeRoadmapStream(res);
+      } catch (streamError) {
+        console.error("Roadmap stream error, falling back:", streamError);
+        await createRoadmapWithJob(payload);
       }
-
-      const data = await res.json();
-      setRoadmap(data.roadmap || []);
     } catch (e: any) {
       setError(e.message || "Ошибка генерации roadmap");
     } finally {